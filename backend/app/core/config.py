@@ -21,6 +21,14 @@ class Settings:
     # DB
     database_url: str = _env("DATABASE_URL", "sqlite:///./app.db") or "sqlite:///./app.db"
     db_auto_create: bool = (_env("DB_AUTO_CREATE", "true") or "true").lower() in {"1", "true", "yes", "y"}
+    # Optional per-user sharding: "name=url,name=url" (see backend/app/db/sharding.py). Unset = DATABASE_URL only.
+    database_shards: str | None = _env("DATABASE_SHARDS")
+    # Points per shard on the consistent-hash ring; changing it remaps users (rebalance afterwards).
+    shard_vnodes: int = int(_env("SHARD_VNODES", "64") or "64")
+    # Optional read replicas: "name=url,..." per shard, or a bare URL for the first/only database.
+    database_replicas: str | None = _env("DATABASE_REPLICAS")
+    # After a user writes, their reads stay on the primary this long (covers replication lag).
+    read_your_writes_seconds: float = float(_env("READ_YOUR_WRITES_SECONDS", "5") or "5")
 
     # OpenAI
     openai_api_key: str | None = _env("OPENAI_API_KEY")
@@ -37,6 +45,88 @@ class Settings:
     google_redirect_uri: str | None = _env("GOOGLE_REDIRECT_URI")
     google_calendar_id: str | None = _env("GOOGLE_CALENDAR_ID", "primary")
 
+    # How long idempotency keys (REST `Idempotency-Key`, chat tool calls) are remembered.
+    idempotency_ttl_seconds: float = float(_env("IDEMPOTENCY_TTL_SECONDS", "86400") or "86400")
+    # How long an unfinished attempt holds its key; after that (e.g. the worker died) a retry takes over.
+    idempotency_lease_seconds: float = float(_env("IDEMPOTENCY_LEASE_SECONDS", "60") or "60")
+
+    # Shared per-user task cache (see backend/app/services/task_cache.py); 0 entries disables it.
+    task_cache_entries: int = int(_env("TASK_CACHE_ENTRIES", "256") or "256")
+    task_cache_max_tasks: int = int(_env("TASK_CACHE_MAX_TASKS", "50000") or "50000")
+
+    # Rate limiting (see backend/app/core/ratelimit.py). "memory" = per process; "sqlite" = shared by local workers.
+    rate_limit_backend: str = (_env("RATE_LIMIT_BACKEND", "memory") or "memory").lower()
+    rate_limit_sqlite_path: str = _env("RATE_LIMIT_SQLITE_PATH", "./ratelimit.db") or "./ratelimit.db"
+    # Per-user limits by route template, e.g. "/chat=30/min,/v1/tasks=120/min" (empty = unlimited).
+    rate_limits: str = _env("RATE_LIMITS", "") or ""
+    # Global budget for real LLM calls per API key, e.g. "500/min" (empty = unlimited); callers wait for a token.
+    llm_rate_limit: str = _env("LLM_RATE_LIMIT", "") or ""
+    llm_rate_max_wait_seconds: float = float(_env("LLM_RATE_MAX_WAIT_SECONDS", "30") or "30")
+    # LLM calls allowed in flight per process; more queue instead of failing.
+    llm_max_concurrency: int = int(_env("LLM_MAX_CONCURRENCY", "8") or "8")
+
+    # Run unambiguous chat commands ("list my tasks", "mark task 3 done", ...) without the LLM.
+    chat_fast_path: bool = (_env("CHAT_FAST_PATH", "true") or "true").lower() in {"1", "true", "yes", "y"}
+
+    # LLM resilience (see backend/app/llm/resilience.py)
+    # Per-attempt timeout for provider calls; retryable failures (timeouts, 429, 5xx) retry with jittered backoff.
+    llm_timeout_seconds: float = float(_env("LLM_TIMEOUT_SECONDS", "30") or "30")
+    llm_max_retries: int = int(_env("LLM_MAX_RETRIES", "2") or "2")
+    llm_backoff_base_seconds: float = float(_env("LLM_BACKOFF_BASE_SECONDS", "0.5") or "0.5")
+    llm_backoff_max_seconds: float = float(_env("LLM_BACKOFF_MAX_SECONDS", "8") or "8")
+    # Circuit breaker: open when at least this share of the last N calls failed, for the cooldown.
+    llm_breaker_window: int = int(_env("LLM_BREAKER_WINDOW", "20") or "20")
+    llm_breaker_failure_ratio: float = float(_env("LLM_BREAKER_FAILURE_RATIO", "0.5") or "0.5")
+    llm_breaker_min_calls: int = int(_env("LLM_BREAKER_MIN_CALLS", "5") or "5")
+    llm_breaker_cooldown_seconds: float = float(_env("LLM_BREAKER_COOLDOWN_SECONDS", "30") or "30")
+    # While the provider is failing, answer list/prioritize requests without it instead of returning 503.
+    llm_degrade_on_failure: bool = (_env("LLM_DEGRADE_ON_FAILURE", "true") or "true").lower() in {"1", "true", "yes", "y"}
+    # Inject provider faults for offline testing, e.g. "error_rate=0.3,timeout_rate=0.1,latency=0.2" (unset = off).
+    llm_faults: str | None = _env("LLM_FAULTS")
+
+    # Tracing (in-process spans; see backend/app/core/tracing.py)
+    # Fraction of requests traced. Keep low in production; spans cost only a ContextVar lookup when unsampled.
+    trace_sample_rate: float = float(_env("TRACE_SAMPLE_RATE", "0") or "0")
+    # Append sampled traces as JSON lines to this file (unset = don't write).
+    trace_export_path: str | None = _env("TRACE_EXPORT_PATH")
+    # Allow clients to force a trace with `X-Debug-Trace: 1` and get it back in an `X-Trace` header.
+    trace_debug_header: bool = (_env("TRACE_DEBUG_HEADER", "false") or "false").lower() in {"1", "true", "yes", "y"}
+
+    # Real-time push (WebSocket /v1/ws)
+    # "memory" = single process; "sqlite" = workers share events through a local SQLite file.
+    pubsub_backend: str = (_env("PUBSUB_BACKEND", "memory") or "memory").lower()
+    pubsub_sqlite_path: str = _env("PUBSUB_SQLITE_PATH", "./pubsub.db") or "./pubsub.db"
+    # Events buffered per WebSocket before a slow client is told to resync.
+    ws_queue_size: int = int(_env("WS_QUEUE_SIZE", "100") or "100")
+
+    # Trained completion-chance model (backend/scripts/train_completion_model.py); missing file = heuristic.
+    completion_model_path: str = _env("COMPLETION_MODEL_PATH", "./completion_model.json") or ""
+
+    # Per-user prioritization weights (backend/app/services/priority_weights.py)
+    # How often each worker learns from new completions (0 = not in-process; run `backend.scripts.fit_priority_weights`).
+    priority_learning_interval_seconds: float = float(_env("PRIORITY_LEARNING_INTERVAL_SECONDS", "900") or "900")
+    # Learned weights apply once this many completions went into them; defaults until then.
+    priority_learning_min_events: int = int(_env("PRIORITY_LEARNING_MIN_EVENTS", "20") or "20")
+
+    # Archival (backend/app/services/archive_service.py)
+    # Done/canceled tasks finished more than this many days ago move to `archived_tasks` (0 = never).
+    archive_after_days: int = int(_env("ARCHIVE_AFTER_DAYS", "90") or "90")
+    # How often each worker runs the archiver (0 = not in-process; run `backend.scripts.archive_tasks` instead).
+    archive_interval_seconds: float = float(_env("ARCHIVE_INTERVAL_SECONDS", "3600") or "3600")
+    # Tasks moved per transaction; batches are spaced out so writers aren't starved.
+    archive_batch_size: int = int(_env("ARCHIVE_BATCH_SIZE", "500") or "500")
+    # The archiver also drops `/v1/changes` log entries older than this (0 = keep forever);
+    # clients that haven't synced since then get `reset_required`.
+    change_log_retention_days: int = int(_env("CHANGE_LOG_RETENTION_DAYS", "30") or "30")
+
+    # Serving (gunicorn.conf.py)
+    # Worker processes; 0 = one per CPU this process may run on.
+    web_concurrency: int = int(_env("WEB_CONCURRENCY", "0") or "0")
+    # Threads per worker running sync endpoints (anyio's default is 40).
+    threadpool_size: int = int(_env("THREADPOOL_SIZE", "40") or "40")
+    # Seconds an idle client connection stays open; keep it above the proxy's idle timeout.
+    keep_alive_seconds: int = int(_env("KEEP_ALIVE_SECONDS", "5") or "5")
+
     # API
     cors_allow_origins: list[str] = field(
         default_factory=lambda: [
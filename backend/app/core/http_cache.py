@@ -0,0 +1,51 @@
+"""
+Conditional GET helpers (ETag / If-None-Match, Last-Modified).
+
+ETags are derived from `version_service` counters, so validating a request costs
+one indexed lookup and no task hydration.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from fastapi.responses import Response
+
+
+# Bump when the task JSON representation changes so old client caches stop matching.
+REPRESENTATION_VERSION = 1
+
+
+def make_etag(*parts: object) -> str:
+    raw = "|".join(str(p) for p in (REPRESENTATION_VERSION, *parts))
+    return '"' + hashlib.blake2b(raw.encode(), digest_size=12).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """`If-None-Match` uses weak comparison, so a `W/` prefix on either side is ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+def http_date(dt: datetime) -> str:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return format_datetime(dt.astimezone(timezone.utc), usegmt=True)
+
+
+def cache_headers(etag: str, last_modified: datetime | None) -> dict[str, str]:
+    # `no-cache` = clients may store the body but must revalidate (cheap 304) before reuse.
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def not_modified(headers: dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,401 @@
+"""
+Minimal in-process metrics with Prometheus text exposition.
+
+No client library or external collector is required: metrics live in this
+process and are rendered on demand by `GET /metrics`. Each worker process keeps
+its own registry (scrape each worker, or aggregate at the collector).
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+DEFAULT_BUCKETS: tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS: tuple[float, ...] = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] | list[str] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, object]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] | list[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] | list[str] = ()) -> None:
+        super().__init__(name, help_text, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: object) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+@dataclass
+class _HistogramState:
+    bucket_counts: list[int]
+    count: int = 0
+    total: float = 0.0
+
+
+_INF_LE = 'le="+Inf"'
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] | list[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._states: dict[tuple[str, ...], _HistogramState] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                state = _HistogramState(bucket_counts=[0] * len(self.buckets))
+                self._states[key] = state
+            for i, upper in enumerate(self.buckets):
+                if value <= upper:
+                    state.bucket_counts[i] += 1
+            state.count += 1
+            state.total += value
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def snapshot(self, **labels: object) -> tuple[int, float]:
+        """Return `(count, sum)` for one label set (handy in benchmarks/tests)."""
+        state = self._states.get(self._key(labels))
+        if state is None:
+            return 0, 0.0
+        return state.count, state.total
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(
+                (k, list(s.bucket_counts), s.count, s.total) for k, s in self._states.items()
+            )
+        lines: list[str] = []
+        for key, bucket_counts, count, total in items:
+            for upper, cnt in zip(self.buckets, bucket_counts):
+                le = f'le="{_format_value(upper)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cnt}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, _INF_LE)} {count}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered.")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: tuple[str, ...] | list[str] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))  # type: ignore[return-value]
+
+    def gauge(self, name: str, help_text: str, labelnames: tuple[str, ...] | list[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] | list[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))  # type: ignore[return-value]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.help_text}")
+            lines.append(f"# TYPE {m.name} {m.type_name}")
+            lines.extend(m.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ["method", "route", "status"],
+)
+LLM_CALL_SECONDS = REGISTRY.histogram(
+    "llm_call_duration_seconds",
+    "Latency of one LLMClient.complete call.",
+    ["client"],
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total",
+    "Tokens reported by the LLM provider.",
+    ["client", "kind"],
+)
+TOOL_SECONDS = REGISTRY.histogram(
+    "tool_execution_duration_seconds",
+    "Latency of one execute_tool call.",
+    ["tool", "ok"],
+)
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    "db_query_duration_seconds",
+    "Latency of individual SQL statements.",
+)
+DB_QUERIES_PER_REQUEST = REGISTRY.histogram(
+    "db_queries_per_request",
+    "Number of SQL statements executed while serving one request.",
+    ["route"],
+    buckets=COUNT_BUCKETS,
+)
+DB_TIME_PER_REQUEST = REGISTRY.histogram(
+    "db_time_per_request_seconds",
+    "Total SQL time spent while serving one request.",
+    ["route"],
+)
+CHAT_TOOL_LOOP_ITERATIONS = REGISTRY.histogram(
+    "chat_tool_loop_iterations",
+    "Number of LLM round trips run_chat needed to produce a reply.",
+    buckets=(1, 2, 3, 4, 5, 6),
+)
+CHAT_FAST_PATH = REGISTRY.counter(
+    "chat_fast_path_total",
+    "Chat messages by fast-path intent (list, prioritize, complete, add; none = sent to the LLM).",
+    ["intent"],
+)
+RATE_LIMITED = REGISTRY.counter(
+    "rate_limited_total",
+    "Requests or LLM calls throttled, by scope (route template or \"llm\").",
+    ["scope"],
+)
+LLM_QUEUED = REGISTRY.gauge(
+    "llm_calls_queued",
+    "LLM calls waiting for a concurrency slot.",
+)
+LLM_IN_FLIGHT = REGISTRY.gauge(
+    "llm_calls_in_flight",
+    "LLM calls currently holding a concurrency slot.",
+)
+LLM_QUEUE_SECONDS = REGISTRY.histogram(
+    "llm_queue_wait_seconds",
+    "Time LLM calls waited for a concurrency slot.",
+)
+LLM_RETRIES = REGISTRY.counter(
+    "llm_retries_total",
+    "LLM calls retried after a retryable failure, by error kind.",
+    ["kind"],
+)
+LLM_FAILURES = REGISTRY.counter(
+    "llm_failures_total",
+    "Failed LLM call attempts, by error kind (timeout, rate_limited, server_error, connection, client_error).",
+    ["kind"],
+)
+LLM_BREAKER_STATE = REGISTRY.gauge(
+    "llm_circuit_breaker_state",
+    "LLM circuit breaker state: 0 closed, 1 half-open, 2 open.",
+)
+LLM_DEGRADED = REGISTRY.counter(
+    "llm_degraded_responses_total",
+    "Chat steps answered without the provider, by reason (circuit_open, failed).",
+    ["reason"],
+)
+IDEMPOTENT_REQUESTS = REGISTRY.counter(
+    "idempotent_requests_total",
+    "Writes carrying an idempotency key, by outcome (executed, replayed, in_progress, mismatch).",
+    ["outcome"],
+)
+TASK_CACHE_LOOKUPS = REGISTRY.counter(
+    "task_cache_lookups_total",
+    "Task cache lookups by layer (request, shared) and result (hit, miss).",
+    ["layer", "result"],
+)
+TASK_CACHE_ITEMS = REGISTRY.gauge(
+    "task_cache_items",
+    "Tasks (plus dependency-count entries) held in the shared task cache.",
+)
+ARCHIVED_TASKS = REGISTRY.counter(
+    "archived_tasks_total",
+    "Done/canceled tasks moved to the archive table.",
+)
+ARCHIVE_BATCH_SECONDS = REGISTRY.histogram(
+    "archive_batch_seconds",
+    "Duration of one archival batch (one transaction).",
+)
+
+WS_SUBSCRIBERS = REGISTRY.gauge(
+    "ws_subscribers",
+    "Open WebSocket subscriptions in this process.",
+)
+WS_EVENTS = REGISTRY.counter(
+    "ws_events_total",
+    "Events handled by the pub/sub hub, by outcome (queued, sent, dropped, resync, publish_error).",
+    ["outcome"],
+)
+TRACES_DROPPED = REGISTRY.counter(
+    "traces_dropped_total",
+    "Sampled traces not written to TRACE_EXPORT_PATH because the export queue was full.",
+)
+
+
+# --- Request-scoped DB query accounting -------------------------------------------------
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+# Holds a mutable object (not a value) so increments made in threadpool workers,
+# which run with a copy of the request context, are visible to the middleware.
+_query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _query_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    starts = conn.info.get("metrics_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    DB_QUERY_SECONDS.observe(elapsed)
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+
+def _handle_error(context) -> None:  # noqa: ANN001
+    # Failed statements never reach after_cursor_execute; drop their start time.
+    conn = context.connection
+    starts = conn.info.get("metrics_query_start") if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach query timing hooks to an engine (idempotent)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
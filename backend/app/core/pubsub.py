@@ -0,0 +1,229 @@
+"""
+In-process pub/sub hub for pushing events to WebSocket clients.
+
+Publishers (sync code in threadpool workers) call `hub.publish(channel, event)`;
+subscribers are asyncio queues owned by WebSocket handlers. Delivery between the
+two goes through a pluggable backend:
+
+- `MemoryBackend`: delivers directly; correct for a single process.
+- `SQLiteBackend`: a local stand-in for Redis pub/sub. Publishers append to a
+  shared SQLite file and every worker polls it, so all uvicorn workers on a host
+  see every event.
+
+Slow consumers never block publishers: each subscription has a bounded queue and,
+when it overflows, pending events are dropped and replaced by a single
+`{"type": "resync"}` message telling the client to catch up via `/v1/changes`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Callable
+
+from backend.app.core import metrics
+from backend.app.core.config import settings
+
+
+Deliver = Callable[[str, dict[str, Any]], None]
+
+
+class PubSubBackend:
+    local_only = False
+
+    def start(self, deliver: Deliver) -> None:
+        raise NotImplementedError
+
+    def publish(self, channel: str, event: dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        pass
+
+
+class MemoryBackend(PubSubBackend):
+    # Events only reach subscribers in this process, so publishing with none can be skipped.
+    local_only = True
+
+    def __init__(self) -> None:
+        self._deliver: Deliver | None = None
+
+    def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    def publish(self, channel: str, event: dict[str, Any]) -> None:
+        if self._deliver is not None:
+            self._deliver(channel, event)
+
+
+class SQLiteBackend(PubSubBackend):
+    def __init__(self, path: str, *, poll_interval_s: float = 0.05, retention_s: float = 60.0) -> None:
+        self.path = path
+        self.poll_interval_s = poll_interval_s
+        self.retention_s = retention_s
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._local = threading.local()
+        self._publishes = 0
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        if not self._schema_ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pubsub_messages ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, payload TEXT NOT NULL, "
+                "created_at REAL NOT NULL)"
+            )
+            self._schema_ready = True
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def publish(self, channel: str, event: dict[str, Any]) -> None:
+        conn = self._conn()
+        now = time.time()
+        conn.execute(
+            "INSERT INTO pubsub_messages (channel, payload, created_at) VALUES (?, ?, ?)",
+            (channel, json.dumps(event, default=str), now),
+        )
+        self._publishes += 1
+        if self._publishes % 200 == 0:
+            conn.execute("DELETE FROM pubsub_messages WHERE created_at < ?", (now - self.retention_s,))
+
+    def start(self, deliver: Deliver) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, args=(deliver,), name="pubsub-sqlite", daemon=True)
+        self._thread.start()
+
+    def _poll(self, deliver: Deliver) -> None:
+        conn = self._connect()
+        try:
+            # Only deliver events published after this worker started.
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM pubsub_messages").fetchone()[0]
+            while not self._stop.is_set():
+                rows = conn.execute(
+                    "SELECT id, channel, payload FROM pubsub_messages WHERE id > ? ORDER BY id LIMIT 500",
+                    (last_id,),
+                ).fetchall()
+                for row_id, channel, payload in rows:
+                    last_id = row_id
+                    deliver(channel, json.loads(payload))
+                if len(rows) < 500:
+                    self._stop.wait(self.poll_interval_s)
+        finally:
+            conn.close()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+
+class Subscription:
+    def __init__(self, channel: str, loop: asyncio.AbstractEventLoop, maxsize: int) -> None:
+        self.channel = channel
+        self.loop = loop
+        self.queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def offer(self, event: dict[str, Any]) -> None:
+        """Enqueue without blocking (runs on the subscriber's loop)."""
+        try:
+            self.queue.put_nowait(event)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        # Backpressure: a client this far behind needs a resync, not more events.
+        while not self.queue.empty():
+            if self.queue.get_nowait().get("type") == "resync":
+                continue
+            self.dropped += 1
+            metrics.WS_EVENTS.inc(outcome="dropped")
+        self.dropped += 1  # the event that didn't fit
+        metrics.WS_EVENTS.inc(outcome="dropped")
+        self.queue.put_nowait({"type": "resync", "reason": "slow_consumer", "dropped": self.dropped})
+        metrics.WS_EVENTS.inc(outcome="resync")
+
+    async def get(self) -> dict[str, Any]:
+        return await self.queue.get()
+
+
+class Hub:
+    def __init__(self, backend: PubSubBackend, *, queue_size: int = 100) -> None:
+        self.backend = backend
+        self.queue_size = queue_size
+        self._subs: dict[str, set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self) -> None:
+        if not self._started:
+            self.backend.start(self._deliver)
+            self._started = True
+
+    def stop(self) -> None:
+        if self._started:
+            self.backend.stop()
+            self._started = False
+
+    def subscribe(self, channel: str) -> Subscription:
+        self.start()
+        sub = Subscription(channel, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subs.setdefault(channel, set()).add(sub)
+        metrics.WS_SUBSCRIBERS.inc()
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.channel]
+        metrics.WS_SUBSCRIBERS.dec()
+
+    def publish(self, channel: str, event: dict[str, Any]) -> None:
+        """Thread-safe; never blocks on subscribers, and never raises into the writer."""
+        if self.backend.local_only and not self._subs:
+            return
+        try:
+            self.backend.publish(channel, event)
+        except Exception:
+            metrics.WS_EVENTS.inc(outcome="publish_error")
+
+    def _deliver(self, channel: str, event: dict[str, Any]) -> None:
+        with self._lock:
+            subs = list(self._subs.get(channel, ()))
+        for sub in subs:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, event)
+                metrics.WS_EVENTS.inc(outcome="queued")
+            except RuntimeError:
+                # Loop already closed (connection torn down mid-delivery).
+                continue
+
+
+def _build_backend() -> PubSubBackend:
+    if settings.pubsub_backend == "sqlite":
+        return SQLiteBackend(settings.pubsub_sqlite_path)
+    if settings.pubsub_backend != "memory":
+        raise ValueError(f"Unknown PUBSUB_BACKEND {settings.pubsub_backend!r} (expected memory or sqlite).")
+    return MemoryBackend()
+
+
+hub = Hub(_build_backend(), queue_size=settings.ws_queue_size)
@@ -0,0 +1,219 @@
+"""
+Token-bucket rate limiting and LLM concurrency control.
+
+Buckets live in a pluggable store:
+- `MemoryStore`: per process.
+- `SQLiteStore`: a local stand-in for Redis; every uvicorn worker on a host updates the
+  same buckets inside a `BEGIN IMMEDIATE` transaction, so limits hold across workers.
+  It also keeps short-lived marks shared by the workers (read-your-writes, see
+  `db/sharding.py`).
+
+Limits are written as "N/period" (period: s, sec, min, h, hour, day), e.g. "30/min".
+Routes are limited per user (`X-User-Id`, else client address) via `RATE_LIMITS`;
+real LLM calls share a global budget per API key (`LLM_RATE_LIMIT`) and at most
+`LLM_MAX_CONCURRENCY` run at once. Both LLM controls wait instead of failing.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from backend.app.core import metrics
+from backend.app.core.config import settings
+
+
+_PERIODS = {"s": 1.0, "sec": 1.0, "second": 1.0, "min": 60.0, "minute": 60.0, "h": 3600.0, "hour": 3600.0, "day": 86400.0}
+
+
+@dataclass(frozen=True)
+class Rate:
+    """`burst` tokens, refilled at `per_second`."""
+
+    burst: float
+    per_second: float
+
+    @classmethod
+    def parse(cls, spec: str) -> Rate:
+        count, _, period = spec.strip().partition("/")
+        seconds = _PERIODS.get(period.strip().lower() or "s")
+        if seconds is None:
+            raise ValueError(f"Unknown rate period in {spec!r}.")
+        n = float(count)
+        if n <= 0:
+            raise ValueError(f"Rate must be positive: {spec!r}.")
+        return cls(burst=n, per_second=n / seconds)
+
+
+def parse_route_limits(spec: str | None) -> dict[str, Rate]:
+    """Parse `"/chat=30/min,/v1/tasks=120/min"` (route templates as in `/metrics`)."""
+    limits: dict[str, Rate] = {}
+    for part in (spec or "").split(","):
+        route, sep, rate = part.strip().rpartition("=")
+        if not sep:
+            continue
+        limits[route.strip()] = Rate.parse(rate)
+    return limits
+
+
+class RateLimited(Exception):
+    def __init__(self, scope: str, retry_after_s: float) -> None:
+        super().__init__(f"Rate limit exceeded ({scope}); retry in {retry_after_s:.1f}s.")
+        self.scope = scope
+        self.retry_after_s = retry_after_s
+
+
+def _refill(tokens: float, updated_at: float, rate: Rate, now: float) -> float:
+    return min(rate.burst, tokens + max(0.0, now - updated_at) * rate.per_second)
+
+
+class RateLimitStore:
+    def take(self, key: str, rate: Rate, cost: float = 1.0) -> float:
+        """Consume `cost` tokens; return 0 on success, else seconds until they'd be available."""
+        raise NotImplementedError
+
+
+class MemoryStore(RateLimitStore):
+    def __init__(self, max_keys: int = 100_000) -> None:
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self.max_keys = max_keys
+
+    def take(self, key: str, rate: Rate, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (rate.burst, now))
+            tokens = _refill(tokens, updated_at, rate, now)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                # Idle buckets are full again; dropping them loses nothing.
+                self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < 3600}
+            return (cost - tokens) / rate.per_second
+
+
+class SQLiteStore(RateLimitStore):
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        # Expired marks are swept every 1000 writes.
+        self._marks_written = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS marks (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+            self._local.conn = conn
+        return conn
+
+    def mark(self, key: str, ttl_s: float) -> None:
+        """Flag `key` for `ttl_s` seconds, for every process using this file."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO marks (key, expires_at) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at",
+            (key, now + ttl_s),
+        )
+        self._marks_written += 1
+        if self._marks_written % 1000 == 0:
+            conn.execute("DELETE FROM marks WHERE expires_at <= ?", (now,))
+
+    def marked(self, key: str) -> bool:
+        row = self._conn().execute("SELECT expires_at FROM marks WHERE key = ?", (key,)).fetchone()
+        return row is not None and row[0] > time.time()
+
+    def take(self, key: str, rate: Rate, cost: float = 1.0) -> float:
+        # Wall clock: monotonic clocks aren't comparable across processes.
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens = rate.burst if row is None else _refill(row[0], row[1], rate, now)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate.per_second
+            conn.execute(
+                "INSERT INTO rate_buckets (key, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (key, tokens, now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+def _build_store() -> RateLimitStore:
+    if settings.rate_limit_backend == "sqlite":
+        return SQLiteStore(settings.rate_limit_sqlite_path)
+    if settings.rate_limit_backend != "memory":
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND {settings.rate_limit_backend!r} (expected memory or sqlite).")
+    return MemoryStore()
+
+
+store = _build_store()
+ROUTE_LIMITS = parse_route_limits(settings.rate_limits)
+LLM_RATE = Rate.parse(settings.llm_rate_limit) if settings.llm_rate_limit else None
+
+
+def check(key: str, rate: Rate, *, scope: str) -> None:
+    """Take one token or raise `RateLimited`."""
+    wait = store.take(key, rate)
+    if wait > 0:
+        metrics.RATE_LIMITED.inc(scope=scope)
+        raise RateLimited(scope, wait)
+
+
+def wait_for(key: str, rate: Rate, *, scope: str, max_wait_s: float) -> None:
+    """Block until a token is available; raise `RateLimited` if that would exceed `max_wait_s`."""
+    deadline = time.monotonic() + max_wait_s
+    throttled = False
+    while True:
+        wait = store.take(key, rate)
+        if wait <= 0:
+            return
+        if not throttled:
+            metrics.RATE_LIMITED.inc(scope=scope)
+            throttled = True
+        if time.monotonic() + wait > deadline:
+            raise RateLimited(scope, wait)
+        time.sleep(wait)
+
+
+_llm_slots = threading.BoundedSemaphore(max(1, settings.llm_max_concurrency))
+
+
+@contextmanager
+def llm_slot() -> Iterator[None]:
+    """
+    Hold one of `LLM_MAX_CONCURRENCY` slots for one provider request (one attempt);
+    queues when all are busy. Don't hold it while sleeping for backoff or budget.
+    """
+    start = time.perf_counter()
+    metrics.LLM_QUEUED.inc()
+    try:
+        _llm_slots.acquire()
+    finally:
+        metrics.LLM_QUEUED.dec()
+    metrics.LLM_QUEUE_SECONDS.observe(time.perf_counter() - start)
+    metrics.LLM_IN_FLIGHT.inc()
+    try:
+        yield
+    finally:
+        metrics.LLM_IN_FLIGHT.dec()
+        _llm_slots.release()
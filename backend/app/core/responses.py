@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from fastapi.responses import Response
+
+
+class JSONBytesResponse(Response):
+    """
+    JSON response for a body that is already serialized (e.g. by a pydantic TypeAdapter).
+
+    Returning it from an endpoint skips FastAPI's `response_model` re-validation and
+    `json.dumps`; keep `response_model` on the route so the OpenAPI schema stays accurate.
+    """
+
+    media_type = "application/json"
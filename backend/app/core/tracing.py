@@ -0,0 +1,289 @@
+"""
+Lightweight request-scoped tracing.
+
+A trace is started per HTTP request (subject to sampling) and carried through
+the call stack with contextvars, including into threadpool workers that run the
+sync endpoints. Code opens spans with `span("name", **attrs)`; when the current
+request isn't sampled that is a single ContextVar lookup, so instrumentation can
+stay in hot paths.
+
+Finished traces are exported as one JSON object per line to
+`settings.trace_export_path` and/or returned in the `X-Trace` debug header. The
+file is written by a background thread: `export_trace` only queues the trace, so
+the event loop never waits on disk.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from backend.app.core import metrics
+from backend.app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: str
+    parent_id: str | None
+    start: float
+    end: float | None = None
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    name: str
+    started_at: datetime
+    start: float
+    end: float | None = None
+    attrs: dict[str, Any] = field(default_factory=dict)
+    spans: list[Span] = field(default_factory=list)
+
+    def to_dict(self) -> dict[str, Any]:
+        def _ms(seconds: float) -> float:
+            return round(seconds * 1000.0, 3)
+
+        end = self.end if self.end is not None else time.perf_counter()
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": _ms(end - self.start),
+            "attrs": self.attrs,
+            "spans": [
+                {
+                    "name": s.name,
+                    "span_id": s.span_id,
+                    "parent_id": s.parent_id,
+                    "offset_ms": _ms(s.start - self.start),
+                    "duration_ms": _ms((s.end if s.end is not None else end) - s.start),
+                    "attrs": s.attrs,
+                }
+                for s in self.spans
+            ],
+        }
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def current_trace() -> Trace | None:
+    return _current_trace.get()
+
+
+def should_sample(*, force: bool = False) -> bool:
+    if force:
+        return True
+    rate = settings.trace_sample_rate
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+@contextmanager
+def start_trace(name: str, *, sampled: bool, **attrs: Any) -> Iterator[Trace | None]:
+    """Open a root trace for the current context (yields None when not sampled)."""
+    if not sampled:
+        yield None
+        return
+
+    trace = Trace(
+        trace_id=uuid.uuid4().hex,
+        name=name,
+        started_at=datetime.now(tz=timezone.utc),
+        start=time.perf_counter(),
+        attrs=dict(attrs),
+    )
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    finally:
+        trace.end = time.perf_counter()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+def begin_span(name: str, **attrs: Any) -> Span | None:
+    """Start a leaf span without making it current (for callback-style hooks)."""
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    parent = _current_span.get()
+    s = Span(
+        name=name,
+        span_id=_new_id(),
+        parent_id=parent.span_id if parent is not None else None,
+        start=time.perf_counter(),
+        attrs=dict(attrs),
+    )
+    trace.spans.append(s)
+    return s
+
+
+def end_span(s: Span | None) -> None:
+    if s is not None:
+        s.end = time.perf_counter()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span | None]:
+    s = begin_span(name, **attrs)
+    if s is None:
+        yield None
+        return
+
+    token = _current_span.set(s)
+    try:
+        yield s
+    except Exception as e:
+        s.attrs["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        s.end = time.perf_counter()
+        _current_span.reset(token)
+
+
+class _Exporter:
+    """Appends queued traces to their files from one writer thread, a batch per wake-up."""
+
+    def __init__(self, max_pending: int = 10_000) -> None:
+        self._queue: queue.Queue[tuple[str, dict[str, Any]]] = queue.Queue(maxsize=max_pending)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, path: str, payload: dict[str, Any]) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait((path, payload))
+        except queue.Full:
+            metrics.TRACES_DROPPED.inc()
+
+    def flush(self) -> None:
+        """Wait until every queued trace is written."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            by_path: dict[str, list[str]] = {}
+            for path, payload in batch:
+                by_path.setdefault(path, []).append(json.dumps(payload, default=str) + "\n")
+            for path, lines in by_path.items():
+                try:
+                    with open(path, "a", encoding="utf-8") as f:
+                        f.writelines(lines)
+                except OSError:
+                    logger.exception("could not write %d trace(s) to %s", len(lines), path)
+            for _ in batch:
+                self._queue.task_done()
+
+
+_exporter = _Exporter()
+
+
+def _reset_exporter() -> None:
+    # A forked worker has no writer thread: start over with an empty queue of its own.
+    global _exporter
+    _exporter = _Exporter()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_exporter)
+
+
+def export_trace(trace: Trace) -> None:
+    """Queue `trace` for `settings.trace_export_path`; never blocks (drops it if the queue is full)."""
+    path = settings.trace_export_path
+    if not path:
+        return
+    # Snapshot now; the JSON encoding and the write happen on the writer thread.
+    _exporter.submit(path, trace.to_dict())
+
+
+def flush_exports() -> None:
+    """Block until queued traces are on disk (shutdown, tests)."""
+    _exporter.flush()
+
+
+def header_value(trace: Trace, *, max_bytes: int = 8192) -> str:
+    """Compact JSON for the `X-Trace` header; drops SQL spans first if it is too large."""
+    payload = trace.to_dict()
+    value = json.dumps(payload, default=str, separators=(",", ":"))
+    if len(value) <= max_bytes:
+        return value
+    payload["spans"] = [s for s in payload["spans"] if s["name"] != "sql"]
+    payload["truncated"] = True
+    value = json.dumps(payload, default=str, separators=(",", ":"))
+    if len(value) <= max_bytes:
+        return value
+    payload["spans"] = []
+    return json.dumps(payload, default=str, separators=(",", ":"))
+
+
+# --- SQL statement spans ----------------------------------------------------------------
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    s = begin_span("sql", statement=statement[:200])
+    conn.info.setdefault("trace_sql_spans", []).append(s)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+    stack = conn.info.get("trace_sql_spans")
+    if stack:
+        end_span(stack.pop())
+
+
+def _handle_error(context) -> None:  # noqa: ANN001
+    conn = context.connection
+    stack = conn.info.get("trace_sql_spans") if conn is not None else None
+    if stack:
+        s = stack.pop()
+        if s is not None:
+            s.set(error=type(context.original_exception).__name__)
+            end_span(s)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attach SQL span hooks to an engine (idempotent)."""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
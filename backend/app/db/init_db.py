@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from backend.app.core.config import settings
 from backend.app.db.base import Base
-from backend.app.db.session import engine
+from backend.app.db.migrations import is_current, mark_current, schema_fingerprint, upgrade
+from backend.app.db.session import router
+from backend.app.services import search_service
 
 # Import models so they are registered on Base.metadata
 from backend.app.db import models as _models  # noqa: F401
@@ -17,5 +19,15 @@ def init_db() -> None:
     """
     if not settings.db_auto_create:
         return
-    Base.metadata.create_all(bind=engine)
+    fingerprint = schema_fingerprint()
+    for eng in router.engines().values():
+        if is_current(eng, fingerprint):
+            continue
+        pending = upgrade(eng)
+        if pending:
+            # This code can't write tasks until then (the old columns are NOT NULL).
+            raise RuntimeError(f"{eng.url.render_as_string()}: " + "; ".join(pending))
+        Base.metadata.create_all(bind=eng)
+        search_service.ensure_index(eng)
+        mark_current(eng, fingerprint)
 
@@ -0,0 +1,233 @@
+"""
+In-place upgrades for databases created by earlier versions of `init_db`.
+
+`Base.metadata.create_all` only adds missing tables; it never changes existing ones.
+Each function here detects whether its change is still pending, so running it again
+(or on a fresh database) is a no-op.
+
+Checking costs a few catalog queries per table, so `init_db` records a fingerprint
+of the schema it produced (`schema_version`) and skips all of it on the next boot
+when nothing changed: one query instead of dozens of round trips to the database.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import JSON, Connection, column, delete, inspect, insert, select, table, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from backend.app.db.base import Base
+from backend.app.db.models import DayScore, DayScoreRollup, LabelKind, SchemaVersion, TaskLabel
+from backend.app.services import day_score_service
+from backend.app.services.task_service import label_key
+
+
+logger = logging.getLogger(__name__)
+
+# Bump when `upgrade()` or index DDL outside the models (search_service) changes, so
+# databases marked current run them again. Model changes are picked up on their own.
+REVISION = 2
+
+# JSON array columns on `tasks` that became `task_labels` rows.
+LEGACY_LABEL_COLUMNS = {
+    "required_resources": LabelKind.resource,
+    "required_people": LabelKind.person,
+    "tags": LabelKind.tag,
+}
+
+
+def legacy_label_columns(conn: Connection) -> list[str]:
+    insp = inspect(conn)
+    if not insp.has_table("tasks"):
+        return []
+    existing = {c["name"] for c in insp.get_columns("tasks")}
+    return [name for name in LEGACY_LABEL_COLUMNS if name in existing]
+
+
+def _label_rows(task_id: int, name: str, values: object) -> list[dict]:
+    kind = LEGACY_LABEL_COLUMNS[name]
+    rows: list[dict] = []
+    seen: set[str] = set()
+    for value in values if isinstance(values, list) else []:
+        value = " ".join(str(value).split())[:200]
+        key = label_key(value)
+        if key and key not in seen:
+            seen.add(key)
+            rows.append({"task_id": task_id, "kind": kind.value, "key": key, "value": value, "position": len(rows)})
+    return rows
+
+
+# Copy of the legacy label columns (task id + JSON values) kept by `migrate_task_labels`.
+LABEL_BACKUP_TABLE = "task_label_columns_backup"
+
+
+def migrate_task_labels(engine: Engine, *, batch_size: int = 2000, dry_run: bool = False) -> int:
+    """
+    Move tags/people/resources from the JSON columns on `tasks` into `task_labels`,
+    then drop those columns, after copying them to `LABEL_BACKUP_TABLE`. One
+    transaction; returns the number of label rows written.
+
+    Destructive, so only `backend.scripts.migrate_task_labels` runs it, never `init_db`.
+    """
+    with engine.connect() as conn:
+        columns = legacy_label_columns(conn)
+        conn.rollback()
+        if not columns:
+            return 0
+        trans = conn.begin()
+        TaskLabel.__table__.create(conn, checkfirst=True)
+        # Rows left by an interrupted run. Also the first DML, so pysqlite opens its
+        # transaction here and the copy and the DROP COLUMNs commit (or roll back) together.
+        conn.execute(TaskLabel.__table__.delete())
+        tasks = table("tasks", column("id"), *(column(name, JSON) for name in columns))
+        written = 0
+        last_id = 0
+        while True:
+            batch = conn.execute(
+                select(tasks).where(tasks.c.id > last_id).order_by(tasks.c.id).limit(batch_size)
+            ).all()
+            if not batch:
+                break
+            rows = [r for task in batch for name in columns for r in _label_rows(task.id, name, getattr(task, name))]
+            if rows:
+                conn.execute(insert(TaskLabel), rows)
+            written += len(rows)
+            last_id = batch[-1].id
+        if inspect(conn).has_table(LABEL_BACKUP_TABLE):
+            raise RuntimeError(f"{LABEL_BACKUP_TABLE} already exists; move it aside before migrating again.")
+        conn.execute(text(f"CREATE TABLE {LABEL_BACKUP_TABLE} AS SELECT id AS task_id, {', '.join(columns)} FROM tasks"))
+        for name in columns:
+            # SQLite >= 3.35 and Postgres both support DROP COLUMN.
+            conn.execute(text(f"ALTER TABLE tasks DROP COLUMN {name}"))
+        if dry_run:
+            trans.rollback()
+        else:
+            trans.commit()
+            logger.info("migrated %d task label(s) from tasks.%s", written, ", tasks.".join(columns))
+        return written
+
+
+def add_missing_columns(engine: Engine) -> list[str]:
+    """
+    ALTER TABLE ... ADD COLUMN for nullable model columns that existing tables lack
+    (e.g. tasks.recurrence). Returns "table.column" for each column added.
+    """
+    added: list[str] = []
+    with engine.begin() as conn:
+        insp = inspect(conn)
+        for tbl in Base.metadata.sorted_tables:
+            if not insp.has_table(tbl.name):
+                continue
+            existing = {c["name"] for c in insp.get_columns(tbl.name)}
+            for col in tbl.columns:
+                if col.name in existing or not col.nullable or col.primary_key:
+                    continue
+                ddl_type = col.type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {tbl.name} ADD COLUMN {col.name} {ddl_type}"))
+                added.append(f"{tbl.name}.{col.name}")
+    if added:
+        logger.info("added column(s) %s", ", ".join(added))
+    return added
+
+
+def backfill_day_score_rollups(engine: Engine) -> int:
+    """Create `day_score_rollups` and fill it from existing day scores, once; returns rows written."""
+    with engine.connect() as conn:
+        insp = inspect(conn)
+        pending = insp.has_table("day_scores") and not insp.has_table("day_score_rollups")
+        conn.rollback()
+    if not pending:
+        return 0
+    with Session(engine) as db, db.begin():
+        DayScoreRollup.__table__.create(db.connection())
+        if db.execute(select(DayScore.id).limit(1)).first() is None:
+            return 0
+        written = day_score_service.rebuild_rollups(db)
+    logger.info("backfilled %d day score rollup(s)", written)
+    return written
+
+
+def _has_index(conn: Connection, table_name: str, name: str) -> bool:
+    if conn.dialect.name == "sqlite":
+        # SQLite's reflection skips expression indexes.
+        sql = text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND tbl_name = :table AND name = :name")
+        return conn.execute(sql, {"table": table_name, "name": name}).first() is not None
+    return inspect(conn).has_index(table_name, name)
+
+
+def add_day_score_rollup_key(engine: Engine) -> bool:
+    """
+    Add the unique index on `ROLLUP_KEY` to an existing `day_score_rollups` (its old
+    constraint let rows without a user repeat), rebuilding those rows first. True if added.
+    """
+    index = next(i for i in DayScoreRollup.__table__.indexes if i.name == "ux_day_score_rollups_user_period")
+    with engine.connect() as conn:
+        insp = inspect(conn)
+        pending = insp.has_table("day_score_rollups") and not _has_index(conn, "day_score_rollups", index.name)
+        conn.rollback()
+    if not pending:
+        return False
+    with Session(engine) as db, db.begin():
+        # Rollups are derived, so duplicates are dropped and re-derived, not merged.
+        day_score_service.rebuild_rollups(db, user_ids=[None])
+        index.create(db.connection())
+    logger.info("added %s", index.name)
+    return True
+
+
+def upgrade(engine: Engine) -> list[str]:
+    """
+    Apply every pending additive migration; `init_db` runs this before `create_all`.
+    Returns the destructive ones still due, which only an operator runs, as messages.
+    """
+    add_missing_columns(engine)
+    backfill_day_score_rollups(engine)
+    add_day_score_rollup_key(engine)
+    with engine.connect() as conn:
+        columns = legacy_label_columns(conn)
+    if not columns:
+        return []
+    return [
+        f"tasks.{', tasks.'.join(columns)} still hold labels: run "
+        "`python -m backend.scripts.migrate_task_labels --dry-run`, then without --dry-run"
+    ]
+
+
+def schema_fingerprint() -> str:
+    """Hash of every table, column, index and constraint in the models, plus `REVISION`."""
+    parts = [f"revision={REVISION}"]
+    for tbl in Base.metadata.sorted_tables:
+        parts.append(f"table {tbl.name} {sorted(tbl.kwargs.items())}")
+        for col in tbl.columns:
+            parts.append(f"  {col.name} {col.type!r} nullable={col.nullable} pk={col.primary_key}")
+        for idx in sorted(tbl.indexes, key=lambda i: i.name or ""):
+            parts.append(f"  index {idx.name} {[c.name for c in idx.columns]} unique={idx.unique}")
+        for con in sorted(tbl.constraints, key=lambda c: (type(c).__name__, c.name or "")):
+            parts.append(f"  {type(con).__name__} {con.name} {sorted(c.name for c in getattr(con, 'columns', ()))}")
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+
+def is_current(engine: Engine, fingerprint: str | None = None) -> bool:
+    """True when `engine`'s database was last upgraded to this exact schema."""
+    fingerprint = fingerprint or schema_fingerprint()
+    with engine.connect() as conn:
+        try:
+            stored = conn.execute(select(SchemaVersion.fingerprint).where(SchemaVersion.id == 1)).scalar()
+        except DBAPIError:
+            # No schema_version table yet: a new database or one from before it existed.
+            return False
+    return stored == fingerprint
+
+
+def mark_current(engine: Engine, fingerprint: str | None = None) -> None:
+    fingerprint = fingerprint or schema_fingerprint()
+    with engine.begin() as conn:
+        conn.execute(delete(SchemaVersion))
+        conn.execute(
+            insert(SchemaVersion).values(id=1, fingerprint=fingerprint, updated_at=datetime.now(tz=timezone.utc))
+        )
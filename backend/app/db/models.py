@@ -9,11 +9,13 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     UniqueConstraint,
     func,
+    literal_column,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.types import JSON
@@ -29,6 +31,12 @@ class TaskStatus(str, enum.Enum):
     canceled = "canceled"
 
 
+class LabelKind(str, enum.Enum):
+    tag = "tag"
+    person = "person"
+    resource = "resource"
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -36,6 +44,9 @@ class User(Base):
     phone_number: Mapped[str | None] = mapped_column(String(32), unique=True, nullable=True)
     email: Mapped[str | None] = mapped_column(String(320), unique=True, nullable=True)
     timezone: Mapped[str] = mapped_column(String(64), default="UTC")
+    # Learned prioritization weights and how far through the user's completions they are
+    # (see services/priority_weights.py); None = defaults.
+    priority_weights: Mapped[dict | None] = mapped_column(JSON, nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
@@ -82,9 +93,11 @@ class Task(Base):
 
     external_constraints: Mapped[str | None] = mapped_column(Text, nullable=True)
 
-    required_resources: Mapped[list[str]] = mapped_column(JSON, default=list, nullable=False)
-    required_people: Mapped[list[str]] = mapped_column(JSON, default=list, nullable=False)
-    tags: Mapped[list[str]] = mapped_column(JSON, default=list, nullable=False)
+    # Recurring tasks: an RRULE (services/recurrence.py) anchored at recurrence_start (the first
+    # due date). The row is always the current occurrence; completing it records a TaskOccurrence
+    # and moves due_at to the next one, so a series is one row however long it runs.
+    recurrence: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    recurrence_start: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
@@ -106,6 +119,89 @@ class Task(Base):
         lazy="selectin",
     )
 
+    # Tags, required people and required resources (see TaskLabel); written via task_service.
+    labels: Mapped[list["TaskLabel"]] = relationship(
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        order_by="TaskLabel.position",
+        lazy="selectin",
+    )
+
+    @property
+    def depends_on_ids(self) -> list[int]:
+        # List queries load `depends_on` with an explicit `selectinload` (one query per batch). The
+        # relationship's own lazy="selectin" doesn't apply to self-referential root queries.
+        return sorted(t.id for t in self.depends_on)
+
+    def label_values(self, kind: LabelKind) -> list[str]:
+        return [label.value for label in self.labels if label.kind == kind.value]
+
+    @property
+    def tags(self) -> list[str]:
+        return self.label_values(LabelKind.tag)
+
+    @property
+    def required_people(self) -> list[str]:
+        return self.label_values(LabelKind.person)
+
+    @property
+    def required_resources(self) -> list[str]:
+        return self.label_values(LabelKind.resource)
+
+
+class TaskLabel(Base):
+    """
+    One tag, required person or required resource of a task.
+
+    `key` is the case-folded value: filters and workload aggregates group on it, and a
+    task lists each label at most once per kind. `value` keeps the spelling as entered.
+    """
+
+    __tablename__ = "task_labels"
+    __table_args__ = (Index("ix_task_labels_kind_key", "kind", "key", "task_id"),)
+
+    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(16), primary_key=True)
+    key: Mapped[str] = mapped_column(String(200), primary_key=True)
+    value: Mapped[str] = mapped_column(String(200), nullable=False)
+    # Order within (task, kind), as the client listed them.
+    position: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+
+
+class TaskOccurrence(Base):
+    """A completed occurrence of a recurring task (the others are computed from the rule)."""
+
+    __tablename__ = "task_occurrences"
+
+    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    due_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    completed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class ArchivedTask(Base):
+    """
+    A done/canceled task moved out of `tasks` by `archive_service` (cold storage).
+
+    `payload` is the task as the API returned it (TaskRead JSON, labels and dependency
+    ids included); the other columns are what archive listing and search filter on.
+    """
+
+    __tablename__ = "archived_tasks"
+    __table_args__ = (Index("ix_archived_tasks_user_created", "user_id", "created_at"),)
+
+    # The id the task had in `tasks`.
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    status: Mapped[str] = mapped_column(String(32), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # Lower-cased title, description and tags, for archive search.
+    search_text: Mapped[str] = mapped_column(Text, default="", nullable=False)
+    # "|tag:work|person:alice|": label filters on archived tasks are one LIKE each.
+    label_keys: Mapped[str] = mapped_column(Text, default="", nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+
 
 class ConversationSession(Base):
     __tablename__ = "sessions"
@@ -154,6 +250,34 @@ class DayScore(Base):
     user: Mapped[User | None] = relationship(back_populates="day_scores")
 
 
+class DayScoreRollup(Base):
+    """
+    Weekly or monthly totals of `day_scores`, kept current by `day_score_service`
+    (derived data: `rebuild_rollups` can always re-create them).
+    """
+
+    __tablename__ = "day_score_rollups"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # None = reviews written without a user (one series of their own, see `ROLLUP_KEY`).
+    user_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # "week" (starting Monday) or "month".
+    period: Mapped[str] = mapped_column(String(8), nullable=False)
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+
+    # Days with a score in the period, and the sums over them.
+    days: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    planned_points: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    completed_points: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    score_sum: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+
+
+# One row per (user, period, start). A plain unique constraint lets rows with a NULL
+# user_id repeat, so the key treats NULL as user 0 (ids start at 1).
+ROLLUP_KEY = (func.coalesce(DayScoreRollup.user_id, literal_column("0")), DayScoreRollup.period, DayScoreRollup.period_start)
+Index("ux_day_score_rollups_user_period", *ROLLUP_KEY, unique=True)
+
+
 class CalendarEventCache(Base):
     __tablename__ = "calendar_event_cache"
     __table_args__ = (UniqueConstraint("user_id", "event_id", name="uq_calendar_event_cache_user_event"),)
@@ -176,3 +300,76 @@ class CalendarEventCache(Base):
         nullable=False,
     )
 
+
+
+class DataVersion(Base):
+    """
+    Monotonic change counter per scope ("user:<id>", "user:none").
+
+    Bumped in the same transaction as every task write, so reading one row tells
+    whether anything a client (or cache) holds for that scope has changed.
+    """
+
+    __tablename__ = "data_versions"
+
+    scope: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+
+class ChangeLogEntry(Base):
+    """
+    Append-only change log powering `GET /v1/changes`.
+
+    `id` is the sync cursor. Rows are written in the same transaction as the change
+    they describe; `op="delete"` rows are tombstones.
+    """
+
+    __tablename__ = "change_log"
+    __table_args__ = (
+        Index("ix_change_log_user_id_id", "user_id", "id"),
+        # Never reuse ids (SQLite would otherwise recycle the max rowid after pruning).
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # Not a FK: the log must outlive the rows it mentions.
+    user_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    entity: Mapped[str] = mapped_column(String(32), nullable=False)  # task | dependency | day_score
+    entity_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    op: Mapped[str] = mapped_column(String(16), nullable=False)  # upsert | delete
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class IdempotencyRecord(Base):
+    """
+    Stored outcome of a write keyed by an idempotency key, so retries replay it.
+
+    `status_code` is NULL while the first attempt is still running: the key is claimed
+    until `expires_at`, a short lease that a retry may take over once it has passed.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    # Scoped key: "rest:<user>:<client key>" or "tool:<user>:<session>:<tool_call_id>".
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    response: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Unix seconds (lease end while pending, then the TTL); expired rows are ignored and pruned.
+    expires_at: Mapped[float] = mapped_column(Float, nullable=False, index=True)
+
+
+class SchemaVersion(Base):
+    """
+    What `init_db` last brought this database to (one row, id 1).
+
+    `fingerprint` hashes the model metadata and `migrations.REVISION`; when it
+    matches, boot skips the migrations and `create_all` (see `migrations.is_current`).
+    """
+
+    __tablename__ = "schema_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,30 +1,78 @@
 from __future__ import annotations
 
+import os
 from collections.abc import Generator
 
+from fastapi import HTTPException, Request
+from fastapi.requests import HTTPConnection
 from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
 
 from backend.app.core.config import settings
+from backend.app.core import metrics, ratelimit, tracing
+from backend.app.db.sharding import ShardRouter, parse_replicas, parse_shards
 
 
-def _build_engine():
-    url = settings.database_url
+def _build_engine(url: str | None = None) -> Engine:
+    url = url or settings.database_url
     connect_args = {}
     if url.startswith("sqlite"):
         # Needed for SQLite when used with FastAPI in multi-threaded mode.
         connect_args["check_same_thread"] = False
-    return create_engine(url, pool_pre_ping=True, future=True, connect_args=connect_args)
+    eng = create_engine(url, pool_pre_ping=True, future=True, connect_args=connect_args)
+    metrics.instrument_engine(eng)
+    tracing.instrument_engine(eng)
+    return eng
 
 
-engine = _build_engine()
-SessionLocal = sessionmaker(bind=engine, class_=Session, autoflush=False, autocommit=False, expire_on_commit=False)
+_shards = parse_shards(settings.database_shards, settings.database_url)
+router = ShardRouter(
+    _shards,
+    engine_factory=_build_engine,
+    vnodes=settings.shard_vnodes,
+    replicas=parse_replicas(settings.database_replicas, list(_shards)),
+    read_your_writes_s=settings.read_your_writes_seconds,
+    # With RATE_LIMIT_BACKEND=sqlite every worker on the host sees every worker's writes.
+    write_marks=ratelimit.store if isinstance(ratelimit.store, ratelimit.SQLiteStore) else None,
+)
 
+# The first shard; also the only one unless DATABASE_SHARDS is set.
+engine = router.engine(router.default)
+SessionLocal = router.sessionmaker(router.default)
 
-def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
+# Gunicorn forks workers from a master that imported the app (and ran `init_db`) with
+# these engines: each worker builds its own engines and pools instead of sharing sockets.
+# That includes the connections the master's archiver and learner hold mid-run: they
+# only reach the database through `router`, so the child drops them with the rest and
+# never closes them under the master.
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=lambda: router.dispose(close=False))
+
+
+def request_user_id(request: HTTPConnection) -> int | None:
+    """The user a request (or WebSocket) acts for: `X-User-Id` header, else `?user_id=`."""
+    raw = request.headers.get("x-user-id") or request.query_params.get("user_id")
+    if raw is None or raw == "":
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="user id must be an integer")
+
+
+def get_db(request: Request) -> Generator[Session, None, None]:
+    db = router.session_for_user(request_user_id(request))
     try:
         yield db
     finally:
         db.close()
 
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """Session for read-only endpoints: the shard's replica when configured (see `ShardRouter.read_session_for_user`)."""
+    db = router.read_session_for_user(request_user_id(request))
+    try:
+        yield db
+    finally:
+        db.close()
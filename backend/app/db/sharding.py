@@ -0,0 +1,307 @@
+"""
+Route each user's data to one of N databases.
+
+Shards are configured as `DATABASE_SHARDS="a=postgresql+psycopg://...,b=postgresql+psycopg://..."`.
+Users map to shards through a consistent-hash ring, so adding a shard moves only ~1/N of
+users (see `backend/scripts/rebalance_shards.py`). Data without a user (`user_id=None`)
+lives on the first shard. Without `DATABASE_SHARDS` there is one shard, "default",
+backed by `DATABASE_URL`, and routing is a no-op.
+
+Every shard holds the full schema; ids, data versions and change-feed cursors are
+shard-local, so a user's requests must always reach the same shard.
+
+A shard may also have a read replica (`DATABASE_REPLICAS`). Read-only routes and
+tools use it, except for a user who committed a write in the last
+`READ_YOUR_WRITES_SECONDS`, who keeps reading the primary so replication lag never
+hides their own changes. Writes are tracked per process, or in a store every worker
+shares (see `ReadYourWrites`).
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Protocol
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import ORMExecuteState, Session, sessionmaker
+
+
+DEFAULT_SHARD = "default"
+
+
+def parse_shards(spec: str | None, default_url: str) -> dict[str, str]:
+    """Parse `name=url,name=url` (order matters: the first shard holds user-less data)."""
+    if not spec or not spec.strip():
+        return {DEFAULT_SHARD: default_url}
+
+    shards: dict[str, str] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, url = part.partition("=")
+        name, url = name.strip(), url.strip()
+        if not sep or not name or not url:
+            raise ValueError(f"Invalid shard {part!r}; expected name=url.")
+        if name in shards:
+            raise ValueError(f"Duplicate shard name {name!r}.")
+        if url.startswith("postgres://"):
+            url = url.replace("postgres://", "postgresql+psycopg://", 1)
+        shards[name] = url
+    if not shards:
+        raise ValueError("DATABASE_SHARDS is set but lists no shards.")
+    return shards
+
+
+def parse_replicas(spec: str | None, shard_names: list[str]) -> dict[str, str]:
+    """Parse `name=url,...`; a bare URL is the replica of the first shard."""
+    if not spec or not spec.strip():
+        return {}
+    replicas: dict[str, str] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, sep, url = part.partition("=")
+        if not sep or "://" in name:
+            name, url = shard_names[0], part
+        name, url = name.strip(), url.strip()
+        if name not in shard_names:
+            raise ValueError(f"Replica for unknown shard {name!r}.")
+        if url.startswith("postgres://"):
+            url = url.replace("postgres://", "postgresql+psycopg://", 1)
+        replicas[name] = url
+    return replicas
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent-hash ring with `vnodes` points per shard to even out the key distribution."""
+
+    def __init__(self, names: list[str], *, vnodes: int = 64) -> None:
+        if not names:
+            raise ValueError("HashRing needs at least one shard.")
+        self.names = list(names)
+        points = sorted((_hash(f"{name}#{i}"), name) for name in self.names for i in range(max(1, vnodes)))
+        self._keys = [p[0] for p in points]
+        self._owners = [p[1] for p in points]
+
+    def lookup(self, key: str) -> str:
+        if len(self.names) == 1:
+            return self.names[0]
+        i = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+        return self._owners[i]
+
+
+class WriteMarks(Protocol):
+    """Keys flagged for a while, visible to other processes (`ratelimit.SQLiteStore`)."""
+
+    def mark(self, key: str, ttl_s: float) -> None: ...
+
+    def marked(self, key: str) -> bool: ...
+
+
+class ReadYourWrites:
+    """
+    When each (shard, user) last committed a write, so their reads can stay on the primary.
+
+    Kept in this process, and also in `shared` when given, so a read that lands on
+    another worker than the write still goes to the primary.
+    """
+
+    def __init__(self, window_s: float, shared: WriteMarks | None = None) -> None:
+        self.window_s = window_s
+        self.shared = shared
+        self._until: dict[tuple[str, int | None], float] = {}
+        self._lock = threading.Lock()
+
+    def mark(self, shard: str, user_id: int | None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._until[(shard, user_id)] = now + self.window_s
+            if len(self._until) > 10_000:
+                self._until = {k: v for k, v in self._until.items() if v > now}
+        if self.shared is not None:
+            self.shared.mark(self._key(shard, user_id), self.window_s)
+
+    def active(self, shard: str, user_id: int | None) -> bool:
+        until = self._until.get((shard, user_id))
+        if until is not None and until > time.monotonic():
+            return True
+        return self.shared is not None and self.shared.marked(self._key(shard, user_id))
+
+    @staticmethod
+    def _key(shard: str, user_id: int | None) -> str:
+        return f"wrote:{shard}:{'none' if user_id is None else user_id}"
+
+
+def _note_flush(session: Session, flush_context: object) -> None:
+    session.info["pending_write"] = True
+
+
+def _note_execute(state: ORMExecuteState) -> None:
+    # Bulk/Core-style writes through `db.execute(...)` bypass the flush.
+    if state.is_insert or state.is_update or state.is_delete:
+        state.session.info["pending_write"] = True
+
+
+def _refuse_flush(session: Session, flush_context: object, instances: object) -> None:
+    raise RuntimeError("Read-replica sessions are read-only; use get_db for writes.")
+
+
+def _refuse_execute(state: ORMExecuteState) -> None:
+    if state.is_insert or state.is_update or state.is_delete:
+        raise RuntimeError("Read-replica sessions are read-only; use get_db for writes.")
+
+
+class ShardRouter:
+    def __init__(
+        self,
+        urls: dict[str, str],
+        *,
+        engine_factory: Callable[[str], Engine],
+        vnodes: int = 64,
+        replicas: dict[str, str] | None = None,
+        read_your_writes_s: float = 5.0,
+        write_marks: WriteMarks | None = None,
+    ) -> None:
+        self.urls = dict(urls)
+        self.replicas = dict(replicas or {})
+        self.default = next(iter(self.urls))
+        self.ring = HashRing(list(self.urls), vnodes=vnodes)
+        self.recent_writes = ReadYourWrites(read_your_writes_s, write_marks)
+        self._engine_factory = engine_factory
+        self._engines: dict[str, Engine] = {}
+        self._sessionmakers: dict[str, sessionmaker[Session]] = {}
+        self._replica_engines: dict[str, Engine] = {}
+        self._replica_sessionmakers: dict[str, sessionmaker[Session]] = {}
+
+    @property
+    def names(self) -> list[str]:
+        return list(self.urls)
+
+    def shard_for_user(self, user_id: int | None) -> str:
+        if user_id is None:
+            return self.default
+        return self.ring.lookup(str(user_id))
+
+    def engine(self, name: str) -> Engine:
+        eng = self._engines.get(name)
+        if eng is None:
+            eng = self._engine_factory(self.urls[name])
+            self._engines[name] = eng
+        return eng
+
+    def engines(self) -> dict[str, Engine]:
+        return {name: self.engine(name) for name in self.urls}
+
+    def sessionmaker(self, name: str) -> sessionmaker[Session]:
+        maker = self._sessionmakers.get(name)
+        if maker is None:
+            maker = sessionmaker(
+                bind=self.engine(name),
+                class_=Session,
+                autoflush=False,
+                autocommit=False,
+                expire_on_commit=False,
+                info={"shard": name},
+            )
+            event.listen(maker, "after_flush", _note_flush)
+            event.listen(maker, "do_orm_execute", _note_execute)
+            event.listen(maker, "after_commit", self._after_commit)
+            self._sessionmakers[name] = maker
+        return maker
+
+    def _after_commit(self, session: Session) -> None:
+        if session.info.pop("pending_write", False):
+            session.info["wrote"] = True
+            # Marks only steer reads away from a replica; without one there is nothing to record.
+            if session.info["shard"] in self.replicas:
+                self.recent_writes.mark(session.info["shard"], session.info.get("user_id"))
+
+    def replica_sessionmaker(self, name: str) -> sessionmaker[Session] | None:
+        if name not in self.replicas:
+            return None
+        maker = self._replica_sessionmakers.get(name)
+        if maker is None:
+            eng = self._replica_engines.get(name)
+            if eng is None:
+                eng = self._engine_factory(self.replicas[name])
+                self._replica_engines[name] = eng
+            maker = sessionmaker(
+                bind=eng,
+                class_=Session,
+                autoflush=False,
+                autocommit=False,
+                expire_on_commit=False,
+                info={"shard": name, "replica": True},
+            )
+            event.listen(maker, "before_flush", _refuse_flush)
+            event.listen(maker, "do_orm_execute", _refuse_execute)
+            self._replica_sessionmakers[name] = maker
+        return maker
+
+    def session_for_user(self, user_id: int | None) -> Session:
+        db = self.sessionmaker(self.shard_for_user(user_id))()
+        db.info["user_id"] = user_id
+        return db
+
+    def read_session_for_user(self, user_id: int | None) -> Session:
+        """A replica session, or the primary if there is no replica or the user just wrote."""
+        shard = self.shard_for_user(user_id)
+        maker = self.replica_sessionmaker(shard)
+        if maker is None or self.recent_writes.active(shard, user_id):
+            return self.session_for_user(user_id)
+        db = maker()
+        db.info["user_id"] = user_id
+        return db
+
+    def reader(self, db: Session, read_db: Session | None) -> Session:
+        """
+        Pick the session for a read next to primary session `db`.
+
+        Falls back to `db` once anything was written through it (or recently by the
+        same user), so a chat turn that creates a task then lists tasks sees it.
+        """
+        if read_db is None or read_db is db or not read_db.info.get("replica"):
+            return db
+        if db.info.get("wrote") or db.info.get("pending_write"):
+            return db
+        if self.recent_writes.active(read_db.info["shard"], read_db.info.get("user_id")):
+            return db
+        return read_db
+
+    @contextmanager
+    def session(self, name: str) -> Iterator[Session]:
+        db = self.sessionmaker(name)()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def serves(self, db: Session, user_id: int | None) -> bool:
+        """Whether `db` is the right shard for `user_id` (sessions not built here always pass)."""
+        shard = db.info.get("shard")
+        return shard is None or shard == self.shard_for_user(user_id)
+
+    def dispose(self, *, close: bool = True) -> None:
+        """
+        Drop every engine; the next session builds a new one. `close=False` leaves the
+        pooled connections open for whoever owns them: a forked child must not close
+        its parent's sockets.
+        """
+        for eng in [*self._engines.values(), *self._replica_engines.values()]:
+            eng.dispose(close=close)
+        self._engines.clear()
+        self._sessionmakers.clear()
+        self._replica_engines.clear()
+        self._replica_sessionmakers.clear()
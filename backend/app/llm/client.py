@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
+import uuid
 from dataclasses import dataclass
 from typing import Any
 
+from backend.app.core import ratelimit
 from backend.app.core.config import settings
 
 
@@ -19,6 +22,9 @@ class ToolCall:
 class LLMMessage:
     content: str | None
     tool_calls: list[ToolCall]
+    # Token usage as reported by the provider (None for offline clients).
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
 
 
 class LLMClient:
@@ -26,6 +32,68 @@ class LLMClient:
         raise NotImplementedError
 
 
+# Failures worth retrying: the same request may well succeed a moment later.
+RETRYABLE_KINDS = frozenset({"timeout", "rate_limited", "server_error", "connection"})
+
+
+class LLMError(RuntimeError):
+    """A provider call failed; `kind` is one of RETRYABLE_KINDS or "client_error"."""
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        kind: str = "client_error",
+        status_code: int | None = None,
+        retry_after_s: float | None = None,
+    ) -> None:
+        super().__init__(message)
+        self.kind = kind
+        self.status_code = status_code
+        self.retry_after_s = retry_after_s
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind in RETRYABLE_KINDS
+
+
+class LLMTimeout(LLMError):
+    def __init__(self, message: str = "LLM call timed out.") -> None:
+        super().__init__(message, kind="timeout")
+
+
+class LLMUnavailable(LLMError):
+    """The circuit breaker is open: calls fail fast until `retry_after_s` has passed."""
+
+    def __init__(self, retry_after_s: float) -> None:
+        super().__init__(
+            f"LLM provider unavailable; retry in {retry_after_s:.0f}s.", kind="unavailable", retry_after_s=retry_after_s
+        )
+
+
+def _as_llm_error(e: Exception) -> LLMError | None:
+    """Classify an OpenAI SDK exception (None: not a provider failure, re-raise as is)."""
+    import openai  # type: ignore
+
+    if isinstance(e, openai.APITimeoutError):
+        return LLMTimeout(str(e))
+    if isinstance(e, openai.APIConnectionError):
+        return LLMError(str(e), kind="connection")
+    if not isinstance(e, openai.APIStatusError):
+        return None
+    status = e.status_code
+    if status == 429:
+        retry_after: float | None = None
+        try:
+            retry_after = float(e.response.headers.get("retry-after", ""))
+        except ValueError:
+            pass
+        return LLMError(str(e), kind="rate_limited", status_code=status, retry_after_s=retry_after)
+    if status >= 500 or status in (408, 409):
+        return LLMError(str(e), kind="server_error", status_code=status)
+    return LLMError(str(e), kind="client_error", status_code=status)
+
+
 class OpenAIChatCompletionsClient(LLMClient):
     def __init__(self) -> None:
         if settings.openai_api_key:
@@ -35,16 +103,31 @@ class OpenAIChatCompletionsClient(LLMClient):
         except Exception as e:  # pragma: no cover
             raise RuntimeError("openai package is required to use the real LLM client.") from e
 
-        self._client = OpenAI()
+        # Retries are ours (see backend/app/llm/resilience.py), so the SDK's own are off.
+        self._client = OpenAI(timeout=settings.llm_timeout_seconds, max_retries=0)
+        # Budget key: all workers using the same API key share one bucket.
+        self._budget_key = "llm:" + hashlib.blake2b((settings.openai_api_key or "").encode(), digest_size=6).hexdigest()
 
     def complete(self, *, messages: list[dict[str, Any]], tools: list[dict[str, Any]]) -> LLMMessage:
-        resp = self._client.chat.completions.create(
-            model=settings.openai_model,
-            messages=messages,
-            tools=tools,
-            tool_choice="auto",
-            temperature=0.2,
-        )
+        if ratelimit.LLM_RATE is not None:
+            ratelimit.wait_for(
+                self._budget_key, ratelimit.LLM_RATE, scope="llm", max_wait_s=settings.llm_rate_max_wait_seconds
+            )
+        try:
+            # Only the request itself holds a slot: budget waits (above) and retry backoff don't.
+            with ratelimit.llm_slot():
+                resp = self._client.chat.completions.create(
+                    model=settings.openai_model,
+                    messages=messages,
+                    tools=tools,
+                    tool_choice="auto",
+                    temperature=0.2,
+                )
+        except Exception as e:
+            err = _as_llm_error(e)
+            if err is None:
+                raise
+            raise err from e
         msg = resp.choices[0].message
 
         tool_calls: list[ToolCall] = []
@@ -58,7 +141,13 @@ class OpenAIChatCompletionsClient(LLMClient):
                     )
                 )
 
-        return LLMMessage(content=msg.content, tool_calls=tool_calls)
+        usage = getattr(resp, "usage", None)
+        return LLMMessage(
+            content=msg.content,
+            tool_calls=tool_calls,
+            prompt_tokens=getattr(usage, "prompt_tokens", None),
+            completion_tokens=getattr(usage, "completion_tokens", None),
+        )
 
 
 class MockLLMClient(LLMClient):
@@ -89,29 +178,46 @@ class MockLLMClient(LLMClient):
             return LLMMessage(content="I tried a tool but it failed. Want to try again?", tool_calls=[])
 
         if role == "user":
-            low = content.lower()
-            if any(k in low for k in ["list", "show tasks", "what's next", "what are my tasks"]):
-                return LLMMessage(content=None, tool_calls=[ToolCall(id="mock_call_1", name="list_tasks", arguments="{}")])
-            if any(k in low for k in ["prioritize", "prioritise", "priority"]):
-                return LLMMessage(
-                    content=None,
-                    tool_calls=[ToolCall(id="mock_call_1", name="prioritize_tasks", arguments="{}")],
-                )
+            call = read_intent_tool_call(content)
+            if call is not None:
+                return LLMMessage(content=None, tool_calls=[call])
 
             # Minimal task creation: store the raw message as a title.
             args = {"title": content[:200]}
             return LLMMessage(
                 content=None,
-                tool_calls=[ToolCall(id="mock_call_1", name="create_task", arguments=json.dumps(args))],
+                tool_calls=[ToolCall(id=_mock_call_id(), name="create_task", arguments=json.dumps(args))],
             )
 
         return LLMMessage(content="How can I help?", tool_calls=[])
 
 
+def read_intent_tool_call(content: str) -> ToolCall | None:
+    """The read-only tool a plain "list"/"prioritize" request maps to, if it is one."""
+    low = content.lower()
+    if any(k in low for k in ["list", "show tasks", "what's next", "what are my tasks"]):
+        return ToolCall(id=_mock_call_id(), name="list_tasks", arguments="{}")
+    if any(k in low for k in ["prioritize", "prioritise", "priority"]):
+        return ToolCall(id=_mock_call_id(), name="prioritize_tasks", arguments="{}")
+    return None
+
+
+def _mock_call_id() -> str:
+    # Unique like real provider ids; tool idempotency keys are derived from them.
+    return f"mock_call_{uuid.uuid4().hex[:12]}"
+
+
 def get_llm_client() -> LLMClient:
+    if settings.llm_faults:
+        # Offline fault injection (mock behind the resilience layer) takes precedence over MOCK_LLM.
+        from backend.app.llm import resilience
+
+        return resilience.wrap(resilience.FaultInjectingLLMClient.from_spec(settings.llm_faults, MockLLMClient()))
     if (os.getenv("MOCK_LLM", "") or "").lower() in {"1", "true", "yes", "y"}:
         return MockLLMClient()
     if not settings.openai_api_key:
         # Default to mock so the app boots without keys.
         return MockLLMClient()
-    return OpenAIChatCompletionsClient()
+    from backend.app.llm import resilience
+
+    return resilience.wrap(OpenAIChatCompletionsClient())
@@ -0,0 +1,202 @@
+"""
+Answer structured chat commands without the LLM.
+
+A message that is, in its entirety, one of a few unambiguous commands runs its tool
+directly and gets a templated reply:
+
+- list:        "list my tasks", "show done tasks", "what are my tasks"
+- prioritize:  "prioritize my tasks", "what should I do next?"
+- complete:    "mark task 12 done", "complete #12", "cancel task 12"
+- add:         "add call the bank due tomorrow", "new task: rent by 2026-03-01 at 9am"
+
+Anything else (including a command with extra words) returns None and goes to the
+model, so a miss costs one regex pass. Due dates are read in the user's timezone
+(`User.timezone`), so "tomorrow at 9am" means their tomorrow and their 9am. Tools run through `execute_tool`, so metrics,
+tracing, cache invalidation and push events behave exactly as on the LLM path.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone, tzinfo
+from typing import Any
+
+from backend.app.core import metrics, tracing
+from backend.app.llm.tool_handlers import ToolContext, execute_tool
+from backend.app.schemas import ChatResponse, ToolResult
+from backend.app.services import task_service
+from backend.app.services.task_service import user_timezone
+
+
+_TASKS = r"(?:tasks|to-?dos|to-?do list|list)"
+_STATUS_WORDS = {
+    "inbox": "inbox",
+    "planned": "planned",
+    "in progress": "in_progress",
+    "in_progress": "in_progress",
+    "done": "done",
+    "completed": "done",
+    "canceled": "canceled",
+    "cancelled": "canceled",
+}
+
+_LIST = re.compile(
+    rf"(?:(?:list|show)(?: me)?(?: my| all)?(?: (?P<status>inbox|planned|in[ _]progress|done|completed|canceled|cancelled))?(?: {_TASKS})?"
+    rf"|my {_TASKS}|what are my tasks)"
+)
+_PRIORITIZE = re.compile(
+    rf"(?:(?:prioriti[sz]e|rank)(?: my| all)?(?: {_TASKS})?|what should i (?:do|work on)(?: first| next| now)?)"
+)
+_COMPLETE = re.compile(
+    r"(?:(?:mark|set) (?:task )?#?(?P<id>\d+) (?:as )?(?P<status>done|complete|completed|finished|canceled|cancelled)"
+    r"|(?P<verb>complete|finish|cancel) (?:task )?#?(?P<id2>\d+))"
+)
+# "new" alone starts plenty of titles ("new year party on friday"), so only "new task" counts.
+_ADD = re.compile(
+    r"(?:(?:add|create)(?: a)?(?: new)?(?: task)?|new task):? (?P<title>.+?) (?:due|by|on) (?P<when>.+)", re.IGNORECASE
+)
+
+_WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+_WHEN = re.compile(
+    r"(?P<day>today|tomorrow|monday|tuesday|wednesday|thursday|friday|saturday|sunday|\d{4}-\d{2}-\d{2})"
+    r"(?:(?: at)? (?P<hour>\d{1,2})(?::(?P<minute>\d{2}))? ?(?P<ampm>am|pm)?)?",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class Command:
+    intent: str
+    tool: str
+    arguments: dict[str, Any]
+
+
+def _normalize(message: str) -> str:
+    text = " ".join(message.strip().split())
+    text = re.sub(r"^(?:please|pls|hey|ok|okay)[,]? ", "", text, flags=re.IGNORECASE)
+    return text.rstrip(".!?").strip()
+
+
+def parse_due(text: str, *, today: date, tz: tzinfo = timezone.utc) -> datetime | None:
+    """
+    'tomorrow', 'friday at 5pm', '2026-03-01 09:30' -> UTC datetime (end of day when no
+    time). `today` and the time of day are in `tz`.
+    """
+    m = _WHEN.fullmatch(text.strip())
+    if m is None:
+        return None
+    day_word = m.group("day").lower()
+    if day_word == "today":
+        day = today
+    elif day_word == "tomorrow":
+        day = today + timedelta(days=1)
+    elif day_word in _WEEKDAYS:
+        day = today + timedelta(days=(_WEEKDAYS.index(day_word) - today.weekday()) % 7)
+    else:
+        try:
+            day = date.fromisoformat(day_word)
+        except ValueError:
+            return None
+
+    if m.group("hour") is None:
+        return datetime.combine(day, time(23, 59), tzinfo=tz).astimezone(timezone.utc)
+    hour, minute = int(m.group("hour")), int(m.group("minute") or 0)
+    ampm = (m.group("ampm") or "").lower()
+    if ampm:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if ampm == "pm" else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return datetime.combine(day, time(hour, minute), tzinfo=tz).astimezone(timezone.utc)
+
+
+def match(message: str, *, tz: tzinfo = timezone.utc, today: date | None = None) -> Command | None:
+    """The command `message` is, or None if it's anything less certain. Due dates are read in `tz`."""
+    text = _normalize(message)
+    low = text.lower()
+
+    m = _COMPLETE.fullmatch(low)
+    if m is not None:
+        task_id = int(m.group("id") or m.group("id2"))
+        word = m.group("status") or m.group("verb")
+        status = "canceled" if word.startswith("cancel") else "done"
+        return Command("complete", "update_task", {"task_id": task_id, "status": status})
+
+    m = _LIST.fullmatch(low)
+    if m is not None:
+        args: dict[str, Any] = {}
+        if m.group("status"):
+            args["status"] = _STATUS_WORDS[m.group("status").replace("_", " ")]
+        return Command("list", "list_tasks", args)
+
+    if _PRIORITIZE.fullmatch(low):
+        return Command("prioritize", "prioritize_tasks", {})
+
+    m = _ADD.fullmatch(text)
+    if m is not None:
+        title = m.group("title").strip(" :\"'")
+        due = parse_due(m.group("when"), today=today or datetime.now(tz).date(), tz=tz)
+        if title and due is not None and len(title) <= 200:
+            return Command("add", "create_task", {"title": title, "due_at": due.isoformat()})
+
+    return None
+
+
+def _local(value: str, tz: tzinfo) -> datetime:
+    dt = datetime.fromisoformat(value)
+    return (dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)).astimezone(tz)
+
+
+def _reply(ctx: ToolContext, command: Command, result: dict[str, Any], tz: tzinfo) -> str:
+    if not result.get("ok"):
+        return f"I couldn't do that: {result.get('error')}"
+    payload = result.get("result")
+
+    if command.intent == "list":
+        tasks = payload or []
+        if not tasks:
+            return "You have no tasks." if "status" not in command.arguments else "No tasks with that status."
+        lines = [f"- #{t['id']} {t['title']}" for t in tasks[:5]]
+        more = f"\n…and {len(tasks) - 5} more." if len(tasks) > 5 else ""
+        return f"You have {len(tasks)} task(s):\n" + "\n".join(lines) + more
+
+    if command.intent == "prioritize":
+        ranked = payload.get("results") or []
+        if not ranked:
+            return "You have no tasks to prioritize."
+        # Same request, so this list comes from the per-request task cache.
+        titles = {t.id: t.title for t in task_service.list_tasks(ctx.reader(), user_id=ctx.user_id)}
+        lines = [f"{i}. #{r['task_id']} {titles.get(r['task_id'], '')}".rstrip() for i, r in enumerate(ranked[:3], 1)]
+        return "Top priorities:\n" + "\n".join(lines)
+
+    if command.intent == "complete":
+        if payload.get("recurrence") and payload["status"] != command.arguments["status"]:
+            # Completing a recurring task rolls it over to its next occurrence.
+            due = _local(payload["due_at"], tz)
+            return f"Done with #{payload['id']} \"{payload['title']}\"; the next one is due {due:%a %b %d %H:%M}."
+        return f"Marked #{payload['id']} \"{payload['title']}\" as {payload['status']}."
+
+    due = _local(payload["due_at"], tz) if payload.get("due_at") else None
+    when = f", due {due:%a %b %d %H:%M}" if due is not None else ""
+    return f"Added #{payload['id']} \"{payload['title']}\"{when}."
+
+
+def handle(ctx: ToolContext, message: str) -> ChatResponse | None:
+    """Run `message` as a command if it is one; None means "ask the model"."""
+    tz = user_timezone(ctx.reader(), ctx.user_id)
+    command = match(message, tz=tz)
+    metrics.CHAT_FAST_PATH.inc(intent=command.intent if command else "none")
+    if command is None:
+        return None
+    with tracing.span("chat.fast_path", intent=command.intent):
+        result = execute_tool(ctx, name=command.tool, arguments_json=json.dumps(command.arguments))
+        reply = _reply(ctx, command, result, tz)
+    return ChatResponse(
+        reply=reply,
+        tool_results=[
+            ToolResult(name=command.tool, ok=bool(result.get("ok")), result=result.get("result"), error=result.get("error"))
+        ],
+    )
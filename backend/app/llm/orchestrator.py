@@ -1,12 +1,15 @@
 from __future__ import annotations
 
-import json
 from datetime import date
 from typing import Any
 
+from pydantic_core import to_json
 from sqlalchemy.orm import Session
 
-from backend.app.llm.client import LLMClient, get_llm_client
+from backend.app.core import metrics, tracing
+from backend.app.core.config import settings
+from backend.app.llm import fast_path
+from backend.app.llm.client import LLMClient, LLMMessage, get_llm_client
 from backend.app.llm.prompts import build_system_prompt
 from backend.app.llm.tool_handlers import ToolContext, execute_tool
 from backend.app.llm.tool_schemas import get_tool_schemas
@@ -29,9 +32,36 @@ def _to_openai_messages(request: ChatRequest) -> list[dict[str, Any]]:
     return messages
 
 
-def run_chat(db: Session, *, request: ChatRequest, llm_client: LLMClient | None = None) -> ChatResponse:
+def _complete(client: LLMClient, *, messages: list[dict[str, Any]], tools: list[dict[str, Any]]) -> LLMMessage:
+    # Wrappers (see resilience.py) report the provider client they wrap.
+    label = getattr(client, "label", None) or type(client).__name__
+    with tracing.span("llm.complete", client=label, messages=len(messages)) as s:
+        with metrics.LLM_CALL_SECONDS.time(client=label):
+            model_msg = client.complete(messages=messages, tools=tools)
+        if s is not None:
+            s.set(
+                tool_calls=[tc.name for tc in model_msg.tool_calls],
+                prompt_tokens=model_msg.prompt_tokens,
+                completion_tokens=model_msg.completion_tokens,
+            )
+    if model_msg.prompt_tokens:
+        metrics.LLM_TOKENS.inc(model_msg.prompt_tokens, client=label, kind="prompt")
+    if model_msg.completion_tokens:
+        metrics.LLM_TOKENS.inc(model_msg.completion_tokens, client=label, kind="completion")
+    return model_msg
+
+
+def run_chat(
+    db: Session,
+    *,
+    request: ChatRequest,
+    llm_client: LLMClient | None = None,
+    read_db: Session | None = None,
+    use_fast_path: bool | None = None,
+) -> ChatResponse:
     """
     Minimal tool-calling loop:
+    - answer structured commands directly (`fast_path`, unless disabled)
     - send user message + tools
     - if model calls tools, execute and feed results back
     - repeat until the model returns a normal assistant message
@@ -41,45 +71,54 @@ def run_chat(db: Session, *, request: ChatRequest, llm_client: LLMClient | None
     messages = _to_openai_messages(request)
 
     tool_results: list[ToolResult] = []
-    ctx = ToolContext(db=db, user_id=request.user_id)
-
-    for _step in range(6):
-        model_msg = client.complete(messages=messages, tools=tools)
-
-        assistant_payload: dict[str, Any] = {"role": "assistant", "content": model_msg.content or ""}
-        if model_msg.tool_calls:
-            assistant_payload["tool_calls"] = [
-                {
-                    "id": tc.id,
-                    "type": "function",
-                    "function": {"name": tc.name, "arguments": tc.arguments},
-                }
-                for tc in model_msg.tool_calls
-            ]
-
-        messages.append(assistant_payload)
-
-        if not model_msg.tool_calls:
-            return ChatResponse(reply=(model_msg.content or "").strip(), tool_results=tool_results)
-
-        for tc in model_msg.tool_calls:
-            result = execute_tool(ctx, name=tc.name, arguments_json=tc.arguments)
-            tool_results.append(
-                ToolResult(
-                    name=tc.name,
-                    ok=bool(result.get("ok", False)),
-                    result=result.get("result"),
-                    error=result.get("error"),
+    ctx = ToolContext(db=db, user_id=request.user_id, session_id=request.session_id, read_db=read_db)
+
+    if settings.chat_fast_path if use_fast_path is None else use_fast_path:
+        fast = fast_path.handle(ctx, request.message)
+        if fast is not None:
+            return fast
+
+    for step in range(6):
+        with tracing.span("chat.iteration", step=step + 1):
+            model_msg = _complete(client, messages=messages, tools=tools)
+
+            assistant_payload: dict[str, Any] = {"role": "assistant", "content": model_msg.content or ""}
+            if model_msg.tool_calls:
+                assistant_payload["tool_calls"] = [
+                    {
+                        "id": tc.id,
+                        "type": "function",
+                        "function": {"name": tc.name, "arguments": tc.arguments},
+                    }
+                    for tc in model_msg.tool_calls
+                ]
+
+            messages.append(assistant_payload)
+
+            if not model_msg.tool_calls:
+                metrics.CHAT_TOOL_LOOP_ITERATIONS.observe(step + 1)
+                return ChatResponse(reply=(model_msg.content or "").strip(), tool_results=tool_results)
+
+            for tc in model_msg.tool_calls:
+                result = execute_tool(ctx, name=tc.name, arguments_json=tc.arguments, call_id=tc.id)
+                tool_results.append(
+                    ToolResult(
+                        name=tc.name,
+                        ok=bool(result.get("ok", False)),
+                        result=result.get("result"),
+                        error=result.get("error"),
+                    )
+                )
+                messages.append(
+                    {
+                        "role": "tool",
+                        "tool_call_id": tc.id,
+                        # Same native serializer that validated the arguments (tool_registry).
+                        "content": to_json(result, fallback=str).decode(),
+                    }
                 )
-            )
-            messages.append(
-                {
-                    "role": "tool",
-                    "tool_call_id": tc.id,
-                    "content": json.dumps(result, default=str),
-                }
-            )
 
+    metrics.CHAT_TOOL_LOOP_ITERATIONS.observe(6)
     return ChatResponse(
         reply="I got stuck while using tools. Try rephrasing or ask to list tasks.",
         tool_results=tool_results,
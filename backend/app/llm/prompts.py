@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import date
+from functools import lru_cache
 from textwrap import dedent
 
 
@@ -16,7 +17,11 @@ def build_system_prompt(*, today: str | None = None) -> str:
     """
     if today is None:
         today = date.today().isoformat()
+    return _system_prompt(today)
 
+
+@lru_cache(maxsize=4)
+def _system_prompt(today: str) -> str:
     return dedent(
         f"""
         You are an LLM-enabled to-do list and planning assistant.
@@ -34,6 +39,9 @@ def build_system_prompt(*, today: str | None = None) -> str:
         - If critical fields are missing, ask only the minimum follow-up questions needed to prioritize:
           due date/time window, effort estimate, whether it unblocks something, and any hard constraints.
         - Do not invent due dates or effort if the user didn't provide them.
+        - To find a specific task ("the dentist one"), use `search_tasks` rather than `list_tasks`.
+        - For repeating tasks ("every Monday", "monthly rent") create one task with `recurrence` set
+          (e.g. FREQ=WEEKLY;BYDAY=MO) and `due_at` at the first occurrence; completing it moves it to the next one.
 
         Prioritization:
         - Use `prioritize_tasks` to generate an ordered list with completion chances.
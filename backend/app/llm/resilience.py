@@ -0,0 +1,316 @@
+"""
+Timeouts, retries and a circuit breaker around a provider `LLMClient`.
+
+- Each attempt is bounded by `LLM_TIMEOUT_SECONDS` (enforced by the provider client).
+- Retryable failures (timeouts, 429, 5xx, connection errors) are retried up to
+  `LLM_MAX_RETRIES` times with full-jitter exponential backoff, honouring a provider's
+  Retry-After.
+- A process-wide circuit breaker opens when at least `LLM_BREAKER_FAILURE_RATIO` of
+  the last `LLM_BREAKER_WINDOW` attempts failed, and fails calls fast for
+  `LLM_BREAKER_COOLDOWN_SECONDS`; then one probe call decides whether it closes again.
+- While the provider is failing (breaker open or retries exhausted) and
+  `LLM_DEGRADE_ON_FAILURE` is on, `DegradedLLMClient` answers instead: list/prioritize
+  requests still work, tools that already ran are reported as such (a task created
+  before the follow-up call failed is saved), anything else gets a "try again shortly" reply.
+- Each attempt holds an `LLM_MAX_CONCURRENCY` slot only while the request is in flight.
+
+`FaultInjectingLLMClient` (enabled with `LLM_FAULTS`) makes a client fail, hang or lag
+on purpose, to exercise all of the above offline.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+from backend.app.core import metrics, ratelimit
+from backend.app.core.config import settings
+from backend.app.llm.client import LLMClient, LLMError, LLMMessage, LLMTimeout, LLMUnavailable, read_intent_tool_call
+
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        *,
+        window: int,
+        failure_ratio: float,
+        min_calls: int,
+        cooldown_s: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_ratio = failure_ratio
+        self.min_calls = max(1, min_calls)
+        self.cooldown_s = cooldown_s
+        self._clock = clock
+        self._outcomes: deque[bool] = deque(maxlen=max(1, window))
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.cooldown_s - self._clock())
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider now (half-open lets exactly one probe through)."""
+        with self._lock:
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.cooldown_s:
+                    return False
+                self._set(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probing = False
+                if ok:
+                    self._outcomes.clear()
+                    self._set(CLOSED)
+                else:
+                    self._trip()
+                return
+            self._outcomes.append(ok)
+            n = len(self._outcomes)
+            failures = n - sum(self._outcomes)
+            if self._state == CLOSED and n >= self.min_calls and failures / n >= self.failure_ratio:
+                self._trip()
+
+    def abandon(self) -> None:
+        """A call ended without telling us anything about the provider; free the probe slot."""
+        with self._lock:
+            self._probing = False
+
+    def _trip(self) -> None:
+        self._opened_at = self._clock()
+        self._set(OPEN)
+
+    def _set(self, state: str) -> None:
+        self._state = state
+        metrics.LLM_BREAKER_STATE.set(_STATE_VALUES[state])
+
+
+def _describe_tool_result(name: str | None, content: str) -> str:
+    try:
+        payload = json.loads(content)
+    except ValueError:
+        payload = None
+    ok = isinstance(payload, dict) and bool(payload.get("ok"))
+    result = payload.get("result") if ok else None
+    if name in {"list_tasks", "search_tasks", "prioritize_tasks"}:
+        if not ok:
+            return "I couldn't load your tasks."
+        if isinstance(result, dict) and "results" in result:
+            return f"Here are your {len(result['results'])} task(s) in priority order."
+        return f"Here are your {len(result) if isinstance(result, list) else 0} task(s)."
+    if not ok:
+        return f"{name or 'The tool'} didn't go through, so nothing was changed."
+    if name == "create_task" and isinstance(result, dict):
+        return f'Saved "{result.get("title")}".'
+    if name == "update_task" and isinstance(result, dict):
+        return f'Updated task {result.get("id")} ("{result.get("title")}").'
+    return f"{name or 'The tool'} finished."
+
+
+class DegradedLLMClient(LLMClient):
+    """
+    Deterministic stand-in while the provider is down.
+
+    Unlike `MockLLMClient` it never turns free text into a task: without the model we
+    can't tell a request from a task, so only plain list/prioritize intents are served.
+    """
+
+    def complete(self, *, messages: list[dict[str, Any]], tools: list[dict[str, Any]]) -> LLMMessage:
+        last = messages[-1]
+        content = (last.get("content") or "").strip()
+
+        if last.get("role") == "tool":
+            # Report what the tools of the last turn actually did: a write may already be saved.
+            names = {
+                tc["id"]: tc["function"]["name"]
+                for m in messages
+                if m.get("role") == "assistant"
+                for tc in m.get("tool_calls") or []
+            }
+            turn: list[dict[str, Any]] = []
+            for m in reversed(messages):
+                if m.get("role") != "tool":
+                    break
+                turn.append(m)
+            parts = [_describe_tool_result(names.get(m.get("tool_call_id")), m.get("content") or "") for m in reversed(turn)]
+            return LLMMessage(
+                content=" ".join(parts) + " The assistant is unavailable right now, so that's all I can do; try again shortly.",
+                tool_calls=[],
+            )
+
+        if last.get("role") == "user":
+            call = read_intent_tool_call(content)
+            if call is not None:
+                return LLMMessage(content=None, tool_calls=[call])
+
+        return LLMMessage(
+            content="The assistant is temporarily unavailable, so nothing was saved. "
+            "I can still list or prioritize your tasks; try again shortly for anything else.",
+            tool_calls=[],
+        )
+
+
+class ResilientLLMClient(LLMClient):
+    def __init__(
+        self,
+        inner: LLMClient,
+        *,
+        breaker: CircuitBreaker,
+        fallback: LLMClient | None = None,
+        max_retries: int = 2,
+        backoff_base_s: float = 0.5,
+        backoff_max_s: float = 8.0,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Callable[[], float] = random.random,
+    ) -> None:
+        self.inner = inner
+        self.breaker = breaker
+        self.fallback = fallback
+        self.max_retries = max(0, max_retries)
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self._sleep = sleep
+        self._rng = rng
+
+    @property
+    def label(self) -> str:
+        return type(self.inner).__name__
+
+    def backoff(self, attempt: int, retry_after_s: float | None = None) -> float:
+        """Full jitter: uniform in [0, min(max, base * 2^attempt)], but never sooner than Retry-After."""
+        delay = self._rng() * min(self.backoff_max_s, self.backoff_base_s * (2**attempt))
+        if retry_after_s:
+            delay = max(delay, min(retry_after_s, self.backoff_max_s))
+        return delay
+
+    def complete(self, *, messages: list[dict[str, Any]], tools: list[dict[str, Any]]) -> LLMMessage:
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                return self._degrade("circuit_open", LLMUnavailable(self.breaker.retry_after()), messages, tools)
+            try:
+                msg = self.inner.complete(messages=messages, tools=tools)
+            except LLMError as e:
+                metrics.LLM_FAILURES.inc(kind=e.kind)
+                # A rejected request (bad arguments, context too long) says nothing about provider health.
+                self.breaker.record(not e.retryable)
+                if not e.retryable or attempt >= self.max_retries:
+                    return self._degrade("failed", e, messages, tools)
+                metrics.LLM_RETRIES.inc(kind=e.kind)
+                self._sleep(self.backoff(attempt, e.retry_after_s))
+                attempt += 1
+                continue
+            except BaseException:
+                self.breaker.abandon()
+                raise
+            self.breaker.record(True)
+            return msg
+
+    def _degrade(
+        self, reason: str, error: LLMError, messages: list[dict[str, Any]], tools: list[dict[str, Any]]
+    ) -> LLMMessage:
+        if self.fallback is None or not (error.retryable or isinstance(error, LLMUnavailable)):
+            raise error
+        metrics.LLM_DEGRADED.inc(reason=reason)
+        return self.fallback.complete(messages=messages, tools=tools)
+
+
+class FaultInjectingLLMClient(LLMClient):
+    """
+    Wraps a client and injects provider faults: added latency, errors, and hangs that
+    end in a timeout. `outage = True` fails every call until cleared.
+    """
+
+    def __init__(
+        self,
+        inner: LLMClient,
+        *,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        latency_s: float = 0.0,
+        timeout_s: float | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self.inner = inner
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.latency_s = latency_s
+        self.timeout_s = settings.llm_timeout_seconds if timeout_s is None else timeout_s
+        self.outage = False
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_spec(cls, spec: str, inner: LLMClient) -> FaultInjectingLLMClient:
+        """Parse `"error_rate=0.3,timeout_rate=0.1,latency=0.2,timeout=1,seed=7"`."""
+        names = {"error_rate": "error_rate", "timeout_rate": "timeout_rate", "latency": "latency_s", "timeout": "timeout_s"}
+        kwargs: dict[str, Any] = {}
+        for part in spec.split(","):
+            key, sep, value = part.strip().partition("=")
+            if not sep:
+                continue
+            key = key.strip()
+            if key == "seed":
+                kwargs["seed"] = int(value)
+            elif key in names:
+                kwargs[names[key]] = float(value)
+            else:
+                raise ValueError(f"Unknown LLM_FAULTS option {key!r}.")
+        return cls(inner, **kwargs)
+
+    def complete(self, *, messages: list[dict[str, Any]], tools: list[dict[str, Any]]) -> LLMMessage:
+        with self._lock:
+            roll = self._rng.random()
+        # Stands in for a provider call, so it holds a concurrency slot like one.
+        with ratelimit.llm_slot():
+            if self.latency_s:
+                time.sleep(self.latency_s)
+            if self.outage or roll < self.error_rate:
+                raise LLMError("Injected provider error.", kind="server_error", status_code=503)
+            if roll < self.error_rate + self.timeout_rate:
+                time.sleep(self.timeout_s)
+                raise LLMTimeout("Injected timeout.")
+            return self.inner.complete(messages=messages, tools=tools)
+
+
+# One breaker per process: `get_llm_client` builds a client per request, but provider health is shared.
+breaker = CircuitBreaker(
+    window=settings.llm_breaker_window,
+    failure_ratio=settings.llm_breaker_failure_ratio,
+    min_calls=settings.llm_breaker_min_calls,
+    cooldown_s=settings.llm_breaker_cooldown_seconds,
+)
+
+
+def wrap(client: LLMClient) -> ResilientLLMClient:
+    """`client` behind the configured retries, shared breaker and (optional) degraded fallback."""
+    return ResilientLLMClient(
+        client,
+        breaker=breaker,
+        fallback=DegradedLLMClient() if settings.llm_degrade_on_failure else None,
+        max_retries=settings.llm_max_retries,
+        backoff_base_s=settings.llm_backoff_base_seconds,
+        backoff_max_s=settings.llm_backoff_max_seconds,
+    )
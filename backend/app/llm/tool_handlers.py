@@ -1,31 +1,28 @@
 from __future__ import annotations
 
-import json
+import time
 from dataclasses import dataclass
 from datetime import date, datetime, timezone
-from typing import Any
+from typing import Annotated, Any
 
-from sqlalchemy import func, select
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
-from backend.app.db.models import Task, TaskDependency
-from backend.app.schemas import PrioritizeResponse, TaskCreate, TaskUpdate
-from backend.app.services import calendar_service, day_score_service, prioritizer, task_service
-
-
-def _parse_datetime(value: str | None) -> datetime | None:
-    if value is None:
-        return None
-    v = value.strip()
-    if v.endswith("Z"):
-        v = v[:-1] + "+00:00"
-    return datetime.fromisoformat(v)
-
-
-def _parse_date(value: str | None) -> date | None:
-    if value is None:
-        return None
-    return date.fromisoformat(value.strip())
+from backend.app.core import metrics, tracing
+from backend.app.db.session import router
+from backend.app.llm.tool_registry import ToolError, ToolRegistry
+from backend.app.schemas import PrioritizeResponse, TaskCreate, TaskReadList, TaskSearchHit, TaskUpdate
+from backend.app.services import (
+    archive_service,
+    calendar_service,
+    day_score_service,
+    event_service,
+    idempotency_service,
+    prioritizer,
+    priority_weights,
+    search_service,
+    task_service,
+)
 
 
 def _now_utc() -> datetime:
@@ -36,121 +33,264 @@ def _now_utc() -> datetime:
 class ToolContext:
     db: Session
     user_id: int | None = None
+    session_id: str | None = None
+    # Replica session for read-only tools (None = read from `db`).
+    read_db: Session | None = None
 
+    def reader(self) -> Session:
+        # Back to the primary once this turn (or this user, recently) wrote anything.
+        return router.reader(self.db, self.read_db)
 
-def execute_tool(ctx: ToolContext, *, name: str, arguments_json: str) -> dict[str, Any]:
+
+def execute_tool(ctx: ToolContext, *, name: str, arguments_json: str, call_id: str | None = None) -> dict[str, Any]:
     """
     Execute one tool call and return a JSON-serializable result.
 
     Return format:
       {"ok": bool, "result": ..., "error": "..."}
     """
-    try:
-        args = json.loads(arguments_json or "{}")
-    except json.JSONDecodeError as e:
-        return {"ok": False, "error": f"Invalid JSON arguments for {name}: {e}"}
+    start = time.perf_counter()
+    with tracing.span("tool", tool=name) as s, event_service.source("tool"):
+        if name in WRITE_TOOLS and call_id and ctx.session_id:
+            result = _execute_write_once(ctx, name=name, arguments_json=arguments_json, call_id=call_id)
+        else:
+            result = _execute_tool(ctx, name=name, arguments_json=arguments_json)
+        if s is not None:
+            s.set(ok=bool(result.get("ok")), error=result.get("error"))
+    metrics.TOOL_SECONDS.observe(time.perf_counter() - start, tool=name, ok=str(bool(result.get("ok"))).lower())
+    return result
+
 
+_TASK_WRITES = {"create_task", "update_task"}
+
+
+def _execute_write_once(ctx: ToolContext, *, name: str, arguments_json: str, call_id: str) -> dict[str, Any]:
+    assert ctx.session_id is not None
     try:
-        if name == "create_task":
-            # Convert string datetimes to real datetimes for pydantic validation.
-            if "due_at" in args:
-                args["due_at"] = _parse_datetime(args.get("due_at"))
-            data = TaskCreate(**args)
-            task = task_service.create_task(ctx.db, data, user_id=ctx.user_id)
-            return {"ok": True, "result": task.model_dump()}
-
-        if name == "update_task":
-            task_id = int(args["task_id"])
-            if "due_at" in args:
-                args["due_at"] = _parse_datetime(args.get("due_at"))
-            if "task_id" in args:
-                args.pop("task_id")
-            data = TaskUpdate(**args)
-            task = task_service.update_task(ctx.db, task_id, data)
-            return {"ok": True, "result": task.model_dump()}
-
-        if name == "list_tasks":
-            status = args.get("status")
-            limit = int(args.get("limit") or 200)
-            tasks = task_service.list_tasks(ctx.db, user_id=ctx.user_id, status=status, limit=limit)
-            return {"ok": True, "result": [t.model_dump() for t in tasks]}
-
-        if name == "prioritize_tasks":
-            task_ids = args.get("task_ids")
-            as_of = _parse_datetime(args.get("as_of")) or _now_utc()
-
-            if task_ids:
-                tasks = [t for t in task_service.list_tasks(ctx.db, user_id=ctx.user_id) if t.id in set(task_ids)]
-            else:
-                tasks = task_service.list_tasks(ctx.db, user_id=ctx.user_id)
-
-            # Count how many tasks each task unblocks (dependents).
-            rows = ctx.db.execute(
-                select(TaskDependency.depends_on_id, func.count(TaskDependency.task_id))
-                .group_by(TaskDependency.depends_on_id)
-            ).all()
-            unblocks = {int(dep_id): int(cnt) for dep_id, cnt in rows}
-
-            results = prioritizer.prioritize(tasks, unblocks_by_task_id=unblocks, as_of=as_of)
-            payload = PrioritizeResponse(as_of=as_of, results=results)
-            return {"ok": True, "result": payload.model_dump()}
-
-        if name == "estimate_completion":
-            task_id = int(args["task_id"])
-            as_of = _parse_datetime(args.get("as_of")) or _now_utc()
-            task = task_service.get_task(ctx.db, task_id)
-            if task is None:
-                return {"ok": False, "error": f"Task {task_id} not found."}
-            chance = prioritizer.estimate_completion_chance(task, as_of=as_of)
-            return {"ok": True, "result": {"task_id": task_id, "as_of": as_of.isoformat(), "completion_chance": chance}}
-
-        if name == "review_day":
-            day = _parse_date(args.get("day")) or date.today()
-            planned_points = float(args.get("planned_points") or 0.0)
-            completed_points = float(args.get("completed_points") or 0.0)
-            notes = args.get("notes")
-            resp = day_score_service.upsert_day_score(
-                ctx.db,
-                user_id=ctx.user_id,
-                day=day,
-                planned_points=planned_points,
-                completed_points=completed_points,
-                notes=notes,
-            )
-            return {"ok": True, "result": resp.model_dump()}
-
-        if name == "calendar_read":
-            time_min = _parse_datetime(args.get("time_min"))
-            time_max = _parse_datetime(args.get("time_max"))
-            if time_min is None or time_max is None:
-                return {"ok": False, "error": "time_min and time_max are required ISO datetimes."}
-            calendar_id = args.get("calendar_id") or "primary"
-            result = calendar_service.read_calendar_busy(
-                user_id=ctx.user_id,
-                time_min=time_min,
-                time_max=time_max,
-                calendar_id=calendar_id,
-            )
-            return {"ok": True, "result": result}
-
-        if name == "calendar_move":
-            event_id = str(args.get("event_id") or "")
-            new_start = _parse_datetime(args.get("new_start"))
-            new_end = _parse_datetime(args.get("new_end"))
-            if not event_id or new_start is None or new_end is None:
-                return {"ok": False, "error": "event_id, new_start, new_end are required."}
-            calendar_id = args.get("calendar_id") or "primary"
-            result = calendar_service.move_calendar_event(
-                user_id=ctx.user_id,
-                event_id=event_id,
-                new_start=new_start,
-                new_end=new_end,
-                calendar_id=calendar_id,
-            )
-            return {"ok": True, "result": result}
+        result, replayed = idempotency_service.execute_once(
+            ctx.db,
+            idempotency_service.tool_key(ctx.user_id, ctx.session_id, call_id),
+            fingerprint=idempotency_service.fingerprint(name, arguments_json or ""),
+            run=lambda: _execute_tool(ctx, name=name, arguments_json=arguments_json),
+            # Failed calls aren't remembered, so a retry can succeed.
+            store=lambda r: bool(r.get("ok")),
+            # These return the task_service result as is, which is stored with the write itself.
+            encode=(lambda read: {"ok": True, "result": read.model_dump(mode="json")}) if name in _TASK_WRITES else None,
+        )
+    except idempotency_service.IdempotencyError as e:
+        return {"ok": False, "error": str(e)}
+    if replayed:
+        result = {**result, "replayed": True}
+    return result
 
-        return {"ok": False, "error": f"Unknown tool: {name}"}
 
+def _execute_tool(ctx: ToolContext, *, name: str, arguments_json: str) -> dict[str, Any]:
+    tool = registry.get(name)
+    if tool is None:
+        return {"ok": False, "error": f"Unknown tool: {name}"}
+    try:
+        return {"ok": True, "result": tool.handler(ctx, tool.parse(arguments_json))}
+    except ToolError as e:
+        return {"ok": False, "error": str(e)}
     except Exception as e:
         return {"ok": False, "error": f"{name} failed: {type(e).__name__}: {e}"}
 
+
+# --- Tools --------------------------------------------------------------------------------------
+# Each tool's argument model is its OpenAI schema: field types, bounds and descriptions are
+# what the model sees, and what `Tool.parse` enforces.
+
+
+class CreateTaskArgs(TaskCreate):
+    title: str = Field(..., max_length=200, description="Short title (use description if no title).")
+    description: str | None = Field(default=None, description="Longer details.")
+    status: str = Field(default="inbox", description="Task status (inbox/planned/in_progress/done/canceled).")
+    due_at: datetime | None = Field(default=None, description="ISO 8601 datetime, e.g. 2026-02-04T17:00:00Z")
+
+
+class UpdateTaskArgs(TaskUpdate):
+    task_id: int = Field(..., ge=1)
+    due_at: datetime | None = Field(default=None, description="ISO 8601 datetime")
+
+
+class ListTasksArgs(BaseModel):
+    status: str | None = Field(default=None, description="Optional status filter.")
+    tag: str | None = Field(default=None, max_length=200, description="Only tasks with this tag.")
+    person: str | None = Field(default=None, max_length=200, description="Only tasks that need this person.")
+    resource: str | None = Field(default=None, max_length=200, description="Only tasks that need this resource.")
+    include_archived: bool = Field(default=False, description="Also return tasks finished long ago (archived).")
+    limit: int = Field(default=200, ge=1, le=500)
+
+
+class SearchTasksArgs(BaseModel):
+    query: str = Field(..., min_length=1, max_length=200, description="Words to look for in titles, descriptions and tags.")
+    status: str | None = Field(default=None, description="Optional status filter.")
+    include_archived: bool = Field(default=False, description="Also search tasks finished long ago (archived).")
+    limit: int = Field(default=10, ge=1, le=50)
+
+
+class PrioritizeTasksArgs(BaseModel):
+    task_ids: list[Annotated[int, Field(ge=1)]] | None = None
+    as_of: datetime | None = Field(default=None, description="ISO 8601 datetime; defaults to now.")
+
+
+class EstimateCompletionArgs(BaseModel):
+    task_id: int = Field(..., ge=1)
+    as_of: datetime | None = Field(default=None, description="ISO 8601 datetime; defaults to now.")
+
+
+class ReviewDayArgs(BaseModel):
+    day: date | None = Field(default=None, description="YYYY-MM-DD; defaults to today.")
+    planned_points: float = Field(default=0.0, ge=0)
+    completed_points: float = Field(default=0.0, ge=0)
+    notes: str | None = None
+
+
+class CalendarReadArgs(BaseModel):
+    time_min: datetime = Field(..., description="ISO 8601 datetime")
+    time_max: datetime = Field(..., description="ISO 8601 datetime")
+    calendar_id: str = Field(default="primary", description="Defaults to primary.")
+
+
+class CalendarMoveArgs(BaseModel):
+    event_id: str = Field(..., min_length=1)
+    new_start: datetime = Field(..., description="ISO 8601 datetime")
+    new_end: datetime = Field(..., description="ISO 8601 datetime")
+    calendar_id: str = "primary"
+
+
+registry = ToolRegistry()
+
+
+@registry.register("create_task", description="Create a new task in the to-do list.", args=CreateTaskArgs, writes=True)
+def _create_task(ctx: ToolContext, args: CreateTaskArgs) -> dict[str, Any]:
+    return task_service.create_task(ctx.db, args, user_id=ctx.user_id).model_dump(mode="json")
+
+
+@registry.register("update_task", description="Update an existing task by id.", args=UpdateTaskArgs, writes=True)
+def _update_task(ctx: ToolContext, args: UpdateTaskArgs) -> dict[str, Any]:
+    return task_service.update_task(ctx.db, args.task_id, args, user_id=ctx.user_id).model_dump(mode="json")
+
+
+@registry.register("list_tasks", description="List tasks.", args=ListTasksArgs)
+def _list_tasks(ctx: ToolContext, args: ListTasksArgs) -> list[Any]:
+    tasks = task_service.list_tasks(
+        ctx.reader(),
+        user_id=ctx.user_id,
+        status=args.status,
+        limit=args.limit,
+        tag=args.tag,
+        person=args.person,
+        resource=args.resource,
+        include_archived=args.include_archived,
+    )
+    # One serializer pass over the list; JSON-native values need no `default=str` later.
+    return TaskReadList.dump_python(tasks, mode="json")
+
+
+@registry.register(
+    "search_tasks",
+    description="Find tasks by words in their title, description or tags; returns compact ranked hits (id, title, status, due).",
+    args=SearchTasksArgs,
+)
+def _search_tasks(ctx: ToolContext, args: SearchTasksArgs) -> list[Any]:
+    db = ctx.reader()
+    hits = search_service.search_tasks(db, args.query, user_id=ctx.user_id, status=args.status, limit=args.limit)
+    if args.include_archived and len(hits) < args.limit:
+        # Archived matches come after live ones; they aren't ranked.
+        hits += [
+            TaskSearchHit(task_id=t.id, title=t.title, status=t.status, due_at=t.due_at, score=0.0)
+            for t in archive_service.search_archive(db, args.query, user_id=ctx.user_id, limit=args.limit - len(hits))
+            if args.status is None or t.status == args.status
+        ]
+    return [h.model_dump(mode="json", exclude_none=True) for h in hits]
+
+
+@registry.register(
+    "prioritize_tasks",
+    description="Compute a prioritized ordering and completion chances for tasks.",
+    args=PrioritizeTasksArgs,
+)
+def _prioritize_tasks(ctx: ToolContext, args: PrioritizeTasksArgs) -> dict[str, Any]:
+    as_of = args.as_of or _now_utc()
+    db = ctx.reader()
+
+    tasks = task_service.list_tasks(db, user_id=ctx.user_id)
+    if args.task_ids:
+        wanted = set(args.task_ids)
+        tasks = [t for t in tasks if t.id in wanted]
+
+    # Count how many tasks each task unblocks (dependents).
+    unblocks = task_service.unblock_counts(db, user_id=ctx.user_id)
+    # Open work already queued on the same people/resources lowers completion chances.
+    contention = task_service.contention_minutes(db, tasks, user_id=ctx.user_id)
+    weights = priority_weights.weights_for(db, ctx.user_id)
+
+    results = prioritizer.prioritize(
+        tasks, unblocks_by_task_id=unblocks, as_of=as_of, contention_by_task_id=contention, weights=weights
+    )
+    return PrioritizeResponse(as_of=as_of, results=results).model_dump(mode="json")
+
+
+@registry.register(
+    "estimate_completion", description="Estimate chance of completion for a single task.", args=EstimateCompletionArgs
+)
+def _estimate_completion(ctx: ToolContext, args: EstimateCompletionArgs) -> dict[str, Any]:
+    as_of = args.as_of or _now_utc()
+    db = ctx.reader()
+    task = task_service.get_task(db, args.task_id, user_id=ctx.user_id)
+    if task is None:
+        raise ToolError(f"Task {args.task_id} not found.")
+    contention = task_service.contention_minutes(db, [task], user_id=ctx.user_id).get(task.id, 0.0)
+    unblocks = task_service.unblock_counts(db, user_id=ctx.user_id).get(task.id, 0)
+    chance = prioritizer.estimate_completion_chance(
+        task, as_of=as_of, contention_minutes=contention, unblocks_count=unblocks
+    )
+    return {"task_id": args.task_id, "as_of": as_of.isoformat(), "completion_chance": chance}
+
+
+@registry.register(
+    "review_day", description="Upsert a daily score (planned vs completed).", args=ReviewDayArgs, writes=True
+)
+def _review_day(ctx: ToolContext, args: ReviewDayArgs) -> dict[str, Any]:
+    resp = day_score_service.upsert_day_score(
+        ctx.db,
+        user_id=ctx.user_id,
+        day=args.day or date.today(),
+        planned_points=args.planned_points,
+        completed_points=args.completed_points,
+        notes=args.notes,
+    )
+    return resp.model_dump(mode="json")
+
+
+@registry.register(
+    "calendar_read", description="Read calendar busy blocks between time_min and time_max.", args=CalendarReadArgs
+)
+def _calendar_read(ctx: ToolContext, args: CalendarReadArgs) -> Any:
+    return calendar_service.read_calendar_busy(
+        user_id=ctx.user_id,
+        time_min=args.time_min,
+        time_max=args.time_max,
+        calendar_id=args.calendar_id,
+    )
+
+
+@registry.register(
+    "calendar_move",
+    description="Move a calendar event to a new start/end time (requires user confirmation).",
+    args=CalendarMoveArgs,
+    writes=True,
+)
+def _calendar_move(ctx: ToolContext, args: CalendarMoveArgs) -> Any:
+    return calendar_service.move_calendar_event(
+        user_id=ctx.user_id,
+        event_id=args.event_id,
+        new_start=args.new_start,
+        new_end=args.new_end,
+        calendar_id=args.calendar_id,
+    )
+
+
+# Tools with side effects; retried calls (same session + tool_call_id) replay the first result.
+WRITE_TOOLS = registry.write_names()
@@ -0,0 +1,116 @@
+"""
+Registry of chat tools.
+
+Each tool declares one pydantic model for its arguments. At registration (import
+time) that model yields both the OpenAI function schema sent to the model and a
+`TypeAdapter` that validates the raw `arguments` JSON in one pass (pydantic's
+native JSON parser: no `json.loads`, no hand-parsed datetimes). Dispatch is a dict
+lookup, and schemas can't drift from the handlers because they're the same model.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class ToolError(Exception):
+    """Expected failure (bad input, missing task); reported to the model verbatim."""
+
+
+def _clean(prop: dict[str, Any]) -> dict[str, Any]:
+    # Optional fields: `anyOf: [X, null]` -> X; the field just isn't required.
+    any_of = prop.get("anyOf")
+    if any_of:
+        non_null = [p for p in any_of if p.get("type") != "null"]
+        if len(non_null) == 1:
+            prop = {**{k: v for k, v in prop.items() if k != "anyOf"}, **non_null[0]}
+    out = {k: v for k, v in prop.items() if k not in ("title", "default")}
+    if "items" in out:
+        out["items"] = _clean(out["items"])
+    return out
+
+
+def openai_parameters(model: type[BaseModel]) -> dict[str, Any]:
+    """Flat JSON schema for `model` in the shape OpenAI function calling expects."""
+    schema = model.model_json_schema()
+    params: dict[str, Any] = {
+        "type": "object",
+        "additionalProperties": False,
+        "properties": {name: _clean(prop) for name, prop in schema.get("properties", {}).items()},
+    }
+    if schema.get("required"):
+        params["required"] = list(schema["required"])
+    return params
+
+
+@dataclass(frozen=True)
+class Tool(Generic[M]):
+    name: str
+    description: str
+    args: type[M]
+    handler: Callable[[Any, M], Any]
+    # Side effects: retried calls (same session + tool_call_id) replay the first result.
+    writes: bool
+    validator: TypeAdapter[M]
+    schema: dict[str, Any]
+
+    def parse(self, arguments_json: str) -> M:
+        """Validate raw `arguments` JSON; raises `ToolError` with a message the model can act on."""
+        try:
+            return self.validator.validate_json(arguments_json or "{}")
+        except ValidationError as e:
+            if any(err["type"] == "json_invalid" for err in e.errors()):
+                raise ToolError(f"Invalid JSON arguments for {self.name}: {e.errors()[0]['msg']}") from None
+            problems = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'arguments'}: {err['msg']}" for err in e.errors())
+            raise ToolError(f"Invalid arguments for {self.name}: {problems}") from None
+
+
+class ToolRegistry:
+    def __init__(self) -> None:
+        self._tools: dict[str, Tool[Any]] = {}
+        self._schemas: list[dict[str, Any]] | None = None
+
+    def register(
+        self, name: str, *, description: str, args: type[M], writes: bool = False
+    ) -> Callable[[Callable[[Any, M], Any]], Callable[[Any, M], Any]]:
+        def decorator(handler: Callable[[Any, M], Any]) -> Callable[[Any, M], Any]:
+            if name in self._tools:
+                raise ValueError(f"Tool {name!r} is already registered.")
+            self._tools[name] = Tool(
+                name=name,
+                description=description,
+                args=args,
+                handler=handler,
+                writes=writes,
+                validator=TypeAdapter(args),
+                schema={
+                    "type": "function",
+                    "function": {"name": name, "description": description, "parameters": openai_parameters(args)},
+                },
+            )
+            self._schemas = None
+            return handler
+
+        return decorator
+
+    def get(self, name: str) -> Tool[Any] | None:
+        return self._tools.get(name)
+
+    def names(self) -> list[str]:
+        return list(self._tools)
+
+    def write_names(self) -> frozenset[str]:
+        return frozenset(name for name, t in self._tools.items() if t.writes)
+
+    def schemas(self) -> list[dict[str, Any]]:
+        """OpenAI tool schemas, in registration order (built once)."""
+        if self._schemas is None:
+            self._schemas = [t.schema for t in self._tools.values()]
+        return self._schemas
@@ -1,30 +1,76 @@
 from __future__ import annotations
 
-from fastapi import Depends, FastAPI, HTTPException
+import contextlib
+import math
+import time
+from collections.abc import Callable
+from datetime import date, datetime, timedelta
+from typing import Literal
+
+import anyio
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from pydantic import BaseModel
+from starlette.requests import HTTPConnection
 from sqlalchemy.orm import Session
 
+from backend.app.core import http_cache, metrics, ratelimit, tracing
 from backend.app.core.config import settings
+from backend.app.core.pubsub import hub
+from backend.app.core.responses import JSONBytesResponse
 from backend.app.db.init_db import init_db
-from backend.app.db.session import get_db
-from backend.app.llm.orchestrator import run_chat
+from backend.app.db.models import LabelKind
+from backend.app.db.session import get_db, get_read_db, request_user_id, router
+from backend.app.llm.client import LLMClient, LLMError, LLMTimeout, LLMUnavailable, get_llm_client
 from backend.app.schemas import (
+    ChangesResponse,
     ChatRequest,
     ChatResponse,
+    DayScoreAnalytics,
+    DayScorePeriod,
+    LabelWorkload,
     PrioritizeRequest,
     PrioritizeResponse,
     ReviewDayRequest,
     ReviewDayResponse,
     TaskCreate,
+    TaskOccurrenceRead,
     TaskRead,
+    TaskReadList,
+    TaskSearchHit,
     TaskUpdate,
 )
-from backend.app.services import day_score_service, prioritizer, task_service
-from backend.app.db.models import TaskDependency
-from sqlalchemy import func, select
+from backend.app.services import (
+    archive_service,
+    change_feed_service,
+    completion_model,
+    day_score_service,
+    idempotency_service,
+    prioritizer,
+    priority_weights,
+    search_service,
+    task_service,
+    version_service,
+)
+
+
+def _enforce_rate_limit(conn: HTTPConnection) -> None:
+    # Runs after routing, so limits are keyed by route template like the metrics are.
+    route_path = getattr(conn.scope.get("route"), "path", None)
+    rate = ratelimit.ROUTE_LIMITS.get(route_path) if route_path else None
+    if rate is None:
+        return
+    user_id = request_user_id(conn)
+    who = f"user:{user_id}" if user_id is not None else f"ip:{conn.client.host if conn.client else 'unknown'}"
+    try:
+        ratelimit.check(f"{route_path}|{who}", rate, scope=route_path)
+    except ratelimit.RateLimited as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after_s))})
 
 
-app = FastAPI(title="AI To-Do Backend", version="0.2.0")
+app = FastAPI(title="AI To-Do Backend", version="0.2.0", dependencies=[Depends(_enforce_rate_limit)])
 
 app.add_middleware(
     CORSMiddleware,
@@ -32,12 +78,124 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let browser clients read sync/caching headers.
+    expose_headers=["ETag", "Last-Modified", "X-Change-Cursor", "X-Trace-Id", "X-Trace"],
+)
+
+
+@app.middleware("http")
+async def _record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    with metrics.track_queries() as queries:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            # Label by route template (e.g. /v1/tasks/{task_id}) to keep cardinality bounded.
+            route = request.scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            metrics.HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - start, method=request.method, route=route_path, status=status
+            )
+            metrics.DB_QUERIES_PER_REQUEST.observe(queries.count, route=route_path)
+            metrics.DB_TIME_PER_REQUEST.observe(queries.seconds, route=route_path)
+
+
+@app.middleware("http")
+async def _trace_request(request: Request, call_next):
+    debug = settings.trace_debug_header and request.headers.get("x-debug-trace") == "1"
+    with tracing.start_trace(
+        f"{request.method} {request.url.path}", sampled=tracing.should_sample(force=debug), method=request.method
+    ) as trace:
+        response = await call_next(request)
+        if trace is None:
+            return response
+        route = request.scope.get("route")
+        trace.name = f"{request.method} {getattr(route, 'path', request.url.path)}"
+        trace.attrs["status"] = response.status_code
+    tracing.export_trace(trace)
+    response.headers["X-Trace-Id"] = trace.trace_id
+    if debug:
+        response.headers["X-Trace"] = tracing.header_value(trace)
+    return response
+
+
+archiver = archive_service.Archiver(
+    lambda: {name: (lambda name=name: router.session(name)) for name in router.names},
+    older_than_days=settings.archive_after_days,
+    interval_s=settings.archive_interval_seconds,
+    batch_size=settings.archive_batch_size,
+    change_log_retention_days=settings.change_log_retention_days,
+)
+learner = priority_weights.Learner(
+    lambda: {name: (lambda name=name: router.session(name)) for name in router.names},
+    interval_s=settings.priority_learning_interval_seconds,
 )
 
 
+def warm_up() -> None:
+    """
+    What every worker would otherwise do on its first requests, done once in the
+    gunicorn master before it forks (see `gunicorn.conf.py`): bring the schema up
+    to date, import the chat stack and build the tool schemas, system prompt and
+    completion model. Workers inherit all of it copy-on-write.
+    """
+    init_db()
+    from backend.app.llm import orchestrator, prompts, tool_schemas  # noqa: F401
+
+    tool_schemas.get_tool_schemas()
+    prompts.build_system_prompt()
+    completion_model.active()
+    if settings.openai_api_key:
+        # The SDK is the slowest import on the chat path.
+        with contextlib.suppress(ImportError):
+            import openai  # noqa: F401
+    # The master serves nothing; workers open their own connections.
+    router.dispose()
+
+
+# Set in the gunicorn master before it forks, so its workers leave these jobs to it.
+_jobs_in_master = False
+
+
+def start_jobs_in_master() -> None:
+    """
+    Run the archiver and the priority learner in the gunicorn master (`when_ready`,
+    after `warm_up`): one of each per deployment instead of one per worker, all
+    racing over the same rows. Both open sessions through `router` only, so the
+    at-fork `router.dispose(close=False)` in db/session.py keeps workers off the
+    connections these threads hold while gunicorn forks.
+    """
+    global _jobs_in_master
+    _jobs_in_master = True
+    archiver.start()
+    learner.start()
+
+
+def stop_jobs_in_master() -> None:
+    learner.stop()
+    archiver.stop()
+
+
 @app.on_event("startup")
 def _startup() -> None:
+    # Sync endpoints run on anyio's thread pool (per worker).
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
     init_db()
+    hub.start()
+    if not _jobs_in_master:
+        archiver.start()
+        learner.start()
+
+
+@app.on_event("shutdown")
+def _shutdown() -> None:
+    learner.stop()
+    archiver.stop()
+    hub.stop()
+    tracing.flush_exports()
 
 
 @app.get("/health")
@@ -45,78 +203,325 @@ def health() -> dict:
     return {"ok": True}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
 @app.post("/chat", response_model=ChatResponse)
-def chat(request: ChatRequest, db: Session = Depends(get_db)) -> ChatResponse:
+def chat(
+    request: ChatRequest,
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
+    llm_client: LLMClient = Depends(get_llm_client),
+) -> ChatResponse:
+    if not router.serves(db, request.user_id):
+        raise HTTPException(status_code=400, detail="Send the chat's user id in X-User-Id so it reaches the user's shard.")
+    # The chat stack (tool handlers, prompts, tool schemas) loads on the first chat, not at boot.
+    from backend.app.llm.orchestrator import run_chat
+
     try:
-        return run_chat(db, request=request)
+        return run_chat(db, request=request, llm_client=llm_client, read_db=read_db)
+    except ratelimit.RateLimited as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after_s))})
+    except LLMUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after_s or 1))})
+    except LLMTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except LLMError as e:
+        raise HTTPException(status_code=502, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _idempotent(
+    db: Session,
+    idempotency_key: str,
+    *,
+    user_id: int | None,
+    route: str,
+    body: BaseModel,
+    run: Callable[[], BaseModel],
+) -> Response:
+    """Execute a write once per `Idempotency-Key`; retries get the stored response back."""
+    try:
+        key = idempotency_service.rest_key(user_id, idempotency_key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        result, replayed = idempotency_service.execute_once(
+            db,
+            key,
+            fingerprint=idempotency_service.fingerprint(route, body.model_dump_json()),
+            run=lambda: run().model_dump(mode="json"),
+            # task_service stores the response in the write's own transaction.
+            encode=lambda read: read.model_dump(mode="json"),
+        )
+    except idempotency_service.IdempotencyKeyInProgress as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except idempotency_service.IdempotencyKeyMismatch as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return JSONResponse(result, headers=headers)
+
+
 @app.post("/v1/tasks", response_model=TaskRead)
-def create_task(request: TaskCreate, db: Session = Depends(get_db)) -> TaskRead:
+def create_task(
+    request: TaskCreate,
+    db: Session = Depends(get_db),
+    user_id: int | None = Depends(request_user_id),
+    idempotency_key: str | None = Header(default=None),
+) -> TaskRead | Response:
     try:
-        return task_service.create_task(db, request)
+        if idempotency_key is not None:
+            return _idempotent(
+                db,
+                idempotency_key,
+                user_id=user_id,
+                route="POST /v1/tasks",
+                body=request,
+                run=lambda: task_service.create_task(db, request, user_id=user_id),
+            )
+        return task_service.create_task(db, request, user_id=user_id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.get("/v1/tasks", response_model=list[TaskRead])
-def list_tasks(status: str | None = None, limit: int = 200, db: Session = Depends(get_db)) -> list[TaskRead]:
-    return task_service.list_tasks(db, status=status, limit=limit)
+@app.get("/v1/tasks", response_model=list[TaskRead], response_class=JSONBytesResponse)
+def list_tasks(
+    http_request: Request,
+    status: str | None = None,
+    limit: int = 200,
+    tag: str | None = Query(default=None, max_length=200),
+    person: str | None = Query(default=None, max_length=200),
+    resource: str | None = Query(default=None, max_length=200),
+    include_archived: bool = False,
+    db: Session = Depends(get_read_db),
+    user_id: int | None = Depends(request_user_id),
+) -> Response:
+    # Validate against the user's data version first: a polling client with a fresh copy costs one lookup.
+    version, last_modified = version_service.get_version(db, version_service.user_scope(user_id))
+    etag = http_cache.make_etag("tasks", version, status, limit, tag, person, resource, include_archived)
+    headers = http_cache.cache_headers(etag, last_modified)
+    if http_cache.etag_matches(http_request.headers.get("if-none-match"), headers["ETag"]):
+        return http_cache.not_modified(headers)
+
+    # Read before the list: a client resuming `/v1/changes` from here may replay, but never miss, a write.
+    headers["X-Change-Cursor"] = str(change_feed_service.latest_cursor(db))
+    tasks = task_service.list_tasks(
+        db,
+        user_id=user_id,
+        status=status,
+        limit=limit,
+        tag=tag,
+        person=person,
+        resource=resource,
+        include_archived=include_archived,
+    )
+    return JSONBytesResponse(TaskReadList.dump_json(tasks), headers=headers)
+
+
+@app.get("/v1/occurrences", response_model=list[TaskOccurrenceRead])
+def list_occurrences(
+    start: datetime,
+    end: datetime,
+    task_id: int | None = None,
+    limit: int = Query(default=1000, ge=1, le=5000),
+    db: Session = Depends(get_read_db),
+    user_id: int | None = Depends(request_user_id),
+) -> list[TaskOccurrenceRead]:
+    if end <= start or end - start > timedelta(days=366):
+        raise HTTPException(status_code=400, detail="end must be after start and at most 366 days later.")
+    return task_service.list_occurrences(db, start=start, end=end, user_id=user_id, task_id=task_id, limit=limit)
+
+
+@app.get("/v1/workload", response_model=list[LabelWorkload])
+def workload(
+    kind: Literal["person", "resource", "tag"] = "person",
+    db: Session = Depends(get_read_db),
+    user_id: int | None = Depends(request_user_id),
+) -> list[LabelWorkload]:
+    return task_service.label_workload(db, LabelKind(kind), user_id=user_id)
+
 
+@app.get("/v1/tasks/search", response_model=list[TaskSearchHit])
+def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    status: str | None = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    user_id: int | None = Depends(request_user_id),
+) -> list[TaskSearchHit]:
+    # Declared before /v1/tasks/{task_id} so "search" isn't taken for an id.
+    return search_service.search_tasks(db, q, user_id=user_id, status=status, limit=limit)
 
-@app.get("/v1/tasks/{task_id}", response_model=TaskRead)
-def get_task(task_id: int, db: Session = Depends(get_db)) -> TaskRead:
-    task = task_service.get_task(db, task_id)
+
+@app.get("/v1/archive/search", response_model=list[TaskRead])
+def search_archive(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    user_id: int | None = Depends(request_user_id),
+) -> list[TaskRead]:
+    return archive_service.search_archive(db, q, user_id=user_id, limit=limit)
+
+
+@app.get("/v1/tasks/{task_id}", response_model=TaskRead, response_class=JSONBytesResponse)
+def get_task(
+    task_id: int,
+    http_request: Request,
+    db: Session = Depends(get_read_db),
+    user_id: int | None = Depends(request_user_id),
+) -> Response:
+    validator = task_service.get_task_validator(db, task_id, user_id=user_id)
+    if validator is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    version, updated_at = validator
+    headers = http_cache.cache_headers(http_cache.make_etag("task", task_id, version, updated_at), updated_at)
+    if http_cache.etag_matches(http_request.headers.get("if-none-match"), headers["ETag"]):
+        return http_cache.not_modified(headers)
+
+    task = task_service.get_task(db, task_id, user_id=user_id)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    return JSONBytesResponse(task.model_dump_json(), headers=headers)
 
 
 @app.patch("/v1/tasks/{task_id}", response_model=TaskRead)
-def patch_task(task_id: int, request: TaskUpdate, db: Session = Depends(get_db)) -> TaskRead:
+def patch_task(
+    task_id: int,
+    request: TaskUpdate,
+    db: Session = Depends(get_db),
+    user_id: int | None = Depends(request_user_id),
+    idempotency_key: str | None = Header(default=None),
+) -> TaskRead | Response:
     try:
-        return task_service.update_task(db, task_id, request)
+        if idempotency_key is not None:
+            return _idempotent(
+                db,
+                idempotency_key,
+                user_id=user_id,
+                route=f"PATCH /v1/tasks/{task_id}",
+                body=request,
+                run=lambda: task_service.update_task(db, task_id, request, user_id=user_id),
+            )
+        return task_service.update_task(db, task_id, request, user_id=user_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
+@app.get("/v1/changes", response_model=ChangesResponse)
+def get_changes(
+    since: int = 0,
+    limit: int = 500,
+    db: Session = Depends(get_read_db),
+    user_id: int | None = Depends(request_user_id),
+) -> ChangesResponse:
+    return change_feed_service.get_changes(db, since=since, user_id=user_id, limit=limit)
+
+
+@app.websocket("/v1/ws")
+async def task_events(websocket: WebSocket, user_id: int | None = Depends(request_user_id)) -> None:
+    """
+    Push task changes as they are committed.
+
+    Subscribe after an initial `/v1/tasks` load; on `{"type": "resync"}` (this client fell
+    behind and events were dropped) catch up via `/v1/changes`.
+    """
+    await websocket.accept()
+    sub = hub.subscribe(version_service.user_scope(user_id))
+
+    async def _pump() -> None:
+        while True:
+            event = await sub.get()
+            await websocket.send_json(event)
+            metrics.WS_EVENTS.inc(outcome="sent")
+
+    async def _drain(cancel_scope: anyio.CancelScope) -> None:
+        # Clients don't send anything meaningful; reading is how a disconnect is noticed.
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+        cancel_scope.cancel()
+
+    try:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(_pump)
+            tg.start_soon(_drain, tg.cancel_scope)
+    finally:
+        hub.unsubscribe(sub)
+
+
 @app.post("/v1/prioritize", response_model=PrioritizeResponse)
-def prioritize(request: PrioritizeRequest, db: Session = Depends(get_db)) -> PrioritizeResponse:
+def prioritize(
+    request: PrioritizeRequest,
+    db: Session = Depends(get_read_db),
+    user_id: int | None = Depends(request_user_id),
+) -> PrioritizeResponse:
     as_of = request.as_of
     if as_of is None:
         from datetime import datetime, timezone
 
         as_of = datetime.now(tz=timezone.utc)
 
-    tasks = task_service.list_tasks(db)
+    tasks = task_service.list_tasks(db, user_id=user_id)
     if request.task_ids:
         wanted = set(request.task_ids)
         tasks = [t for t in tasks if t.id in wanted]
 
-    rows = db.execute(
-        select(TaskDependency.depends_on_id, func.count(TaskDependency.task_id)).group_by(TaskDependency.depends_on_id)
-    ).all()
-    unblocks = {int(dep_id): int(cnt) for dep_id, cnt in rows}
+    unblocks = task_service.unblock_counts(db, user_id=user_id)
+    contention = task_service.contention_minutes(db, tasks, user_id=user_id)
+    weights = priority_weights.weights_for(db, user_id)
 
-    results = prioritizer.prioritize(tasks, unblocks_by_task_id=unblocks, as_of=as_of)
+    results = prioritizer.prioritize(
+        tasks, unblocks_by_task_id=unblocks, as_of=as_of, contention_by_task_id=contention, weights=weights
+    )
     return PrioritizeResponse(as_of=as_of, results=results)
 
 
 @app.post("/v1/review_day", response_model=ReviewDayResponse)
-def review_day(request: ReviewDayRequest, db: Session = Depends(get_db)) -> ReviewDayResponse:
-    from datetime import date as _date
-
-    day = request.day or _date.today()
+def review_day(
+    request: ReviewDayRequest,
+    db: Session = Depends(get_db),
+    user_id: int | None = Depends(request_user_id),
+) -> ReviewDayResponse:
+    day = request.day or date.today()
     planned = float(request.planned_points or 0.0)
     completed = float(request.completed_points or 0.0)
     return day_score_service.upsert_day_score(
         db,
-        user_id=None,
+        user_id=user_id,
         day=day,
         planned_points=planned,
         completed_points=completed,
         notes=request.notes,
     )
 
+
+@app.get("/v1/day_scores", response_model=DayScoreAnalytics)
+def day_score_analytics(
+    start: date | None = None,
+    end: date | None = None,
+    streak_min_score: float = Query(default=day_score_service.STREAK_MIN_SCORE, ge=0.0, le=1.0),
+    db: Session = Depends(get_read_db),
+    user_id: int | None = Depends(request_user_id),
+) -> DayScoreAnalytics:
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if end < start or (end - start).days >= 366:
+        raise HTTPException(status_code=400, detail="end must not be before start and at most 365 days later.")
+    return day_score_service.analytics(db, user_id=user_id, start=start, end=end, streak_min_score=streak_min_score)
+
+
+@app.get("/v1/day_scores/rollups", response_model=list[DayScorePeriod])
+def day_score_rollups(
+    period: Literal["week", "month"] = "week",
+    start: date | None = None,
+    end: date | None = None,
+    limit: int = Query(default=520, ge=1, le=5000),
+    db: Session = Depends(get_read_db),
+    user_id: int | None = Depends(request_user_id),
+) -> list[DayScorePeriod]:
+    return day_score_service.rollups(db, user_id=user_id, period=period, start=start, end=end, limit=limit)
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
 from datetime import date, datetime
-from typing import Any, Literal
+from typing import Annotated, Any, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator, model_validator
+
+from backend.app.services import recurrence as _recurrence
+
+# Task ids start at 1; as a list item type it keeps `minimum: 1` in the tool schemas.
+TaskId = Annotated[int, Field(ge=1)]
 
 
 class Message(BaseModel):
@@ -50,11 +55,26 @@ class TaskBase(BaseModel):
     required_resources: list[str] = []
     required_people: list[str] = []
     tags: list[str] = []
-    depends_on_ids: list[int] = []
+    depends_on_ids: list[TaskId] = []
+
+    recurrence: str | None = Field(
+        default=None,
+        max_length=255,
+        description="Repeat rule, RRULE style: FREQ=DAILY|WEEKLY|MONTHLY|YEARLY[;INTERVAL=n][;BYDAY=MO,TH][;BYMONTHDAY=1,-1][;COUNT=n|UNTIL=YYYYMMDD].",
+    )
+
+    @field_validator("recurrence")
+    @classmethod
+    def _normalize_recurrence(cls, v: str | None) -> str | None:
+        return _recurrence.normalize(v) if v and v.strip() else None
 
 
 class TaskCreate(TaskBase):
-    pass
+    @model_validator(mode="after")
+    def _recurrence_needs_due(self) -> TaskCreate:
+        if self.recurrence and self.due_at is None:
+            raise ValueError("A recurring task needs due_at (its first occurrence).")
+        return self
 
 
 class TaskUpdate(BaseModel):
@@ -77,16 +97,60 @@ class TaskUpdate(BaseModel):
     required_resources: list[str] | None = None
     required_people: list[str] | None = None
     tags: list[str] | None = None
-    depends_on_ids: list[int] | None = None
+    depends_on_ids: list[TaskId] | None = None
+    # "" stops the task repeating.
+    recurrence: str | None = Field(default=None, max_length=255)
+
+    @field_validator("recurrence")
+    @classmethod
+    def _normalize_recurrence(cls, v: str | None) -> str | None:
+        return _recurrence.normalize(v) if v and v.strip() else v
 
 
 class TaskRead(TaskBase):
+    # Built straight from `db.models.Task` rows via `TaskRead.model_validate(task)`.
+    model_config = ConfigDict(from_attributes=True)
+
     id: int
     created_at: datetime
     updated_at: datetime
     completed_at: datetime | None = None
 
 
+# Built once at import; serializes whole task lists to JSON bytes in one pass.
+TaskReadList = TypeAdapter(list[TaskRead])
+
+
+class TaskSearchHit(BaseModel):
+    # Compact on purpose: the chat tool returns these to the model instead of whole tasks.
+    task_id: int
+    title: str
+    status: str
+    due_at: datetime | None = None
+    score: float
+    # Matching excerpt of the description, with matches in [brackets].
+    snippet: str | None = None
+
+
+class TaskOccurrenceRead(BaseModel):
+    task_id: int
+    title: str
+    due_at: datetime
+    # done: completed; current: the task row as it is now; missed: passed without completion.
+    state: Literal["done", "current", "missed", "upcoming"]
+    completed_at: datetime | None = None
+
+
+class LabelWorkload(BaseModel):
+    # Open work that needs one person or resource (see task_service.label_workload).
+    kind: Literal["person", "resource", "tag"]
+    value: str
+    open_tasks: int
+    open_minutes: int
+    overdue_tasks: int
+    next_due_at: datetime | None = None
+
+
 class PrioritizeRequest(BaseModel):
     task_ids: list[int] | None = None
     as_of: datetime | None = None
@@ -118,3 +182,59 @@ class ReviewDayResponse(BaseModel):
     score: float
     notes: str | None = None
 
+
+class DayScorePoint(BaseModel):
+    day: date
+    planned_points: float
+    completed_points: float
+    score: float
+    # Rolling windows end on `day` and cover that many calendar days; days without a
+    # score don't count. Ratios are completed / planned points (None if nothing planned).
+    avg_score_7d: float
+    avg_score_30d: float
+    avg_score_90d: float
+    completion_ratio_7d: float | None = None
+    completion_ratio_30d: float | None = None
+    completion_ratio_90d: float | None = None
+
+
+class DayScoreAnalytics(BaseModel):
+    start: date
+    end: date
+    days: list[DayScorePoint]
+    recorded_days: int
+    avg_score: float | None = None
+    completion_ratio: float | None = None
+    # Consecutive days scoring >= streak_min_score; the current streak ends on `end` or the day before.
+    streak_min_score: float
+    current_streak: int
+    longest_streak: int
+
+
+class DayScorePeriod(BaseModel):
+    period: Literal["week", "month"]
+    period_start: date
+    days: int
+    planned_points: float
+    completed_points: float
+    avg_score: float
+    completion_ratio: float | None = None
+
+
+class DependencyEdge(BaseModel):
+    task_id: int
+    depends_on_id: int
+
+
+class ChangesResponse(BaseModel):
+    # Pass back as `since` on the next call.
+    cursor: int
+    has_more: bool = False
+    # The cursor is older than the retained log; do a full `GET /v1/tasks` and restart from `cursor`.
+    reset_required: bool = False
+
+    tasks: list[TaskRead] = []
+    deleted_task_ids: list[int] = []
+    dependencies: list[DependencyEdge] = []
+    deleted_dependencies: list[DependencyEdge] = []
+    day_scores: list[ReviewDayResponse] = []
@@ -0,0 +1,285 @@
+"""
+Archival of finished tasks (cold storage).
+
+Done and canceled tasks finished more than `ARCHIVE_AFTER_DAYS` ago move from `tasks`
+to `archived_tasks` in batches, one transaction per batch: the hot table, its indexes,
+the task cache and every list/prioritize call only carry live work. Archived tasks stay
+readable through `include_archived` on task lists and through `search_archive`.
+
+A task is kept hot while an unfinished task depends on it (its `depends_on_ids` would
+change otherwise). Moves are reported to sync clients as task deletions.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from backend.app.core import metrics
+from backend.app.db.models import ArchivedTask, LabelKind, Task, TaskDependency, TaskLabel, TaskOccurrence
+from backend.app.schemas import TaskRead
+from backend.app.services import change_feed_service, search_service, task_cache, version_service
+
+
+logger = logging.getLogger(__name__)
+
+FINISHED = ("done", "canceled")
+
+
+def _search_text(task: TaskRead) -> str:
+    return " ".join([task.title, task.description or "", *task.tags]).lower()
+
+
+def _label_token(kind: LabelKind, key: str) -> str:
+    return f"|{kind.value}:{key}|"
+
+
+def _label_keys(task: Task) -> str:
+    # Neighbouring tokens share their "|", so "|tag:work|person:alice|" contains both.
+    return "".join(f"|{label.kind}:{label.key}" for label in task.labels) + "|" if task.labels else ""
+
+
+def archive_batch(db: Session, *, before: datetime, batch_size: int = 500) -> int:
+    """
+    Move up to `batch_size` tasks finished before `before` into the archive, in the
+    caller's transaction (caller commits). Returns how many were moved.
+    """
+    open_dependents = (
+        select(TaskDependency.depends_on_id)
+        .join(Task, Task.id == TaskDependency.task_id)
+        .where(Task.status.not_in(FINISHED))
+    )
+    # SQLite may hand the highest rowid out again once it's deleted; keep that row so ids stay unique.
+    newest = select(func.max(Task.id)).scalar_subquery()
+    stmt = (
+        select(Task)
+        .options(selectinload(Task.depends_on), selectinload(Task.labels))
+        .where(
+            Task.status.in_(FINISHED),
+            func.coalesce(Task.completed_at, Task.updated_at) < before,
+            Task.id.not_in(open_dependents),
+            Task.id < newest,
+        )
+        .order_by(Task.id)
+        .limit(batch_size)
+    )
+    tasks = db.execute(stmt).scalars().all()
+    if not tasks:
+        return 0
+
+    ids = [t.id for t in tasks]
+    owner = {t.id: t.user_id for t in tasks}
+    rows = []
+    for t in tasks:
+        read = TaskRead.model_validate(t)
+        rows.append(
+            {
+                "id": t.id,
+                "user_id": t.user_id,
+                "status": t.status,
+                "created_at": t.created_at,
+                "completed_at": t.completed_at,
+                "search_text": _search_text(read),
+                "label_keys": _label_keys(t),
+                "payload": read.model_dump(mode="json"),
+            }
+        )
+    db.execute(insert(ArchivedTask), rows)
+
+    edge_filter = or_(TaskDependency.task_id.in_(ids), TaskDependency.depends_on_id.in_(ids))
+    edges = db.execute(select(TaskDependency.task_id, TaskDependency.depends_on_id).where(edge_filter)).all()
+    search_service.remove_tasks(db, ids)
+    # The loaded rows are discarded with the batch: skip matching them in the identity map.
+    no_sync = {"synchronize_session": False}
+    db.execute(delete(TaskDependency).where(edge_filter), execution_options=no_sync)
+    db.execute(delete(TaskLabel).where(TaskLabel.task_id.in_(ids)), execution_options=no_sync)
+    db.execute(delete(TaskOccurrence).where(TaskOccurrence.task_id.in_(ids)), execution_options=no_sync)
+    db.execute(delete(Task).where(Task.id.in_(ids)), execution_options=no_sync)
+
+    for task_id, dep_id in edges:
+        change_feed_service.record(
+            db,
+            user_id=owner.get(task_id, owner.get(dep_id)),
+            entity=change_feed_service.ENTITY_DEPENDENCY,
+            entity_id=change_feed_service.dependency_key(task_id, dep_id),
+            op=change_feed_service.OP_DELETE,
+        )
+    for t in tasks:
+        change_feed_service.record(
+            db, user_id=t.user_id, entity=change_feed_service.ENTITY_TASK, entity_id=t.id, op=change_feed_service.OP_DELETE
+        )
+    for user_id in {t.user_id for t in tasks}:
+        task_cache.invalidate(db, user_id=user_id)
+        version_service.bump(db, user_id=user_id)
+    return len(tasks)
+
+
+def archive_finished(
+    session: Callable[[], AbstractContextManager[Session]],
+    *,
+    older_than_days: int,
+    batch_size: int = 500,
+    max_batches: int | None = None,
+    pause_s: float = 0.0,
+    stop: threading.Event | None = None,
+) -> int:
+    """Archive everything due, one committed batch at a time; returns tasks moved."""
+    before = datetime.now(tz=timezone.utc) - timedelta(days=older_than_days)
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        start = time.perf_counter()
+        with session() as db:
+            try:
+                moved = archive_batch(db, before=before, batch_size=batch_size)
+                db.commit()
+            except IntegrityError:
+                # Another worker archived the same rows first; leave the rest to the next run.
+                db.rollback()
+                logger.info("archive batch raced another worker")
+                moved = 0
+        metrics.ARCHIVE_BATCH_SECONDS.observe(time.perf_counter() - start)
+        batches += 1
+        if moved > 0:
+            metrics.ARCHIVED_TASKS.inc(moved)
+            total += moved
+        if moved < batch_size:
+            break
+        if stop is not None and stop.wait(pause_s):
+            break
+        if stop is None and pause_s:
+            time.sleep(pause_s)
+    return total
+
+
+def prune_change_log(session: Callable[[], AbstractContextManager[Session]], *, older_than_days: int) -> int:
+    """Drop `/v1/changes` entries older than `older_than_days`; returns entries deleted."""
+    with session() as db:
+        return change_feed_service.prune(db, before=datetime.now(tz=timezone.utc) - timedelta(days=older_than_days))
+
+
+class Archiver:
+    """
+    Background thread that runs `archive_finished` on every shard every `interval_s`,
+    then prunes the change log (`change_log_retention_days`; 0 keeps it). Start one
+    per deployment: under gunicorn it runs in the master (`main.start_jobs_in_master`).
+    """
+
+    def __init__(
+        self,
+        sessions: Callable[[], dict[str, Callable[[], AbstractContextManager[Session]]]],
+        *,
+        older_than_days: int,
+        interval_s: float,
+        batch_size: int,
+        change_log_retention_days: int = 0,
+        pause_s: float = 0.05,
+    ) -> None:
+        self.sessions = sessions
+        self.older_than_days = older_than_days
+        self.change_log_retention_days = change_log_retention_days
+        self.interval_s = interval_s
+        self.batch_size = batch_size
+        self.pause_s = pause_s
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval_s <= 0:
+            return
+        if self.older_than_days <= 0 and self.change_log_retention_days <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="archiver", daemon=True)
+        self._thread.start()
+
+    def run_once(self) -> dict[str, int]:
+        moved: dict[str, int] = {}
+        for name, session in self.sessions().items():
+            if self.older_than_days > 0:
+                moved[name] = archive_finished(
+                    session,
+                    older_than_days=self.older_than_days,
+                    batch_size=self.batch_size,
+                    pause_s=self.pause_s,
+                    stop=self._stop,
+                )
+            if self.change_log_retention_days > 0:
+                pruned = prune_change_log(session, older_than_days=self.change_log_retention_days)
+                if pruned:
+                    logger.info("pruned %d change log entries on %s", pruned, name)
+        return moved
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                moved = self.run_once()
+                if any(moved.values()):
+                    logger.info("archived %s", moved)
+            except Exception:
+                logger.exception("archival run failed")
+            self._stop.wait(self.interval_s)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+
+def _to_read(row: ArchivedTask) -> TaskRead:
+    return TaskRead.model_validate(row.payload)
+
+
+def _of_user(column, user_id: int | None):
+    # Like `task_service.list_tasks`: None is tasks without a user, not every user's.
+    return column.is_(None) if user_id is None else column == user_id
+
+
+def list_archived(
+    db: Session,
+    *,
+    user_id: int | None = None,
+    status: str | None = None,
+    limit: int = 200,
+    labels: list[tuple[LabelKind, str]] = (),  # type: ignore[assignment]
+) -> list[TaskRead]:
+    """Archived tasks, newest first (same order as `task_service.list_tasks`); `labels` are (kind, key) pairs."""
+    stmt = select(ArchivedTask).where(_of_user(ArchivedTask.user_id, user_id))
+    stmt = stmt.order_by(ArchivedTask.created_at.desc()).limit(limit)
+    if status is not None:
+        stmt = stmt.where(ArchivedTask.status == status)
+    for kind, key in labels:
+        stmt = stmt.where(ArchivedTask.label_keys.contains(_label_token(kind, key), autoescape=True))
+    return [_to_read(r) for r in db.execute(stmt).scalars()]
+
+
+def search_archive(db: Session, query: str, *, user_id: int | None = None, limit: int = 20) -> list[TaskRead]:
+    """
+    Archived tasks whose title, description or tags contain every word of `query`,
+    most recently finished first. A substring scan: the archive is cold and scoped per user.
+    """
+    terms = query.lower().split()[:16]
+    if not terms:
+        return []
+    stmt = (
+        select(ArchivedTask)
+        .order_by(func.coalesce(ArchivedTask.completed_at, ArchivedTask.created_at).desc())
+        .limit(limit)
+    )
+    for term in terms:
+        stmt = stmt.where(ArchivedTask.search_text.contains(term, autoescape=True))
+    stmt = stmt.where(_of_user(ArchivedTask.user_id, user_id))
+    return [_to_read(r) for r in db.execute(stmt).scalars()]
+
+
+def remove_user(db: Session, user_id: int) -> None:
+    db.execute(delete(ArchivedTask).where(ArchivedTask.user_id == user_id))
@@ -0,0 +1,159 @@
+"""
+Append-only change log behind `GET /v1/changes`.
+
+The cursor is `change_log.id`, so ids must become visible in order: a client that has
+read id N+1 never looks at N again. On Postgres, a transaction can take a higher id
+and commit before a lower one; `record` takes a transaction-scoped advisory lock
+on the user before their first append, so one user's appends (and commits) happen
+one transaction at a time. Clients only read their own user's entries, so writes for
+different users don't wait on each other. SQLite already allows a single writer.
+
+`prune` (run by the archiver, see `CHANGE_LOG_RETENTION_DAYS`) drops old entries;
+a client whose cursor is below what's left gets `reset_required`.
+"""
+
+from __future__ import annotations
+
+import zlib
+from datetime import datetime
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session, selectinload
+
+from backend.app.db.models import ChangeLogEntry, DayScore, Task
+from backend.app.schemas import ChangesResponse, DependencyEdge, ReviewDayResponse, TaskRead
+
+
+ENTITY_TASK = "task"
+ENTITY_DEPENDENCY = "dependency"
+ENTITY_DAY_SCORE = "day_score"
+
+OP_UPSERT = "upsert"
+OP_DELETE = "delete"
+
+MAX_BATCH = 5000
+
+# First key of the two-int advisory lock (int4, so kept below 2**31); the second is the user.
+_APPEND_LOCK = zlib.crc32(b"change_log") & 0x7FFFFFFF
+_LOCKED_KEY = "change_log_locked"
+
+
+def lock_keys(user_id: int | None) -> tuple[int, int]:
+    """The `pg_advisory_xact_lock(int, int)` keys ordering `user_id`'s appends (0: no user)."""
+    return _APPEND_LOCK, 0 if user_id is None else user_id
+
+
+def _serialize_appends(db: Session, user_id: int | None) -> None:
+    # Held until commit/rollback; taken once per transaction and user, before any id is drawn.
+    conn = db.connection()
+    txn = db.get_transaction()
+    locked = db.info.get(_LOCKED_KEY)
+    if locked is None or locked[0] is not txn:
+        locked = db.info[_LOCKED_KEY] = (txn, set())
+    if user_id in locked[1]:
+        return
+    if conn.dialect.name == "postgresql":
+        key, user_key = lock_keys(user_id)
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key, :user_key)"), {"key": key, "user_key": user_key})
+    locked[1].add(user_id)
+
+
+def record(db: Session, *, user_id: int | None, entity: str, entity_id: int | str, op: str = OP_UPSERT) -> None:
+    """Append a change; call inside the writing transaction (caller commits)."""
+    _serialize_appends(db, user_id)
+    db.add(ChangeLogEntry(user_id=user_id, entity=entity, entity_id=str(entity_id), op=op))
+
+
+def dependency_key(task_id: int, depends_on_id: int) -> str:
+    return f"{task_id}:{depends_on_id}"
+
+
+def latest_cursor(db: Session) -> int:
+    return int(db.execute(select(func.max(ChangeLogEntry.id))).scalar() or 0)
+
+
+def get_changes(db: Session, *, since: int = 0, user_id: int | None = None, limit: int = 500) -> ChangesResponse:
+    """
+    Return what changed after cursor `since`, coalesced to the latest state per entity.
+
+    Cost is O(changes in the batch): one log range scan plus one query per entity type.
+    """
+    limit = max(1, min(limit, MAX_BATCH))
+
+    # Everything below the oldest entry left was pruned (ids are never reused), so a
+    # cursor short of it, `since=0` included, has missed changes.
+    oldest = db.execute(select(func.min(ChangeLogEntry.id))).scalar()
+    if oldest is not None and since < int(oldest) - 1:
+        return ChangesResponse(cursor=latest_cursor(db), reset_required=True)
+
+    owner = ChangeLogEntry.user_id.is_(None) if user_id is None else ChangeLogEntry.user_id == user_id
+    stmt = select(ChangeLogEntry).where(ChangeLogEntry.id > since, owner).order_by(ChangeLogEntry.id).limit(limit + 1)
+    entries = list(db.execute(stmt).scalars().all())
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    if not entries:
+        return ChangesResponse(cursor=since)
+
+    # Later entries win: an entity created then deleted within the batch is reported deleted only.
+    latest: dict[tuple[str, str], str] = {}
+    for e in entries:
+        latest[(e.entity, e.entity_id)] = e.op
+
+    upserted_tasks: list[int] = []
+    deleted_task_ids: list[int] = []
+    dependencies: list[DependencyEdge] = []
+    deleted_dependencies: list[DependencyEdge] = []
+    day_score_ids: list[int] = []
+
+    for (entity, entity_id), op in latest.items():
+        if entity == ENTITY_TASK:
+            (upserted_tasks if op == OP_UPSERT else deleted_task_ids).append(int(entity_id))
+        elif entity == ENTITY_DEPENDENCY:
+            task_id, _, depends_on_id = entity_id.partition(":")
+            edge = DependencyEdge(task_id=int(task_id), depends_on_id=int(depends_on_id))
+            (dependencies if op == OP_UPSERT else deleted_dependencies).append(edge)
+        elif entity == ENTITY_DAY_SCORE and op == OP_UPSERT:
+            day_score_ids.append(int(entity_id))
+
+    tasks: list[TaskRead] = []
+    if upserted_tasks:
+        rows = db.execute(
+            select(Task).options(selectinload(Task.depends_on)).where(Task.id.in_(upserted_tasks))
+        ).scalars().all()
+        tasks = [TaskRead.model_validate(t) for t in rows]
+        # Rows gone since the entry was written are reported as deletions.
+        found = {t.id for t in tasks}
+        deleted_task_ids.extend(i for i in upserted_tasks if i not in found)
+
+    day_scores: list[ReviewDayResponse] = []
+    if day_score_ids:
+        rows = db.execute(select(DayScore).where(DayScore.id.in_(day_score_ids)).order_by(DayScore.day)).scalars().all()
+        day_scores = [
+            ReviewDayResponse(
+                day=r.day,
+                planned_points=r.planned_points,
+                completed_points=r.completed_points,
+                score=r.score,
+                notes=r.notes,
+            )
+            for r in rows
+        ]
+
+    return ChangesResponse(
+        cursor=entries[-1].id,
+        has_more=has_more,
+        tasks=tasks,
+        deleted_task_ids=sorted(deleted_task_ids),
+        dependencies=dependencies,
+        deleted_dependencies=deleted_dependencies,
+        day_scores=day_scores,
+    )
+
+
+def prune(db: Session, *, before: datetime) -> int:
+    """Delete log entries older than `before`; clients behind that point get `reset_required`."""
+    # Always keep the newest entry so the cursor watermark survives.
+    newest = latest_cursor(db)
+    res = db.execute(delete(ChangeLogEntry).where(ChangeLogEntry.created_at < before, ChangeLogEntry.id < newest))
+    db.commit()
+    return int(res.rowcount or 0)
@@ -0,0 +1,381 @@
+"""
+Learned completion chance: logistic regression over task features, trained offline.
+
+`backend.scripts.train_completion_model` extracts history (live and archived tasks)
+into columnar arrays, fits the model with NumPy and writes its coefficients as JSON
+to `COMPLETION_MODEL_PATH`. Serving needs no NumPy: standardization is folded into
+the coefficients at save time, so a prediction is one dot product per task. Without
+a model file (or with one for a different feature set) the prioritizer keeps using
+its heuristic.
+
+Label: a task counts as completed when it was done by its due date, or within
+`HORIZON_DAYS` of creation if it had none. Features are taken as of creation, the
+same way they are taken as of "now" when serving. `completed_at - created_at` only
+decides the label; as an input it would leak the outcome.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+import time
+from array import array
+from collections.abc import Iterable, Iterator
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app.db.models import ArchivedTask, LabelKind, Task, TaskDependency, TaskLabel
+from backend.app.schemas import TaskRead
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+HORIZON_DAYS = 7
+
+FEATURES = (
+    "log_effort_hours",
+    "effort_missing",
+    "pert_spread",
+    "due_days",
+    "due_missing",
+    "overdue",
+    "due_within_day",
+    "depends_on",
+    "unblocks",
+    "tags",
+    "people",
+    "resources",
+    "urgency",
+    "importance",
+)
+
+
+def _to_utc(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def task_features(task: TaskRead, *, as_of: datetime, unblocks_count: int = 0) -> list[float]:
+    """One row in `FEATURES` order; the same function feeds training and serving."""
+    effort = task.effort_minutes or task.most_likely_minutes
+    spread = 0.0
+    if task.optimistic_minutes is not None and task.pessimistic_minutes is not None and task.most_likely_minutes:
+        spread = min((task.pessimistic_minutes - task.optimistic_minutes) / task.most_likely_minutes, 10.0)
+    days_left = 0.0
+    if task.due_at is not None:
+        days_left = (_to_utc(task.due_at) - _to_utc(as_of)).total_seconds() / 86400.0
+    return [
+        math.log1p(effort / 60.0) if effort else 0.0,
+        0.0 if effort else 1.0,
+        spread,
+        max(-30.0, min(days_left, 90.0)),
+        1.0 if task.due_at is None else 0.0,
+        1.0 if task.due_at is not None and days_left < 0 else 0.0,
+        1.0 if task.due_at is not None and 0 <= days_left < 1 else 0.0,
+        float(min(len(task.depends_on_ids), 10)),
+        float(min(unblocks_count, 10)),
+        float(len(task.tags)),
+        float(len(task.required_people)),
+        float(len(task.required_resources)),
+        (task.urgency if task.urgency is not None else 5) / 10.0,
+        (task.importance if task.importance is not None else 5) / 10.0,
+    ]
+
+
+def _sigmoid(z: float) -> float:
+    if z < -30.0:
+        return 0.0
+    if z > 30.0:
+        return 1.0
+    return 1.0 / (1.0 + math.exp(-z))
+
+
+@dataclass(frozen=True)
+class CompletionModel:
+    # Coefficients on raw (unscaled) features, in `features` order.
+    coef: tuple[float, ...]
+    intercept: float
+    features: tuple[str, ...] = FEATURES
+    trained_at: str | None = None
+    samples: int = 0
+    metrics: dict[str, float] = field(default_factory=dict)
+    version: int = FORMAT_VERSION
+
+    def predict_row(self, row: list[float]) -> float:
+        return _sigmoid(self.intercept + sum(w * x for w, x in zip(self.coef, row)))
+
+    def predict(self, tasks: Iterable[TaskRead], *, as_of: datetime, unblocks_by_task_id: dict[int, int] | None = None) -> list[float]:
+        unblocks = unblocks_by_task_id or {}
+        return [self.predict_row(task_features(t, as_of=as_of, unblocks_count=unblocks.get(t.id, 0))) for t in tasks]
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), indent=2, sort_keys=True)
+
+    @classmethod
+    def from_json(cls, text: str) -> CompletionModel:
+        data = json.loads(text)
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported model format {data.get('version')!r}")
+        model = cls(
+            coef=tuple(float(c) for c in data["coef"]),
+            intercept=float(data["intercept"]),
+            features=tuple(data["features"]),
+            trained_at=data.get("trained_at"),
+            samples=int(data.get("samples", 0)),
+            metrics={k: float(v) for k, v in (data.get("metrics") or {}).items()},
+        )
+        if len(model.coef) != len(model.features):
+            raise ValueError("coef and features differ in length")
+        return model
+
+
+# --- serving ---------------------------------------------------------------------
+
+# How often `active()` looks at the model file for changes.
+RELOAD_CHECK_SECONDS = 1.0
+
+_lock = threading.Lock()
+# (path, file mtime, model, monotonic time of the last check)
+_loaded: tuple[str, float, CompletionModel | None, float] | None = None
+
+
+def load(path: str) -> CompletionModel | None:
+    """The model at `path`, or None when missing, unreadable or built for other features."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            model = CompletionModel.from_json(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        logger.warning("ignoring completion model %s: %s", path, exc)
+        return None
+    if model.features != FEATURES:
+        logger.warning("ignoring completion model %s: trained on different features", path)
+        return None
+    return model
+
+
+def active() -> CompletionModel | None:
+    """The configured model, reloaded within a second of its file changing; None = use the heuristic."""
+    global _loaded
+    path = settings.completion_model_path
+    if not path:
+        return None
+    now = time.monotonic()
+    cached = _loaded
+    if cached is not None and cached[0] == path and now - cached[3] < RELOAD_CHECK_SECONDS:
+        return cached[2]
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        mtime = -1.0
+    if cached is not None and cached[0] == path and cached[1] == mtime:
+        _loaded = (path, mtime, cached[2], now)
+        return cached[2]
+    with _lock:
+        model = load(path) if mtime >= 0 else None
+        if model is not None:
+            logger.info("loaded completion model %s (%d samples)", path, model.samples)
+        _loaded = (path, mtime, model, now)
+    return model
+
+
+# --- training --------------------------------------------------------------------
+
+
+def label(task: TaskRead, *, now: datetime) -> float | None:
+    """1.0 done in time, 0.0 done late / canceled / missed, None while the outcome is open."""
+    created = _to_utc(task.created_at)
+    deadline = _to_utc(task.due_at) if task.due_at is not None else created + timedelta(days=HORIZON_DAYS)
+    if task.status == "done":
+        completed = _to_utc(task.completed_at or task.updated_at)
+        return 1.0 if completed <= deadline else 0.0
+    if task.status == "canceled":
+        return 0.0
+    return 0.0 if deadline < now else None
+
+
+_LABEL_FIELDS = {LabelKind.tag.value: "tags", LabelKind.person.value: "required_people", LabelKind.resource.value: "required_resources"}
+
+
+def _history(db: Session, *, user_id: int | None, batch_size: int) -> Iterator[TaskRead]:
+    # Plain rows in keyset batches: loading ORM objects (and `depends_on` as whole tasks) costs 3x more.
+    tasks = Task.__table__
+    last_id = 0
+    while True:
+        stmt = select(tasks).where(tasks.c.id > last_id).order_by(tasks.c.id).limit(batch_size)
+        if user_id is not None:
+            stmt = stmt.where(tasks.c.user_id == user_id)
+        batch = {
+            row["id"]: {**row, "depends_on_ids": [], "tags": [], "required_people": [], "required_resources": []}
+            for row in db.execute(stmt).mappings()
+        }
+        if not batch:
+            break
+        ids = list(batch)
+        for task_id, kind, value in db.execute(
+            select(TaskLabel.task_id, TaskLabel.kind, TaskLabel.value)
+            .where(TaskLabel.task_id.in_(ids))
+            .order_by(TaskLabel.task_id, TaskLabel.position)
+        ):
+            batch[task_id][_LABEL_FIELDS[kind]].append(value)
+        for task_id, dep_id in db.execute(
+            select(TaskDependency.task_id, TaskDependency.depends_on_id).where(TaskDependency.task_id.in_(ids))
+        ):
+            batch[task_id]["depends_on_ids"].append(dep_id)
+        for row in batch.values():
+            yield TaskRead.model_validate(row)
+        last_id = ids[-1]
+    stmt = select(ArchivedTask.payload).order_by(ArchivedTask.id)
+    if user_id is not None:
+        stmt = stmt.where(ArchivedTask.user_id == user_id)
+    for payload in db.execute(stmt.execution_options(yield_per=batch_size)).scalars():
+        yield TaskRead.model_validate(payload)
+
+
+@dataclass
+class TrainingSet:
+    """Columnar training data: `columns[i]` holds feature `FEATURES[i]` for every sample."""
+
+    columns: list[array] = field(default_factory=lambda: [array("d") for _ in FEATURES])
+    labels: array = field(default_factory=lambda: array("d"))
+    task_ids: array = field(default_factory=lambda: array("q"))
+    # The heuristic's estimate for the same samples, to compare against.
+    baseline: array = field(default_factory=lambda: array("d"))
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+
+def extract(db: Session, *, now: datetime | None = None, user_id: int | None = None, batch_size: int = 2000) -> TrainingSet:
+    """Labelled samples from live and archived tasks, features as of each task's creation."""
+    from backend.app.services.prioritizer import heuristic_completion_chance
+
+    now = now or datetime.now(tz=timezone.utc)
+    tasks = list(_history(db, user_id=user_id, batch_size=batch_size))
+    unblocks: dict[int, int] = {}
+    for t in tasks:
+        for dep in t.depends_on_ids:
+            unblocks[dep] = unblocks.get(dep, 0) + 1
+
+    data = TrainingSet()
+    for t in tasks:
+        y = label(t, now=now)
+        if y is None:
+            continue
+        as_of = t.created_at
+        for column, value in zip(data.columns, task_features(t, as_of=as_of, unblocks_count=unblocks.get(t.id, 0))):
+            column.append(value)
+        data.labels.append(y)
+        data.task_ids.append(t.id)
+        # As an open task at creation time; done/canceled short-circuit otherwise.
+        data.baseline.append(heuristic_completion_chance(t.model_copy(update={"status": "planned"}), as_of=as_of))
+    return data
+
+
+def _auc(y: np.ndarray, p: np.ndarray) -> float:
+    import numpy as np
+
+    positives = int(y.sum())
+    negatives = len(y) - positives
+    if positives == 0 or negatives == 0:
+        return float("nan")
+    order = np.argsort(p, kind="mergesort")
+    ranks = np.empty(len(p))
+    ranks[order] = np.arange(1, len(p) + 1)
+    # Average ranks over ties.
+    sorted_p = p[order]
+    _, first, counts = np.unique(sorted_p, return_index=True, return_counts=True)
+    for start, count in zip(first, counts):
+        if count > 1:
+            ranks[order[start : start + count]] = start + (count + 1) / 2.0
+    return float((ranks[y == 1].sum() - positives * (positives + 1) / 2.0) / (positives * negatives))
+
+
+def evaluate(y: np.ndarray, p: np.ndarray) -> dict[str, float]:
+    import numpy as np
+
+    clipped = np.clip(p, 1e-6, 1 - 1e-6)
+    return {
+        "log_loss": float(-np.mean(y * np.log(clipped) + (1 - y) * np.log(1 - clipped))),
+        "brier": float(np.mean((p - y) ** 2)),
+        "auc": _auc(y, p),
+    }
+
+
+def fit(data: TrainingSet, *, l2: float = 1.0, max_iter: int = 50, holdout: float = 0.2, seed: int = 0) -> CompletionModel:
+    """
+    L2-regularized logistic regression by Newton's method (14 features: a handful of
+    iterations). `holdout` of the samples is kept out of the fit and scored in `metrics`,
+    next to the heuristic on the same samples; the returned model is refit on everything.
+    """
+    import numpy as np
+
+    if len(data) < 2 * len(FEATURES):
+        raise ValueError(f"need at least {2 * len(FEATURES)} labelled tasks, have {len(data)}")
+    X = np.column_stack([np.frombuffer(c, dtype=np.float64) for c in data.columns])
+    y = np.frombuffer(data.labels, dtype=np.float64)
+    baseline = np.frombuffer(data.baseline, dtype=np.float64)
+
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    Z = np.column_stack([np.ones(len(X)), (X - mean) / scale])
+
+    def newton(rows: np.ndarray) -> np.ndarray:
+        A, b = Z[rows], y[rows]
+        w = np.zeros(A.shape[1])
+        penalty = np.full(A.shape[1], l2)
+        penalty[0] = 0.0  # intercept
+        for _ in range(max_iter):
+            p = 1.0 / (1.0 + np.exp(-np.clip(A @ w, -30, 30)))
+            grad = A.T @ (p - b) + penalty * w
+            hess = (A * (p * (1 - p))[:, None]).T @ A + np.diag(penalty)
+            step = np.linalg.solve(hess, grad)
+            w -= step
+            if np.max(np.abs(step)) < 1e-8:
+                break
+        return w
+
+    rng = np.random.default_rng(seed)
+    test = rng.random(len(y)) < holdout
+    metrics: dict[str, float] = {}
+    if test.any() and (~test).any():
+        w = newton(np.flatnonzero(~test))
+        p_test = 1.0 / (1.0 + np.exp(-np.clip(Z[test] @ w, -30, 30)))
+        metrics.update({f"holdout_{k}": v for k, v in evaluate(y[test], p_test).items()})
+        metrics.update({f"heuristic_{k}": v for k, v in evaluate(y[test], baseline[test]).items()})
+        metrics["holdout_samples"] = float(test.sum())
+    metrics["positive_rate"] = float(y.mean())
+
+    w = newton(np.arange(len(y)))
+    coef = w[1:] / scale
+    intercept = float(w[0] - np.sum(w[1:] * mean / scale))
+    return CompletionModel(
+        coef=tuple(float(c) for c in coef),
+        intercept=intercept,
+        trained_at=datetime.now(tz=timezone.utc).isoformat(timespec="seconds"),
+        samples=len(y),
+        metrics=metrics,
+    )
+
+
+def save(model: CompletionModel, path: str) -> None:
+    """Write atomically, so serving workers never read a half-written file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(model.to_json())
+    os.replace(tmp, path)
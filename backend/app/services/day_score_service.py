@@ -1,12 +1,29 @@
+"""
+Daily scores (planned vs completed points) and the analytics read back from them.
+
+`analytics` returns each day with 7/30/90-day rolling averages and completion ratios,
+computed by SQL window functions on Postgres and by one prefix-sum pass in Python on
+SQLite (faster there), plus streaks. `day_score_rollups` keeps weekly and monthly totals
+current on every write, so `rollups` over years of history reads one row per period.
+"""
+
 from __future__ import annotations
 
-from datetime import date
+from collections.abc import Iterable
+from datetime import date, timedelta
+from itertools import accumulate
 
-from sqlalchemy import select
+from sqlalchemy import case, delete, func, insert, literal_column, select
 from sqlalchemy.orm import Session
 
-from backend.app.db.models import DayScore
-from backend.app.schemas import ReviewDayResponse
+from backend.app.db.models import ROLLUP_KEY, DayScore, DayScoreRollup
+from backend.app.schemas import DayScoreAnalytics, DayScorePeriod, DayScorePoint, ReviewDayResponse
+from backend.app.services import change_feed_service
+
+
+WINDOWS = (7, 30, 90)
+PERIODS = ("week", "month")
+STREAK_MIN_SCORE = 0.5
 
 
 def upsert_day_score(
@@ -43,6 +60,11 @@ def upsert_day_score(
         existing.notes = notes
         db.add(existing)
 
+    db.flush()
+    change_feed_service.record(
+        db, user_id=user_id, entity=change_feed_service.ENTITY_DAY_SCORE, entity_id=existing.id
+    )
+    _refresh_rollups(db, user_id=user_id, day=day)
     db.commit()
     db.refresh(existing)
 
@@ -54,3 +76,301 @@ def upsert_day_score(
         notes=existing.notes,
     )
 
+
+
+def _of_user(column, user_id: int | None):
+    # Reviews written without a user (POST /v1/review_day) are their own series.
+    return column.is_(None) if user_id is None else column == user_id
+
+
+# --- rollups ---------------------------------------------------------------------
+
+
+def period_start(period: str, day: date) -> date:
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def _period_end(period: str, start: date) -> date:
+    if period == "week":
+        return start + timedelta(days=7)
+    return (start + timedelta(days=31)).replace(day=1)
+
+
+def _refresh_rollups(db: Session, *, user_id: int | None, day: date) -> None:
+    """Recompute the week and month containing `day` from their day rows (two statements for both)."""
+    bounds = {period: (period_start(period, day), _period_end(period, period_start(period, day))) for period in PERIODS}
+    columns = []
+    for start, end in bounds.values():
+        in_period = DayScore.day.between(start, end - timedelta(days=1))
+        columns += [
+            func.count(case((in_period, 1))),
+            *(
+                func.coalesce(func.sum(case((in_period, col))), 0.0)
+                for col in (DayScore.planned_points, DayScore.completed_points, DayScore.score)
+            ),
+        ]
+    totals = db.execute(
+        select(*columns).where(
+            _of_user(DayScore.user_id, user_id),
+            DayScore.day >= min(start for start, _ in bounds.values()),
+            DayScore.day < max(end for _, end in bounds.values()),
+        )
+    ).one()
+    rows = [
+        {
+            "user_id": user_id,
+            "period": period,
+            "period_start": start,
+            "days": totals[4 * i],
+            "planned_points": float(totals[4 * i + 1]),
+            "completed_points": float(totals[4 * i + 2]),
+            "score_sum": float(totals[4 * i + 3]),
+        }
+        for i, (period, (start, _)) in enumerate(bounds.items())
+    ]
+    _upsert_rollups(db, rows)
+
+
+def _upsert_rollups(db: Session, rows: list[dict]) -> None:
+    # An upsert on ROLLUP_KEY, so concurrent reviews (and reviews without a user) can't
+    # leave two rows for one period.
+    dialect = db.get_bind().dialect.name
+    if dialect in {"sqlite", "postgresql"}:
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+
+        stmt = upsert(DayScoreRollup).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(ROLLUP_KEY),
+            set_={name: stmt.excluded[name] for name in ("days", "planned_points", "completed_points", "score_sum")},
+        )
+        db.execute(stmt)
+        return
+
+    for row in rows:
+        rollup = db.execute(
+            select(DayScoreRollup).where(
+                _of_user(DayScoreRollup.user_id, row["user_id"]),
+                DayScoreRollup.period == row["period"],
+                DayScoreRollup.period_start == row["period_start"],
+            )
+        ).scalar_one_or_none()
+        if rollup is None:
+            db.add(DayScoreRollup(**row))
+        else:
+            for name, value in row.items():
+                setattr(rollup, name, value)
+    db.flush()
+
+
+def rebuild_rollups(db: Session, *, user_ids: Iterable[int | None] | None = None) -> int:
+    """
+    Re-derive rollups from `day_scores` for `user_ids` (default: everyone), e.g. after
+    bulk inserts that bypass `upsert_day_score`. Caller commits; returns rows written.
+    """
+    scores = select(DayScore.user_id, DayScore.day, DayScore.planned_points, DayScore.completed_points, DayScore.score)
+    clear = delete(DayScoreRollup)
+    if user_ids is not None:
+        users = list(user_ids)
+        if not users:
+            return 0
+        ids = [u for u in users if u is not None]
+        scores_filter = DayScore.user_id.in_(ids)
+        rollup_filter = DayScoreRollup.user_id.in_(ids)
+        if None in users:
+            scores_filter = scores_filter | DayScore.user_id.is_(None)
+            rollup_filter = rollup_filter | DayScoreRollup.user_id.is_(None)
+        scores = scores.where(scores_filter)
+        clear = clear.where(rollup_filter)
+
+    totals: dict[tuple[int | None, str, date], list[float]] = {}
+    for user_id, day, planned, completed, score in db.execute(scores):
+        for period in PERIODS:
+            acc = totals.setdefault((user_id, period, period_start(period, day)), [0, 0.0, 0.0, 0.0])
+            acc[0] += 1
+            acc[1] += planned
+            acc[2] += completed
+            acc[3] += score
+    db.execute(clear)
+    rows = [
+        {
+            "user_id": user_id,
+            "period": period,
+            "period_start": start,
+            "days": int(acc[0]),
+            "planned_points": acc[1],
+            "completed_points": acc[2],
+            "score_sum": acc[3],
+        }
+        for (user_id, period, start), acc in totals.items()
+    ]
+    for i in range(0, len(rows), 1000):
+        db.execute(insert(DayScoreRollup), rows[i : i + 1000])
+    return len(rows)
+
+
+def rollups(
+    db: Session,
+    *,
+    user_id: int | None,
+    period: str,
+    start: date | None = None,
+    end: date | None = None,
+    limit: int = 520,
+) -> list[DayScorePeriod]:
+    """Weekly/monthly totals, oldest first, for periods overlapping [start, end]."""
+    stmt = (
+        select(DayScoreRollup)
+        .where(_of_user(DayScoreRollup.user_id, user_id), DayScoreRollup.period == period, DayScoreRollup.days > 0)
+        .order_by(DayScoreRollup.period_start)
+        .limit(limit)
+    )
+    if start is not None:
+        stmt = stmt.where(DayScoreRollup.period_start >= period_start(period, start))
+    if end is not None:
+        stmt = stmt.where(DayScoreRollup.period_start <= end)
+    return [
+        DayScorePeriod(
+            period=r.period,
+            period_start=r.period_start,
+            days=r.days,
+            planned_points=r.planned_points,
+            completed_points=r.completed_points,
+            avg_score=r.score_sum / r.days,
+            completion_ratio=_ratio(r.completed_points, r.planned_points),
+        )
+        for r in db.execute(stmt).scalars()
+    ]
+
+
+# --- daily analytics -------------------------------------------------------------
+
+
+def _ratio(completed: float, planned: float) -> float | None:
+    return completed / planned if planned > 0 else None
+
+
+def _use_sql_windows(dialect: str) -> bool:
+    # Postgres 11+ has RANGE frames with offsets. SQLite 3.28+ does too, but the prefix
+    # sums are ~2.5x faster there (a year of days: 6ms vs 16ms, julianday() per row).
+    return dialect == "postgresql"
+
+
+def _rolling_sql(db: Session, user_id: int | None, lead_start: date, end: date) -> list[tuple]:
+    """(day, planned, completed, score, then avg/planned/completed per window) rows, from SQL windows."""
+    if db.get_bind().dialect.name == "sqlite":
+        day_number = func.julianday(DayScore.day)
+    else:
+        day_number = DayScore.day - literal_column("DATE '1970-01-01'")
+    columns = [DayScore.day, DayScore.planned_points, DayScore.completed_points, DayScore.score]
+    for n in WINDOWS:
+        frame = {"order_by": day_number, "range_": (-(n - 1), 0)}
+        columns += [
+            func.avg(DayScore.score).over(**frame),
+            func.sum(DayScore.planned_points).over(**frame),
+            func.sum(DayScore.completed_points).over(**frame),
+        ]
+    stmt = (
+        select(*columns)
+        .where(_of_user(DayScore.user_id, user_id), DayScore.day >= lead_start, DayScore.day <= end)
+        .order_by(DayScore.day)
+    )
+    return [tuple(r) for r in db.execute(stmt)]
+
+
+def _rolling_python(db: Session, user_id: int | None, lead_start: date, end: date) -> list[tuple]:
+    """Same rows as `_rolling_sql`: prefix sums over a dense day array, one subtraction per window."""
+    stmt = (
+        select(DayScore.day, DayScore.planned_points, DayScore.completed_points, DayScore.score)
+        .where(_of_user(DayScore.user_id, user_id), DayScore.day >= lead_start, DayScore.day <= end)
+        .order_by(DayScore.day)
+    )
+    rows = [tuple(r) for r in db.execute(stmt)]
+    size = (end - lead_start).days + 1
+    dense = [[0.0] * size for _ in range(4)]  # recorded, planned, completed, score
+    for day, planned, completed, score in rows:
+        i = (day - lead_start).days
+        dense[0][i], dense[1][i], dense[2][i], dense[3][i] = 1.0, planned, completed, score
+    prefix = [[0.0, *accumulate(column)] for column in dense]
+
+    def window(k: int, i: int, n: int) -> float:
+        return prefix[k][i + 1] - prefix[k][max(i + 1 - n, 0)]
+
+    out = []
+    for day, planned, completed, score in rows:
+        i = (day - lead_start).days
+        values: list = [day, planned, completed, score]
+        for n in WINDOWS:
+            values += [window(3, i, n) / window(0, i, n), window(1, i, n), window(2, i, n)]
+        out.append(tuple(values))
+    return out
+
+
+def _streaks(days: list[date], scores: list[float], *, start: date, end: date, min_score: float) -> tuple[int, int]:
+    current = longest = 0
+    run = 0
+    last: date | None = None
+    for day, score in zip(days, scores):
+        if score >= min_score:
+            run = run + 1 if last is not None and day - last == timedelta(days=1) else 1
+            last = day
+            if day >= start:
+                longest = max(longest, run)
+        else:
+            run = 0
+            last = None
+    if last is not None and end - last <= timedelta(days=1):
+        current = run
+    return current, longest
+
+
+def analytics(
+    db: Session,
+    *,
+    user_id: int | None,
+    start: date,
+    end: date,
+    streak_min_score: float = STREAK_MIN_SCORE,
+    use_sql: bool | None = None,
+) -> DayScoreAnalytics:
+    """
+    Scored days in [start, end] (inclusive) with rolling windows, range totals and streaks.
+    Rolling windows and the current streak also look at the 89 days before `start`.
+    """
+    lead_start = start - timedelta(days=max(WINDOWS) - 1)
+    if use_sql is None:
+        use_sql = _use_sql_windows(db.get_bind().dialect.name)
+    rows = (_rolling_sql if use_sql else _rolling_python)(db, user_id, lead_start, end)
+
+    current, longest = _streaks(
+        [r[0] for r in rows], [r[3] for r in rows], start=start, end=end, min_score=streak_min_score
+    )
+    points: list[DayScorePoint] = []
+    for day, planned, completed, score, *windows in rows:
+        if day < start:
+            continue
+        rolling: dict = {}
+        for j, n in enumerate(WINDOWS):
+            avg, planned_sum, completed_sum = windows[3 * j : 3 * j + 3]
+            rolling[f"avg_score_{n}d"] = float(avg)
+            rolling[f"completion_ratio_{n}d"] = _ratio(float(completed_sum), float(planned_sum))
+        points.append(
+            DayScorePoint(day=day, planned_points=planned, completed_points=completed, score=score, **rolling)
+        )
+
+    planned_total = sum(p.planned_points for p in points)
+    return DayScoreAnalytics(
+        start=start,
+        end=end,
+        days=points,
+        recorded_days=len(points),
+        avg_score=sum(p.score for p in points) / len(points) if points else None,
+        completion_ratio=_ratio(sum(p.completed_points for p in points), planned_total),
+        streak_min_score=streak_min_score,
+        current_streak=current,
+        longest_streak=longest,
+    )
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from backend.app.core.pubsub import hub
+from backend.app.schemas import TaskRead
+from backend.app.services import version_service
+
+
+# Who caused the change ("api" for REST, "tool" for LLM tool calls); included in pushed events.
+_source: ContextVar[str] = ContextVar("event_source", default="api")
+
+
+@contextmanager
+def source(name: str) -> Iterator[None]:
+    token = _source.set(name)
+    try:
+        yield
+    finally:
+        _source.reset(token)
+
+
+def publish_task(task: TaskRead, *, user_id: int | None, created: bool) -> None:
+    """Push a task change to WebSocket subscribers of its user."""
+    event = {
+        "type": "task.created" if created else "task.updated",
+        "source": _source.get(),
+        "user_id": user_id,
+        "task": task.model_dump(mode="json"),
+    }
+    hub.publish(version_service.user_scope(user_id), event)
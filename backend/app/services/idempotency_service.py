@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.app.core import metrics
+from backend.app.core.config import settings
+from backend.app.db.models import IdempotencyRecord
+
+
+MAX_KEY_LENGTH = 200
+_PRUNE_EVERY = 500
+
+_claims = 0
+
+_ACTIVE_KEY = "idempotency_claim"
+
+
+class IdempotencyError(Exception):
+    pass
+
+
+class IdempotencyKeyInProgress(IdempotencyError):
+    """Another attempt with the same key hasn't finished yet."""
+
+
+class IdempotencyKeyMismatch(IdempotencyError):
+    """The key was already used for a different request."""
+
+
+def rest_key(user_id: int | None, client_key: str) -> str:
+    if not client_key or len(client_key) > MAX_KEY_LENGTH:
+        raise ValueError(f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters.")
+    return f"rest:{user_id}:{client_key}"
+
+
+def tool_key(user_id: int | None, session_id: str, tool_call_id: str) -> str:
+    return f"tool:{user_id}:{session_id}:{tool_call_id}"[:255]
+
+
+def fingerprint(*parts: str) -> str:
+    h = hashlib.blake2b(digest_size=32)
+    for p in parts:
+        h.update(p.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+@dataclass
+class _Claim:
+    key: str
+    # `expires_at` of the pending row: tells this attempt's claim apart from a later takeover.
+    lease: float
+    status_code: int
+    ttl_s: float
+    encode: Callable[[Any], Any] | None
+    stored: bool = False
+
+
+def _claim(db: Session, key: str, fp: str, lease_s: float) -> tuple[IdempotencyRecord | None, float]:
+    """
+    Claim `key` for this attempt for `lease_s` (returns `(None, lease)`), or return the
+    record of an earlier attempt that finished or still holds its lease.
+    """
+    global _claims
+    now = time.time()
+    existing = db.get(IdempotencyRecord, key, populate_existing=True)
+    if existing is not None and existing.expires_at > now:
+        return existing, 0.0
+    if existing is not None:
+        # Expired: a finished key past its TTL, or an attempt that died holding the lease.
+        db.delete(existing)
+        db.flush()
+
+    lease = now + lease_s
+    claim = IdempotencyRecord(key=key, fingerprint=fp, status_code=None, response=None, expires_at=lease)
+    db.add(claim)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent attempt.
+        db.rollback()
+        return db.get(IdempotencyRecord, key, populate_existing=True), 0.0
+    # Completed with a bulk UPDATE below; don't keep the pending copy in the identity map.
+    db.expunge(claim)
+
+    _claims += 1
+    if _claims % _PRUNE_EVERY == 0:
+        prune(db)
+    return None, lease
+
+
+def _complete(db: Session, claim: _Claim, result: Any) -> bool:
+    """Store `result` on our pending claim (caller commits); False if the lease was lost."""
+    res = db.execute(
+        update(IdempotencyRecord)
+        .where(
+            IdempotencyRecord.key == claim.key,
+            IdempotencyRecord.expires_at == claim.lease,
+            IdempotencyRecord.status_code.is_(None),
+        )
+        .values(
+            status_code=claim.status_code,
+            response=json.dumps(result, separators=(",", ":"), default=str),
+            expires_at=time.time() + claim.ttl_s,
+        )
+    )
+    return bool(res.rowcount)
+
+
+def store_in_transaction(db: Session, result: Any) -> None:
+    """
+    Write-through hook for services: call right before committing a write, with what the
+    write returns. Inside `execute_once(..., encode=...)` the response is stored in the
+    same transaction, so a crash after the commit can't leave the key pending (and the
+    write can't run twice). No-op otherwise.
+    """
+    claim: _Claim | None = db.info.get(_ACTIVE_KEY)
+    if claim is None or claim.stored or claim.encode is None:
+        return
+    if not _complete(db, claim, claim.encode(result)):
+        # Our lease ran out and a retry took the key over: don't commit this write as well.
+        raise IdempotencyKeyInProgress("A request with this idempotency key is still in progress.")
+    claim.stored = True
+
+
+def execute_once(
+    db: Session,
+    key: str,
+    *,
+    fingerprint: str,
+    run: Callable[[], Any],
+    store: Callable[[Any], bool] = lambda _result: True,
+    encode: Callable[[Any], Any] | None = None,
+    status_code: int = 200,
+    ttl_s: float | None = None,
+) -> tuple[Any, bool]:
+    """
+    Run `run()` at most once per `key`; return `(result, replayed)`.
+
+    A retry of a finished attempt returns the stored JSON result after one primary-key
+    lookup. While an attempt runs, its key is leased for `IDEMPOTENCY_LEASE_SECONDS`;
+    retries get `IdempotencyKeyInProgress` until it finishes or the lease runs out.
+
+    With `encode`, a service that calls `store_in_transaction` stores `encode(value)`
+    in the write's own transaction (it must equal what `run()` returns); otherwise the
+    result is stored right after `run()`. If `run` raises before anything was stored, or
+    `store(result)` is false, the key is released so the caller may retry.
+    """
+    record, lease = _claim(db, key, fingerprint, settings.idempotency_lease_seconds)
+    if record is not None:
+        if record.fingerprint != fingerprint:
+            metrics.IDEMPOTENT_REQUESTS.inc(outcome="mismatch")
+            raise IdempotencyKeyMismatch("Idempotency key was already used for a different request.")
+        if record.status_code is None:
+            metrics.IDEMPOTENT_REQUESTS.inc(outcome="in_progress")
+            raise IdempotencyKeyInProgress("A request with this idempotency key is still in progress.")
+        metrics.IDEMPOTENT_REQUESTS.inc(outcome="replayed")
+        return json.loads(record.response or "null"), True
+
+    claim = _Claim(
+        key=key,
+        lease=lease,
+        status_code=status_code,
+        ttl_s=settings.idempotency_ttl_seconds if ttl_s is None else ttl_s,
+        encode=encode,
+    )
+    db.info[_ACTIVE_KEY] = claim
+    try:
+        result = run()
+    except BaseException:
+        if not claim.stored:
+            _release(db, claim)
+        raise
+    finally:
+        db.info.pop(_ACTIVE_KEY, None)
+    if not claim.stored:
+        if not store(result):
+            _release(db, claim)
+            return result, False
+        _complete(db, claim, result)
+        db.commit()
+    metrics.IDEMPOTENT_REQUESTS.inc(outcome="executed")
+    return result, False
+
+
+def _release(db: Session, claim: _Claim) -> None:
+    db.rollback()
+    db.execute(
+        delete(IdempotencyRecord).where(
+            IdempotencyRecord.key == claim.key,
+            IdempotencyRecord.expires_at == claim.lease,
+            IdempotencyRecord.status_code.is_(None),
+        )
+    )
+    db.commit()
+
+
+def prune(db: Session, *, now: float | None = None) -> int:
+    """Delete expired keys (range scan on the `expires_at` index)."""
+    res = db.execute(delete(IdempotencyRecord).where(IdempotencyRecord.expires_at <= (now or time.time())))
+    db.commit()
+    return int(res.rowcount or 0)
@@ -0,0 +1,315 @@
+"""
+Per-user prioritization weights, learned from the order in which users finish tasks.
+
+Every completion is a ranking event: at that moment the user picked this task over
+the ones still open. For the `COMPETITORS` open tasks the current weights rank
+highest, one pairwise logistic (RankNet-style) step moves the weights toward scoring
+the completed task above them, with a small pull back to
+`prioritizer.DEFAULT_WEIGHTS` so a few events can't swing them far.
+
+State lives in `users.priority_weights`: the weights, how many events went into them
+and a cursor (completed_at, task id) at the last event learned. `learn_user` only
+reads completions after the cursor, so a run costs O(new events), not O(history).
+Completions of recurring tasks come from `task_occurrences`. Tasks are scored with
+their current fields, taken as of each completion time.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, exists, func, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app.db.models import Task, TaskDependency, TaskOccurrence, User
+from backend.app.services import task_cache, version_service
+from backend.app.services.prioritizer import DEFAULT_WEIGHTS, PRIORITY_FEATURES, feature_row
+
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+LEARNING_RATE = 0.05
+# Per-step pull toward the default weights (L2 prior).
+PRIOR_STRENGTH = 0.01
+# A score gap this large (in default-weight points) counts as a confident preference.
+SCALE = 5.0
+COMPETITORS = 20
+WEIGHT_LIMIT = 50.0
+# Events per `learn_user` call; the cursor picks up the rest next run.
+MAX_EVENTS = 5000
+# Completions newer than this wait for the next run, so commits landing slightly out of
+# order don't end up behind the cursor.
+SETTLE = timedelta(minutes=1)
+
+
+def _as_utc(dt: datetime) -> datetime:
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def _sigmoid(z: float) -> float:
+    if z < -30.0:
+        return 0.0
+    if z > 30.0:
+        return 1.0
+    return 1.0 / (1.0 + math.exp(-z))
+
+
+@dataclass
+class UserWeights:
+    weights: list[float]
+    events: int = 0
+    # Last event learned; stored as the database returned it, so comparisons match its format.
+    cursor_at: datetime | None = None
+    cursor_id: int = 0
+
+    @classmethod
+    def default(cls) -> UserWeights:
+        return cls(weights=list(DEFAULT_WEIGHTS))
+
+    @classmethod
+    def from_json(cls, data: dict | None) -> UserWeights:
+        # Anything written for another feature set starts over from the defaults.
+        if not data or data.get("version") != FORMAT_VERSION or tuple(data.get("features") or ()) != PRIORITY_FEATURES:
+            return cls.default()
+        return cls(
+            weights=[float(w) for w in data["weights"]],
+            events=int(data.get("events", 0)),
+            cursor_at=datetime.fromisoformat(data["cursor_at"]) if data.get("cursor_at") else None,
+            cursor_id=int(data.get("cursor_id", 0)),
+        )
+
+    def to_json(self) -> dict:
+        return {
+            "version": FORMAT_VERSION,
+            "features": list(PRIORITY_FEATURES),
+            "weights": self.weights,
+            "events": self.events,
+            "cursor_at": self.cursor_at.isoformat() if self.cursor_at else None,
+            "cursor_id": self.cursor_id,
+        }
+
+
+def update(weights: list[float], chosen: tuple[float, ...], others: list[tuple[float, ...]]) -> None:
+    """One gradient step of log sigmoid((score(chosen) - score(other)) / SCALE) per pair, in place."""
+    for other in others:
+        diff = [a - b for a, b in zip(chosen, other)]
+        g = 1.0 - _sigmoid(sum(w * d for w, d in zip(weights, diff)) / SCALE)
+        for i, d in enumerate(diff):
+            step = g * d / SCALE - PRIOR_STRENGTH * (weights[i] - DEFAULT_WEIGHTS[i])
+            weights[i] = max(-WEIGHT_LIMIT, min(WEIGHT_LIMIT, weights[i] + LEARNING_RATE * step))
+
+
+def _events(
+    db: Session, user_id: int, state: UserWeights, *, until: datetime, limit: int
+) -> list[tuple[datetime, int]]:
+    done = select(Task.completed_at.label("at"), Task.id.label("task_id")).where(
+        Task.user_id == user_id, Task.status == "done", Task.completed_at.is_not(None)
+    )
+    occurrences = (
+        select(TaskOccurrence.completed_at.label("at"), TaskOccurrence.task_id.label("task_id"))
+        .join(Task, Task.id == TaskOccurrence.task_id)
+        .where(Task.user_id == user_id)
+    )
+    events = union_all(done, occurrences).subquery()
+    stmt = (
+        select(events.c.at, events.c.task_id)
+        .where(events.c.at <= until)
+        .order_by(events.c.at, events.c.task_id)
+        .limit(limit)
+    )
+    if state.cursor_at is not None:
+        stmt = stmt.where(
+            or_(events.c.at > state.cursor_at, and_(events.c.at == state.cursor_at, events.c.task_id > state.cursor_id))
+        )
+    return [(at, task_id) for at, task_id in db.execute(stmt)]
+
+
+def learn_user(db: Session, user_id: int, *, until: datetime | None = None, max_events: int = MAX_EVENTS) -> int:
+    """
+    Learn from `user_id`'s completions after the cursor and up to `until` (default: now
+    minus `SETTLE`), in the caller's transaction (caller commits). Returns events read.
+    """
+    if until is None:
+        until = datetime.now(tz=timezone.utc) - SETTLE
+    user = db.get(User, user_id)
+    if user is None:
+        # Weights live on the users row; an id with no row (only ever sent as X-User-Id)
+        # keeps the defaults rather than getting a row with an id the sequence didn't issue.
+        return 0
+    state = UserWeights.from_json(user.priority_weights)
+    events = _events(db, user_id, state, until=until, limit=max_events)
+    if not events:
+        return 0
+
+    first_at, last_at = events[0][0], events[-1][0]
+    blocked = exists().where(TaskDependency.task_id == Task.id)
+    candidates = db.execute(
+        select(
+            Task.id,
+            Task.status,
+            Task.created_at,
+            Task.updated_at,
+            Task.completed_at,
+            Task.urgency,
+            Task.importance,
+            Task.impact,
+            Task.due_at,
+            blocked,
+        ).where(
+            Task.user_id == user_id,
+            Task.created_at <= last_at,
+            or_(Task.completed_at.is_(None), Task.completed_at >= first_at),
+        )
+    ).all()
+    unblocks = dict(
+        db.execute(
+            select(TaskDependency.depends_on_id, func.count())
+            .join(Task, Task.id == TaskDependency.task_id)
+            .where(Task.user_id == user_id)
+            .group_by(TaskDependency.depends_on_id)
+        ).all()
+    )
+    by_id = {c.id: c for c in candidates}
+    created = {c.id: _as_utc(c.created_at) for c in candidates}
+    # When each task stopped being open (None = still open); canceled tasks: their last update.
+    closed = {
+        c.id: _as_utc(c.completed_at) if c.completed_at else (_as_utc(c.updated_at) if c.status == "canceled" else None)
+        for c in candidates
+    }
+
+    def features(task_id: int, at: datetime) -> tuple[float, ...]:
+        c = by_id[task_id]
+        return feature_row(
+            urgency=c.urgency,
+            importance=c.importance,
+            impact=c.impact,
+            due_at=c.due_at,
+            unblocks_count=unblocks.get(task_id, 0),
+            blocked=bool(c[-1]),
+            as_of=at,
+        )
+
+    for at, task_id in events:
+        if task_id in by_id:
+            t = _as_utc(at)
+            rows = [
+                features(other, t)
+                for other in by_id
+                if other != task_id and created[other] <= t and (closed[other] is None or closed[other] > t)
+            ]
+            if rows:
+                rows.sort(key=lambda row: sum(w * x for w, x in zip(state.weights, row)), reverse=True)
+                update(state.weights, features(task_id, t), rows[:COMPETITORS])
+                state.events += 1
+        state.cursor_at, state.cursor_id = at, task_id
+
+    user.priority_weights = state.to_json()
+    # Cached weights have a data version of their own: the user's cached tasks and ETags stay valid.
+    version_service.bump_weights(db, user_id=user_id)
+    return len(events)
+
+
+def learn_all(
+    session: Callable[[], AbstractContextManager[Session]],
+    *,
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> dict[int, int]:
+    """`learn_user` for every user with completions (after `since`, if given), one transaction each."""
+    with session() as db:
+        done = select(Task.user_id).where(Task.user_id.is_not(None), Task.completed_at.is_not(None))
+        occurrences = select(Task.user_id).join(TaskOccurrence, TaskOccurrence.task_id == Task.id)
+        if since is not None:
+            done = done.where(Task.completed_at > since)
+            occurrences = occurrences.where(TaskOccurrence.completed_at > since)
+        user_ids = sorted(set(db.execute(done.distinct()).scalars()) | set(db.execute(occurrences.distinct()).scalars()))
+    learned: dict[int, int] = {}
+    for user_id in user_ids:
+        with session() as db:
+            n = learn_user(db, user_id, until=until)
+            db.commit()
+        if n:
+            learned[user_id] = n
+    return learned
+
+
+def weights_for(db: Session, user_id: int | None) -> tuple[float, ...]:
+    """The weights `prioritizer.prioritize` should use for `user_id` (defaults until enough events)."""
+    if user_id is None:
+        return DEFAULT_WEIGHTS
+
+    def load() -> tuple[float, ...]:
+        raw = db.execute(select(User.priority_weights).where(User.id == user_id)).scalar_one_or_none()
+        state = UserWeights.from_json(raw)
+        if state.events < settings.priority_learning_min_events:
+            return DEFAULT_WEIGHTS
+        return tuple(state.weights)
+
+    return task_cache.get_or_load(
+        db,
+        user_id=user_id,
+        key=("priority_weights",),
+        load=load,
+        size=lambda _: 1,
+        version_scope=version_service.weights_scope(user_id),
+    )
+
+
+class Learner:
+    """
+    Background thread that runs `learn_all` on every shard every `interval_s`. Start one
+    per deployment: under gunicorn it runs in the master (`main.start_jobs_in_master`).
+    """
+
+    def __init__(
+        self,
+        sessions: Callable[[], dict[str, Callable[[], AbstractContextManager[Session]]]],
+        *,
+        interval_s: float,
+    ) -> None:
+        self.sessions = sessions
+        self.interval_s = interval_s
+        # Per shard: only users with completions since the previous run are visited.
+        self._since: dict[str, datetime] = {}
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval_s <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="priority-learner", daemon=True)
+        self._thread.start()
+
+    def run_once(self) -> dict[str, dict[int, int]]:
+        learned: dict[str, dict[int, int]] = {}
+        for name, session in self.sessions().items():
+            # Completions up to SETTLE old may still be unread; the cursor skips anything seen twice.
+            started = datetime.now(tz=timezone.utc) - 2 * SETTLE
+            learned[name] = learn_all(session, since=self._since.get(name))
+            self._since[name] = started
+        return learned
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                learned = self.run_once()
+                if any(learned.values()):
+                    logger.info("learned priority weights from %s", {k: sum(v.values()) for k, v in learned.items()})
+            except Exception:
+                logger.exception("priority weight learning failed")
+            self._stop.wait(self.interval_s)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
@@ -0,0 +1,233 @@
+"""
+RRULE-style recurrence (the RFC 5545 subset people actually use for to-dos).
+
+Supported parts: FREQ (DAILY, WEEKLY, MONTHLY, YEARLY), INTERVAL, COUNT, UNTIL,
+BYDAY (WEEKLY: "MO,WE,FR") and BYMONTHDAY (MONTHLY: "1,15,-1"). The series starts
+at DTSTART (the task's first due date), which is always the first occurrence.
+
+Rules expand in wall-clock time of a timezone (the user's; UTC by default), so
+"every Monday at 9:00" stays on Mondays at 9:00 local across DST changes; results
+are UTC. A floating UNTIL (no trailing Z, or a bare date) is local time too.
+
+Nothing is materialized here: occurrences are computed on demand. Without COUNT,
+`after`/`between` jump straight to the period containing the window instead of
+walking from DTSTART, so a daily rule that started years ago costs the same as one
+that started yesterday.
+"""
+
+from __future__ import annotations
+
+import calendar
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone, tzinfo
+
+
+FREQUENCIES = ("DAILY", "WEEKLY", "MONTHLY", "YEARLY")
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# A rule that yields nothing for this many periods in a row (BYMONTHDAY=31 with
+# INTERVAL=2 starting in February...) is treated as exhausted.
+_MAX_EMPTY_PERIODS = 400
+
+
+def _to_utc(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def _wall(dt: datetime, tz: tzinfo) -> datetime:
+    """`dt` (naive means UTC) as naive wall-clock time in `tz`."""
+    return _to_utc(dt).astimezone(tz).replace(tzinfo=None)
+
+
+def _from_wall(dt: datetime, tz: tzinfo) -> datetime:
+    # fold=0: a wall time skipped by a spring-forward gap takes the offset from before
+    # the gap (so 02:30 lands at 03:30), as RFC 5545 specifies.
+    return dt.replace(tzinfo=tz).astimezone(timezone.utc)
+
+
+def _parse_until(value: str) -> datetime:
+    """UTC (aware) for a trailing Z; otherwise naive, i.e. wall-clock time of the expansion."""
+    for fmt in ("%Y%m%dT%H%M%SZ", "%Y%m%dT%H%M%S", "%Y%m%d"):
+        try:
+            dt = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        if fmt == "%Y%m%d":
+            # A date-only UNTIL includes that whole day.
+            dt = dt.replace(hour=23, minute=59, second=59)
+        return dt.replace(tzinfo=timezone.utc) if fmt.endswith("Z") else dt
+    raise ValueError(f"Invalid UNTIL {value!r}; use YYYYMMDD or YYYYMMDDTHHMMSSZ.")
+
+
+@dataclass(frozen=True)
+class Rule:
+    freq: str
+    interval: int = 1
+    count: int | None = None
+    until: datetime | None = None
+    by_day: tuple[int, ...] = ()
+    by_month_day: tuple[int, ...] = ()
+
+    @classmethod
+    def parse(cls, text: str) -> Rule:
+        """'FREQ=WEEKLY;BYDAY=MO,TH' (an 'RRULE:' prefix is accepted); raises ValueError."""
+        body = text.strip()
+        if body.upper().startswith("RRULE:"):
+            body = body[6:]
+        parts: dict[str, str] = {}
+        for part in filter(None, body.split(";")):
+            name, sep, value = part.partition("=")
+            if not sep or not value:
+                raise ValueError(f"Invalid recurrence part {part!r}.")
+            parts[name.strip().upper()] = value.strip().upper()
+
+        freq = parts.pop("FREQ", None)
+        if freq not in FREQUENCIES:
+            raise ValueError(f"Recurrence needs FREQ={'|'.join(FREQUENCIES)}.")
+        try:
+            interval = int(parts.pop("INTERVAL", "1"))
+            count = int(parts["COUNT"]) if "COUNT" in parts else None
+            parts.pop("COUNT", None)
+            by_month_day = tuple(sorted({int(d) for d in parts.pop("BYMONTHDAY").split(",")})) if "BYMONTHDAY" in parts else ()
+        except ValueError:
+            raise ValueError("INTERVAL, COUNT and BYMONTHDAY must be integers.") from None
+        until = _parse_until(parts.pop("UNTIL")) if "UNTIL" in parts else None
+        by_day: tuple[int, ...] = ()
+        if "BYDAY" in parts:
+            days = parts.pop("BYDAY").split(",")
+            if any(d not in WEEKDAYS for d in days):
+                raise ValueError("BYDAY takes weekday codes (MO,TU,WE,TH,FR,SA,SU).")
+            by_day = tuple(sorted({WEEKDAYS.index(d) for d in days}))
+        if parts:
+            raise ValueError(f"Unsupported recurrence part(s): {', '.join(sorted(parts))}.")
+
+        if interval < 1 or (count is not None and count < 1):
+            raise ValueError("INTERVAL and COUNT must be positive.")
+        if count is not None and until is not None:
+            raise ValueError("Use COUNT or UNTIL, not both.")
+        if by_day and freq != "WEEKLY":
+            raise ValueError("BYDAY is supported with FREQ=WEEKLY only.")
+        if by_month_day and (freq != "MONTHLY" or any(d == 0 or not -31 <= d <= 31 for d in by_month_day)):
+            raise ValueError("BYMONTHDAY takes 1..31 or -31..-1, with FREQ=MONTHLY only.")
+        return cls(freq=freq, interval=interval, count=count, until=until, by_day=by_day, by_month_day=by_month_day)
+
+    def __str__(self) -> str:
+        parts = [f"FREQ={self.freq}"]
+        if self.interval != 1:
+            parts.append(f"INTERVAL={self.interval}")
+        if self.by_day:
+            parts.append("BYDAY=" + ",".join(WEEKDAYS[d] for d in self.by_day))
+        if self.by_month_day:
+            parts.append("BYMONTHDAY=" + ",".join(map(str, self.by_month_day)))
+        if self.count is not None:
+            parts.append(f"COUNT={self.count}")
+        if self.until is not None:
+            parts.append(f"UNTIL={self.until:%Y%m%dT%H%M%S}" + ("Z" if self.until.tzinfo else ""))
+        return ";".join(parts)
+
+    # --- expansion ---------------------------------------------------------------
+
+    def _period_index(self, start: datetime, moment: datetime) -> int:
+        """Index of the period (of `interval` units) containing `moment`, >= 0."""
+        if moment <= start:
+            return 0
+        if self.freq == "DAILY":
+            units = (moment.date() - start.date()).days
+        elif self.freq == "WEEKLY":
+            start_monday = start.date() - timedelta(days=start.weekday())
+            units = (moment.date() - start_monday).days // 7
+        elif self.freq == "MONTHLY":
+            units = (moment.year - start.year) * 12 + moment.month - start.month
+        else:
+            units = moment.year - start.year
+        return max(units // self.interval - 1, 0)
+
+    def _period(self, start: datetime, k: int) -> list[datetime]:
+        """Candidate occurrences of period `k`, in order (some may precede `start`)."""
+        step = k * self.interval
+        if self.freq == "DAILY":
+            return [start + timedelta(days=step)]
+        if self.freq == "WEEKLY":
+            monday = start - timedelta(days=start.weekday()) + timedelta(weeks=step)
+            return [monday + timedelta(days=d) for d in (self.by_day or (start.weekday(),))]
+        if self.freq == "MONTHLY":
+            month_index = start.month - 1 + step
+            year, month = start.year + month_index // 12, month_index % 12 + 1
+            last = calendar.monthrange(year, month)[1]
+            days = sorted({d if d > 0 else last + 1 + d for d in (self.by_month_day or (start.day,))})
+            return [start.replace(year=year, month=month, day=d) for d in days if 1 <= d <= last]
+        year = start.year + step
+        if start.month == 2 and start.day == 29 and not calendar.isleap(year):
+            return []
+        return [start.replace(year=year)]
+
+    def iter(
+        self, start: datetime, *, from_moment: datetime | None = None, tz: tzinfo = timezone.utc
+    ) -> Iterator[datetime]:
+        """
+        Occurrences (UTC) from DTSTART `start`, in order, expanded in `tz`; skips ahead
+        to `from_moment` when COUNT allows.
+        """
+        start_utc = _to_utc(start)
+        start = _wall(start_utc, tz)
+        k = 0
+        if from_moment is not None and self.count is None:
+            k = self._period_index(start, _wall(from_moment, tz))
+        produced = 0
+        empty = 0
+        while True:
+            try:
+                period = [dt for dt in self._period(start, k) if dt >= start]
+            except (OverflowError, ValueError):
+                return  # past year 9999
+            if k == 0 and start not in period:
+                # DTSTART is always an occurrence, even if it doesn't match BYDAY/BYMONTHDAY.
+                period = sorted([start, *period])
+            empty = 0 if period else empty + 1
+            if empty > _MAX_EMPTY_PERIODS:
+                return
+            for dt in period:
+                # DTSTART as given: its wall time may be ambiguous (the repeated hour in autumn).
+                utc = start_utc if dt == start else _from_wall(dt, tz)
+                if self.until is not None and (utc if self.until.tzinfo else dt) > self.until:
+                    return
+                yield utc
+                produced += 1
+                if self.count is not None and produced >= self.count:
+                    return
+            k += 1
+
+    def after(self, start: datetime, moment: datetime, *, tz: tzinfo = timezone.utc) -> datetime | None:
+        """First occurrence strictly after `moment`, or None when the series is over."""
+        moment = _to_utc(moment)
+        for dt in self.iter(start, from_moment=moment, tz=tz):
+            if dt > moment:
+                return dt
+        return None
+
+    def between(
+        self,
+        start: datetime,
+        window_start: datetime,
+        window_end: datetime,
+        *,
+        limit: int = 1000,
+        tz: tzinfo = timezone.utc,
+    ) -> list[datetime]:
+        """Occurrences in [window_start, window_end), at most `limit`."""
+        window_start, window_end = _to_utc(window_start), _to_utc(window_end)
+        out: list[datetime] = []
+        for dt in self.iter(start, from_moment=window_start, tz=tz):
+            if dt >= window_end or len(out) >= limit:
+                break
+            if dt >= window_start:
+                out.append(dt)
+        return out
+
+
+def normalize(text: str) -> str:
+    """Canonical form of an RRULE string (raises ValueError if unsupported)."""
+    return str(Rule.parse(text))
@@ -0,0 +1,259 @@
+"""
+Full-text search over task titles, descriptions and tags.
+
+The index is a side table written by `task_service` in the same transaction as the
+task itself (see `index_task`):
+- SQLite: an FTS5 virtual table `task_fts` (rowid = task id), ranked with bm25.
+- Postgres: `task_search(task_id, document tsvector)` with a GIN index, ranked with
+  `ts_rank_cd`; title and tags weigh more than the description.
+Other databases fall back to a LIKE scan.
+
+Queries are reduced to words and every word must match, as a prefix ("dent" finds
+"dentist"), so user input never reaches the FTS query syntax.
+
+The index is created by `init_db` (or by the first write or search that finds it
+missing) and filled from existing tasks when it is first created; `rebuild` re-derives
+it after bulk loads. Searches build it in a transaction of their own on the primary,
+never inside their read session, and an engine only counts as ready once the index is
+known to be committed.
+"""
+
+from __future__ import annotations
+
+import re
+import weakref
+from collections.abc import Iterable
+
+from sqlalchemy import Connection, DateTime, or_, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from backend.app.db.models import LabelKind, Task, TaskLabel
+from backend.app.schemas import TaskSearchHit
+
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_MAX_TERMS = 16
+
+# Engines whose index is known to exist; checked once per engine, not per write.
+_ready: weakref.WeakSet[Engine] = weakref.WeakSet()
+
+_SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS task_fts USING fts5("
+    "title, description, tags, tokenize = 'porter unicode61 remove_diacritics 2')"
+)
+_PG_DDL = (
+    "CREATE TABLE IF NOT EXISTS task_search ("
+    "task_id INTEGER PRIMARY KEY REFERENCES tasks(id) ON DELETE CASCADE, document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_task_search_document ON task_search USING GIN (document)",
+)
+_PG_DOCUMENT = (
+    "setweight(to_tsvector('english', :title), 'A') || "
+    "setweight(to_tsvector('english', :tags), 'A') || "
+    "setweight(to_tsvector('english', :description), 'B')"
+)
+
+
+def _terms(query: str) -> list[str]:
+    return _WORD.findall(query.lower())[:_MAX_TERMS]
+
+
+def _tags_text(tags: Iterable[str] | None) -> str:
+    return " ".join(tags or [])
+
+
+def _index_exists(conn: Connection) -> bool:
+    if conn.dialect.name == "sqlite":
+        sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_fts'"
+    else:
+        sql = "SELECT 1 FROM information_schema.tables WHERE table_name = 'task_search'"
+    return conn.execute(text(sql)).first() is not None
+
+
+def _create(conn: Connection) -> bool:
+    """Create and fill the index in `conn`'s transaction if it's missing; True if it was already there."""
+    if _index_exists(conn):
+        return True
+    # A savepoint keeps the DDL and the fill together: pysqlite runs DDL outside any
+    # transaction, so without one a failed fill would leave an empty index behind.
+    with conn.begin_nested():
+        if conn.dialect.name == "sqlite":
+            conn.execute(text(_SQLITE_DDL))
+        else:
+            for ddl in _PG_DDL:
+                conn.execute(text(ddl))
+        _fill(conn)
+    return False
+
+
+def _ensure(conn: Connection) -> None:
+    """
+    Make sure a write on `conn` has an index to go to, creating it in the write's own
+    transaction if needed. The engine is only marked ready when the index was already
+    there (committed), not on DDL this transaction may still roll back.
+    """
+    if conn.engine in _ready or conn.dialect.name not in {"sqlite", "postgresql"}:
+        return
+    if _create(conn):
+        _ready.add(conn.engine)
+
+
+def ensure_index(engine: Engine) -> None:
+    """Create (and fill) the index in a transaction of its own; `engine` is ready once that commits."""
+    if engine in _ready or engine.dialect.name not in {"sqlite", "postgresql"}:
+        return
+    with engine.begin() as conn:
+        _create(conn)
+    _ready.add(engine)
+
+
+def _fill(conn: Connection) -> None:
+    tags: dict[int, list[str]] = {}
+    for task_id, value in conn.execute(
+        select(TaskLabel.task_id, TaskLabel.value)
+        .where(TaskLabel.kind == LabelKind.tag.value)
+        .order_by(TaskLabel.task_id, TaskLabel.position)
+    ):
+        tags.setdefault(task_id, []).append(value)
+    rows = conn.execute(select(Task.id, Task.title, Task.description)).all()
+    _write(conn, [(r.id, r.title, r.description, tags.get(r.id)) for r in rows])
+
+
+def rebuild(engine: Engine) -> None:
+    """Re-derive the whole index from `tasks` (after bulk inserts that bypass `task_service`)."""
+    ensure_index(engine)
+    with engine.begin() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.execute(text("DELETE FROM task_fts"))
+        elif conn.dialect.name == "postgresql":
+            conn.execute(text("DELETE FROM task_search"))
+        else:
+            return
+        _fill(conn)
+
+
+def _write(conn: Connection, rows: list[tuple[int, str | None, str | None, Iterable[str] | None]]) -> None:
+    if not rows:
+        return
+    params = [
+        {"id": task_id, "title": title or "", "description": description or "", "tags": _tags_text(tags)}
+        for task_id, title, description, tags in rows
+    ]
+    if conn.dialect.name == "sqlite":
+        conn.execute(text("DELETE FROM task_fts WHERE rowid = :id"), [{"id": p["id"]} for p in params])
+        conn.execute(
+            text("INSERT INTO task_fts (rowid, title, description, tags) VALUES (:id, :title, :description, :tags)"),
+            params,
+        )
+    elif conn.dialect.name == "postgresql":
+        conn.execute(
+            text(
+                f"INSERT INTO task_search (task_id, document) VALUES (:id, {_PG_DOCUMENT}) "
+                "ON CONFLICT (task_id) DO UPDATE SET document = excluded.document"
+            ),
+            params,
+        )
+
+
+def index_task(db: Session, task: Task) -> None:
+    """Write-through hook: (re)index one task; call inside the writing transaction after it has an id."""
+    index_rows(db, [(task.id, task.title, task.description, task.tags)])
+
+
+def index_rows(db: Session, rows: list[tuple[int, str | None, str | None, Iterable[str] | None]]) -> None:
+    conn = db.connection()
+    _ensure(conn)
+    _write(conn, rows)
+
+
+def remove_tasks(db: Session, task_ids: list[int]) -> None:
+    """Drop tasks from the index; call before deleting the tasks themselves."""
+    conn = db.connection()
+    if conn.dialect.name == "sqlite" and task_ids:
+        _ensure(conn)
+        conn.execute(text("DELETE FROM task_fts WHERE rowid = :id"), [{"id": i} for i in task_ids])
+    # Postgres: task_search rows go with their task (ON DELETE CASCADE).
+
+
+def remove_user(db: Session, user_id: int) -> None:
+    """Drop a user's tasks from the index; call before deleting the tasks themselves."""
+    conn = db.connection()
+    if conn.dialect.name == "sqlite":
+        _ensure(conn)
+        conn.execute(
+            text("DELETE FROM task_fts WHERE rowid IN (SELECT id FROM tasks WHERE user_id = :user_id)"),
+            {"user_id": user_id},
+        )
+    # Postgres: task_search rows go with their task (ON DELETE CASCADE).
+
+
+def search_tasks(
+    db: Session,
+    query: str,
+    *,
+    user_id: int | None = None,
+    status: str | None = None,
+    limit: int = 20,
+) -> list[TaskSearchHit]:
+    """Best matches first among `user_id`'s tasks (None: tasks without a user), like `task_service.list_tasks`."""
+    terms = _terms(query)
+    if not terms:
+        return []
+    if not db.info.get("replica"):
+        # Built (once) and committed on its own connection, never in this read session;
+        # replicas get the index from their primary.
+        ensure_index(db.get_bind())
+    conn = db.connection()
+    dialect = conn.dialect.name
+
+    filters = ""
+    params: dict[str, object] = {"limit": limit}
+    if user_id is None:
+        filters += " AND t.user_id IS NULL"
+    else:
+        filters += " AND t.user_id = :user_id"
+        params["user_id"] = user_id
+    if status is not None:
+        filters += " AND t.status = :status"
+        params["status"] = status
+
+    if dialect == "sqlite":
+        params["match"] = " AND ".join(f'"{t}"*' for t in terms)
+        sql = (
+            "SELECT t.id, t.title, t.status, t.due_at, -bm25(task_fts, 10.0, 1.0, 5.0) AS score, "
+            "snippet(task_fts, 1, '[', ']', '…', 8) AS snippet "
+            "FROM task_fts JOIN tasks t ON t.id = task_fts.rowid "
+            f"WHERE task_fts MATCH :match{filters} ORDER BY score DESC LIMIT :limit"
+        )
+    elif dialect == "postgresql":
+        params["tsquery"] = " & ".join(f"{t}:*" for t in terms)
+        sql = (
+            "SELECT t.id, t.title, t.status, t.due_at, ts_rank_cd(s.document, q) AS score, "
+            "CASE WHEN t.description IS NULL THEN NULL ELSE ts_headline('english', t.description, q, "
+            "'StartSel=[, StopSel=], MaxFragments=1, MaxWords=12, MinWords=4') END AS snippet "
+            "FROM task_search s JOIN tasks t ON t.id = s.task_id, to_tsquery('english', :tsquery) q "
+            f"WHERE s.document @@ q{filters} ORDER BY score DESC LIMIT :limit"
+        )
+    else:
+        stmt = select(Task.id, Task.title, Task.status, Task.due_at).limit(limit)
+        for term in terms:
+            stmt = stmt.where(or_(Task.title.ilike(f"%{term}%"), Task.description.ilike(f"%{term}%")))
+        stmt = stmt.where(Task.user_id.is_(None) if user_id is None else Task.user_id == user_id)
+        if status is not None:
+            stmt = stmt.where(Task.status == status)
+        return [
+            TaskSearchHit(task_id=r.id, title=r.title, status=r.status, due_at=r.due_at, score=1.0)
+            for r in db.execute(stmt)
+        ]
+
+    return [
+        TaskSearchHit(
+            task_id=r.id,
+            title=r.title,
+            status=r.status,
+            due_at=r.due_at,
+            score=float(r.score),
+            snippet=r.snippet if r.snippet and "[" in r.snippet else None,
+        )
+        for r in conn.execute(text(sql).columns(due_at=DateTime(timezone=True)), params)
+    ]
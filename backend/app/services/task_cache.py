@@ -0,0 +1,134 @@
+"""
+Cache of hydrated task lists and dependency counts, keyed by user.
+
+Two layers:
+- per request: lives in `Session.info`, so a chat turn that calls `list_tasks` then
+  `prioritize_tasks` hydrates the user's tasks once. Cleared by every write made
+  through that session (write-through from `task_service`).
+- shared (optional, `TASK_CACHE_ENTRIES` > 0): a process-wide LRU bounded by entry
+  count and total cached tasks. Each entry remembers the scope's `DataVersion`, and a
+  lookup costs one primary-key read to confirm it's still current, so writes from
+  other workers and processes are never served stale.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any, TypeVar
+
+from sqlalchemy.orm import Session
+
+from backend.app.core import metrics
+from backend.app.core.config import settings
+from backend.app.services import version_service
+
+
+T = TypeVar("T")
+
+_REQUEST_KEY = "task_cache"
+
+
+class LRUCache:
+    def __init__(self, *, max_entries: int, max_items: int) -> None:
+        self.max_entries = max_entries
+        self.max_items = max_items
+        self._data: OrderedDict[Hashable, tuple[int, Any, int]] = OrderedDict()
+        self._items = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: int) -> Any | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] != version:
+                self._pop(key)
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Hashable, version: int, value: Any, size: int) -> None:
+        if self.max_entries <= 0 or size > self.max_items:
+            return
+        with self._lock:
+            self._pop(key)
+            self._data[key] = (version, value, size)
+            self._items += size
+            while self._data and (len(self._data) > self.max_entries or self._items > self.max_items):
+                self._pop(next(iter(self._data)))
+        metrics.TASK_CACHE_ITEMS.set(self._items)
+
+    def discard_scope(self, scope: tuple[Hashable, ...]) -> None:
+        """Drop every entry whose key starts with `scope`."""
+        n = len(scope)
+        with self._lock:
+            for key in [k for k in self._data if k[:n] == scope]:  # type: ignore[index]
+                self._pop(key)
+        metrics.TASK_CACHE_ITEMS.set(self._items)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._items = 0
+        metrics.TASK_CACHE_ITEMS.set(0)
+
+    def _pop(self, key: Hashable) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._items -= entry[2]
+
+
+shared = LRUCache(max_entries=settings.task_cache_entries, max_items=settings.task_cache_max_tasks)
+
+
+def _scope(db: Session, user_id: int | None, version_scope: str | None = None) -> tuple[Hashable, ...]:
+    # Ids and versions are per shard, and a replica may lag its primary: key on both.
+    return (db.info.get("shard"), bool(db.info.get("replica")), version_scope or version_service.user_scope(user_id))
+
+
+def get_or_load(
+    db: Session,
+    *,
+    user_id: int | None,
+    key: tuple[Hashable, ...],
+    load: Callable[[], T],
+    size: Callable[[T], int] = len,  # type: ignore[assignment]
+    version_scope: str | None = None,
+) -> T:
+    """
+    `load()`, cached per request and (when enabled) in `shared` until the data version
+    of `version_scope` changes (default: the user's tasks, `version_service.user_scope`).
+    """
+    scope = _scope(db, user_id, version_scope)
+    full_key = (*scope, *key)
+
+    per_request: dict[Hashable, Any] = db.info.setdefault(_REQUEST_KEY, {})
+    if full_key in per_request:
+        metrics.TASK_CACHE_LOOKUPS.inc(layer="request", result="hit")
+        return per_request[full_key]
+    metrics.TASK_CACHE_LOOKUPS.inc(layer="request", result="miss")
+
+    version: int | None = None
+    if shared.max_entries > 0:
+        version, _ = version_service.get_version(db, scope[-1])
+        value = shared.get(full_key, version)
+        if value is not None:
+            metrics.TASK_CACHE_LOOKUPS.inc(layer="shared", result="hit")
+            per_request[full_key] = value
+            return value
+        metrics.TASK_CACHE_LOOKUPS.inc(layer="shared", result="miss")
+
+    value = load()
+    per_request[full_key] = value
+    if version is not None:
+        shared.put(full_key, version, value, size(value))
+    return value
+
+
+def invalidate(db: Session, *, user_id: int | None) -> None:
+    """Write-through hook: forget what a write for `user_id` may have changed."""
+    db.info.pop(_REQUEST_KEY, None)
+    shard = db.info.get("shard")
+    shared.discard_scope((shard, False, version_service.user_scope(user_id)))
@@ -1,40 +1,33 @@
 from __future__ import annotations
 
-from datetime import datetime
+from collections.abc import Iterable
+from datetime import datetime, timezone, tzinfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from sqlalchemy import delete, select
-from sqlalchemy.orm import Session
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.orm import Session, selectinload
 
-from backend.app.db.models import Task, TaskDependency
-from backend.app.schemas import TaskCreate, TaskRead, TaskUpdate
+from backend.app.db.models import DataVersion, LabelKind, Task, TaskDependency, TaskLabel, TaskOccurrence, User
+from backend.app.schemas import LabelWorkload, TaskCreate, TaskOccurrenceRead, TaskRead, TaskUpdate
+from backend.app.services import (
+    archive_service,
+    change_feed_service,
+    event_service,
+    idempotency_service,
+    search_service,
+    task_cache,
+    version_service,
+)
+from backend.app.services.recurrence import Rule
 
 
-def _task_to_read(db: Session, task: Task) -> TaskRead:
-    depends_on_ids = list(
-        db.execute(select(TaskDependency.depends_on_id).where(TaskDependency.task_id == task.id)).scalars().all()
-    )
-    return TaskRead(
-        id=task.id,
-        title=task.title,
-        description=task.description,
-        status=task.status,
-        due_at=task.due_at,
-        urgency=task.urgency,
-        importance=task.importance,
-        impact=task.impact,
-        effort_minutes=task.effort_minutes,
-        optimistic_minutes=task.optimistic_minutes,
-        most_likely_minutes=task.most_likely_minutes,
-        pessimistic_minutes=task.pessimistic_minutes,
-        external_constraints=task.external_constraints,
-        required_resources=task.required_resources or [],
-        required_people=task.required_people or [],
-        tags=task.tags or [],
-        depends_on_ids=depends_on_ids,
-        created_at=task.created_at,
-        updated_at=task.updated_at,
-        completed_at=task.completed_at,
-    )
+def _task_to_read(task: Task) -> TaskRead:
+    return TaskRead.model_validate(task)
+
+
+def _of_user(column, user_id: int | None):
+    # Tasks created without a user are their own set, not everyone's.
+    return column.is_(None) if user_id is None else column == user_id
 
 
 def create_task(db: Session, data: TaskCreate, user_id: int | None = None) -> TaskRead:
@@ -44,6 +37,7 @@ def create_task(db: Session, data: TaskCreate, user_id: int | None = None) -> Ta
         title = (description or "").strip()
     if not title:
         raise ValueError("Task must have at least a title or description.")
+    _check_dependencies(db, data.depends_on_ids or [], user_id=user_id)
 
     task = Task(
         user_id=user_id,
@@ -59,40 +53,177 @@ def create_task(db: Session, data: TaskCreate, user_id: int | None = None) -> Ta
         most_likely_minutes=data.most_likely_minutes,
         pessimistic_minutes=data.pessimistic_minutes,
         external_constraints=data.external_constraints,
-        required_resources=list(data.required_resources or []),
-        required_people=list(data.required_people or []),
-        tags=list(data.tags or []),
+        recurrence=data.recurrence,
+        recurrence_start=data.due_at if data.recurrence else None,
     )
+    _set_labels(task, LabelKind.resource, data.required_resources or [])
+    _set_labels(task, LabelKind.person, data.required_people or [])
+    _set_labels(task, LabelKind.tag, data.tags or [])
     db.add(task)
-    db.commit()
-    db.refresh(task)
+    db.flush()
 
-    _set_dependencies(db, task.id, list(data.depends_on_ids or []))
-    db.refresh(task)
-    return _task_to_read(db, task)
+    _set_dependencies(db, task.id, list(data.depends_on_ids or []), user_id=user_id)
+    _record_task_write(db, task)
+    read = _commit(db, task)
+    event_service.publish_task(read, user_id=user_id, created=True)
+    return read
 
 
-def get_task(db: Session, task_id: int) -> TaskRead | None:
+def get_task(db: Session, task_id: int, *, user_id: int | None = None) -> TaskRead | None:
+    """`task_id` if it belongs to `user_id` (None: a task without a user), else None."""
     task = db.get(Task, task_id)
-    if task is None:
+    if task is None or task.user_id != user_id:
         return None
-    return _task_to_read(db, task)
+    return _task_to_read(task)
+
+
+def get_task_validator(db: Session, task_id: int, *, user_id: int | None = None) -> tuple[int, datetime] | None:
+    """
+    Cheap freshness check for one of `user_id`'s tasks: `(user's data version, updated_at)`,
+    or None if missing. Other users' writes don't change it.
+
+    One statement (PK lookup + scalar subquery); no hydration.
+    """
+    version = (
+        select(DataVersion.version)
+        .where(DataVersion.scope == version_service.user_scope(user_id))
+        .scalar_subquery()
+    )
+    row = db.execute(select(Task.updated_at, version).where(Task.id == task_id, _of_user(Task.user_id, user_id))).first()
+    if row is None:
+        return None
+    return int(row[1] or 0), row[0]
+
+
+def list_tasks(
+    db: Session,
+    user_id: int | None = None,
+    status: str | None = None,
+    limit: int = 200,
+    *,
+    tag: str | None = None,
+    person: str | None = None,
+    resource: str | None = None,
+    include_archived: bool = False,
+) -> list[TaskRead]:
+    """
+    `user_id`'s tasks (None: tasks without a user), newest first.
+    `tag`/`person`/`resource` match labels case-insensitively (index lookups).
+    Archived tasks (see archive_service) are left out unless `include_archived`.
+    """
+    labels = [(k, label_key(v)) for k, v in ((LabelKind.tag, tag), (LabelKind.person, person), (LabelKind.resource, resource)) if v]
 
+    def load() -> list[TaskRead]:
+        stmt = (
+            select(Task)
+            .options(selectinload(Task.depends_on), selectinload(Task.labels))
+            .order_by(Task.created_at.desc())
+            .limit(limit)
+        )
+        stmt = stmt.where(_of_user(Task.user_id, user_id))
+        if status is not None:
+            stmt = stmt.where(Task.status == status)
+        for kind, key in labels:
+            stmt = stmt.where(
+                Task.id.in_(select(TaskLabel.task_id).where(TaskLabel.kind == kind.value, TaskLabel.key == key))
+            )
+        tasks = [_task_to_read(t) for t in db.execute(stmt).scalars().all()]
+        if include_archived:
+            archived = archive_service.list_archived(db, user_id=user_id, status=status, limit=limit, labels=labels)
+            tasks = sorted([*tasks, *archived], key=lambda t: t.created_at, reverse=True)[:limit]
+        return tasks
 
-def list_tasks(db: Session, user_id: int | None = None, status: str | None = None, limit: int = 200) -> list[TaskRead]:
-    stmt = select(Task).order_by(Task.created_at.desc()).limit(limit)
-    if user_id is not None:
-        stmt = stmt.where(Task.user_id == user_id)
-    if status is not None:
-        stmt = stmt.where(Task.status == status)
-    tasks = list(db.execute(stmt).scalars().all())
-    return [_task_to_read(db, t) for t in tasks]
+    key = ("tasks", status, limit, include_archived, *labels)
+    # Cached lists are shared; hand out a copy so callers can filter/sort freely.
+    return list(task_cache.get_or_load(db, user_id=user_id, key=key, load=load))
 
 
-def update_task(db: Session, task_id: int, data: TaskUpdate) -> TaskRead:
+def label_workload(db: Session, kind: LabelKind, user_id: int | None = None) -> list[LabelWorkload]:
+    """
+    Open (not done/canceled) work per person or resource, heaviest first.
+
+    One GROUP BY over the `(kind, key)` index; effort is `most_likely_minutes`, then
+    `effort_minutes`, else 0. `overdue_tasks` is as of the start of the current minute,
+    which is part of the cache key, so cached results don't go stale as time passes.
+    """
+    now = datetime.now(tz=timezone.utc).replace(second=0, microsecond=0)
+
+    def load() -> list[LabelWorkload]:
+        effort = func.coalesce(Task.most_likely_minutes, Task.effort_minutes, 0)
+        stmt = (
+            select(
+                func.min(TaskLabel.value).label("value"),
+                func.count(Task.id).label("open_tasks"),
+                func.sum(effort).label("open_minutes"),
+                func.sum(case((Task.due_at < now, 1), else_=0)).label("overdue_tasks"),
+                func.min(Task.due_at).label("next_due_at"),
+            )
+            .join(Task, Task.id == TaskLabel.task_id)
+            .where(TaskLabel.kind == kind.value, Task.status.not_in(("done", "canceled")))
+            .group_by(TaskLabel.key)
+            .order_by(func.sum(effort).desc(), TaskLabel.key)
+        )
+        stmt = stmt.where(_of_user(Task.user_id, user_id))
+        return [
+            LabelWorkload(
+                kind=kind.value,
+                value=r.value,
+                open_tasks=int(r.open_tasks),
+                open_minutes=int(r.open_minutes or 0),
+                overdue_tasks=int(r.overdue_tasks or 0),
+                next_due_at=r.next_due_at,
+            )
+            for r in db.execute(stmt)
+        ]
+
+    return list(task_cache.get_or_load(db, user_id=user_id, key=("workload", kind.value, now), load=load))
+
+
+def contention_minutes(db: Session, tasks: list[TaskRead], user_id: int | None = None) -> dict[int, float]:
+    """
+    Per task: the largest open workload among its required people/resources, excluding
+    its own effort (the prioritizer's `contention_by_task_id`). Tasks needing nobody
+    and nothing are left out.
+    """
+    load = {
+        (kind, label_key(w.value)): float(w.open_minutes)
+        for kind in (LabelKind.person, LabelKind.resource)
+        for w in label_workload(db, kind, user_id=user_id)
+    }
+    out: dict[int, float] = {}
+    for t in tasks:
+        keys = [(LabelKind.person, label_key(v)) for v in t.required_people]
+        keys += [(LabelKind.resource, label_key(v)) for v in t.required_resources]
+        if not keys:
+            continue
+        own = 0.0 if t.status in ("done", "canceled") else float(t.most_likely_minutes or t.effort_minutes or 0)
+        busiest = max(load.get(k, 0.0) for k in keys) - own
+        if busiest > 0:
+            out[t.id] = busiest
+    return out
+
+
+def unblock_counts(db: Session, user_id: int | None = None) -> dict[int, int]:
+    """How many tasks depend on each task (the prioritizer's `unblocks_by_task_id`)."""
+
+    def load() -> dict[int, int]:
+        stmt = (
+            select(TaskDependency.depends_on_id, func.count(TaskDependency.task_id))
+            .join(Task, Task.id == TaskDependency.task_id)
+            .where(_of_user(Task.user_id, user_id))
+            .group_by(TaskDependency.depends_on_id)
+        )
+        return {int(dep_id): int(cnt) for dep_id, cnt in db.execute(stmt).all()}
+
+    return task_cache.get_or_load(db, user_id=user_id, key=("unblocks",), load=load)
+
+
+def update_task(db: Session, task_id: int, data: TaskUpdate, *, user_id: int | None = None) -> TaskRead:
     task = db.get(Task, task_id)
-    if task is None:
+    if task is None or task.user_id != user_id:
         raise ValueError(f"Task {task_id} not found.")
+    if data.depends_on_ids:
+        _check_dependencies(db, [i for i in data.depends_on_ids if i != task_id], user_id=user_id)
 
     if data.title is not None:
         task.title = data.title.strip()[:200]
@@ -108,6 +239,18 @@ def update_task(db: Session, task_id: int, data: TaskUpdate) -> TaskRead:
     if data.due_at is not None:
         task.due_at = data.due_at
 
+    if data.recurrence is not None:
+        if not data.recurrence:
+            task.recurrence, task.recurrence_start = None, None
+        elif task.due_at is None:
+            raise ValueError("A recurring task needs due_at (its first occurrence).")
+        elif data.recurrence != task.recurrence or data.due_at is not None:
+            # A new rule (or a moved due date) restarts the series at the current due date.
+            task.recurrence, task.recurrence_start = data.recurrence, task.due_at
+
+    if data.status == "done" and task.recurrence and task.due_at is not None:
+        _advance_recurrence(db, task)
+
     for field in ("urgency", "importance", "impact", "effort_minutes", "optimistic_minutes", "most_likely_minutes", "pessimistic_minutes"):
         val = getattr(data, field)
         if val is not None:
@@ -117,27 +260,191 @@ def update_task(db: Session, task_id: int, data: TaskUpdate) -> TaskRead:
         task.external_constraints = data.external_constraints
 
     if data.required_resources is not None:
-        task.required_resources = list(data.required_resources)
+        _set_labels(task, LabelKind.resource, data.required_resources)
     if data.required_people is not None:
-        task.required_people = list(data.required_people)
+        _set_labels(task, LabelKind.person, data.required_people)
     if data.tags is not None:
-        task.tags = list(data.tags)
+        _set_labels(task, LabelKind.tag, data.tags)
+    if (data.required_resources, data.required_people, data.tags) != (None, None, None):
+        # Labels live in another table too; same as dependencies below.
+        task.updated_at = func.now()
+
+    if data.depends_on_ids is not None:
+        _set_dependencies(db, task.id, list(data.depends_on_ids), user_id=task.user_id)
+        # Edges live in another table; touch the row so updated_at/Last-Modified reflect the change.
+        task.updated_at = func.now()
 
     db.add(task)
-    db.commit()
+    _record_task_write(db, task)
+    read = _commit(db, task)
+    event_service.publish_task(read, user_id=task.user_id, created=False)
+    return read
+
+
+def _advance_recurrence(db: Session, task: Task) -> None:
+    # Record the occurrence just completed, then turn the row into the next one (if the series goes on).
+    now = datetime.now(tz=timezone.utc)
+    db.merge(TaskOccurrence(task_id=task.id, due_at=task.due_at, completed_at=now))
+    due = _as_utc(task.due_at)
+    next_due = Rule.parse(task.recurrence).after(
+        task.recurrence_start or due, max(due, now), tz=user_timezone(db, task.user_id)
+    )
+    if next_due is not None:
+        task.due_at = next_due
+        task.status = "planned"
+        task.completed_at = None
+
+
+def _as_utc(dt: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored in UTC.
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def user_timezone(db: Session, user_id: int | None) -> tzinfo:
+    """`user_id`'s timezone; UTC without a user or when theirs isn't a known zone name."""
+    if user_id is None:
+        return timezone.utc
+    name = db.execute(select(User.timezone).where(User.id == user_id)).scalar_one_or_none()
+    try:
+        return ZoneInfo(name) if name else timezone.utc
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def list_occurrences(
+    db: Session,
+    *,
+    start: datetime,
+    end: datetime,
+    user_id: int | None = None,
+    task_id: int | None = None,
+    limit: int = 1000,
+) -> list[TaskOccurrenceRead]:
+    """
+    Occurrences of recurring tasks due in [start, end), computed from each rule (in the
+    user's timezone) plus the recorded completions; nothing is materialized.
+    """
+    start, end = _as_utc(start), _as_utc(end)
+    stmt = select(Task.id, Task.title, Task.status, Task.due_at, Task.recurrence, Task.recurrence_start).where(
+        Task.recurrence.is_not(None), Task.status != "canceled", _of_user(Task.user_id, user_id)
+    )
+    if task_id is not None:
+        stmt = stmt.where(Task.id == task_id)
+    tasks = db.execute(stmt).all()
+    if not tasks:
+        return []
+
+    tz = user_timezone(db, user_id)
+    completed: dict[int, dict[datetime, datetime]] = {}
+    for occ in db.execute(
+        select(TaskOccurrence).where(
+            TaskOccurrence.task_id.in_([t.id for t in tasks]), TaskOccurrence.due_at >= start, TaskOccurrence.due_at < end
+        )
+    ).scalars():
+        completed.setdefault(occ.task_id, {})[_as_utc(occ.due_at)] = occ.completed_at
+
+    rows: list[tuple[datetime, int, str, str, datetime | None]] = []
+    for task in tasks:
+        done = completed.get(task.id, {})
+        current = _as_utc(task.due_at) if task.due_at is not None and task.status != "done" else None
+        anchor = _as_utc(task.recurrence_start or task.due_at)
+        due_dates = set(Rule.parse(task.recurrence).between(anchor, start, end, limit=limit, tz=tz)) | set(done)
+        if current is not None and start <= current < end:
+            due_dates.add(current)
+        for due in sorted(due_dates):
+            if due in done:
+                state, completed_at = "done", done[due]
+            elif due == current:
+                state, completed_at = "current", None
+            elif current is None or due < current:
+                state, completed_at = "missed", None
+            else:
+                state, completed_at = "upcoming", None
+            rows.append((due, task.id, task.title, state, completed_at))
+
+    rows.sort(key=lambda r: (r[0], r[1]))
+    return [
+        TaskOccurrenceRead(task_id=task_id, title=title, due_at=due, state=state, completed_at=completed_at)
+        for due, task_id, title, state, completed_at in rows[:limit]
+    ]
+
+
+def _commit(db: Session, task: Task) -> TaskRead:
+    # The response is built before the commit, so an idempotent request stores it in the same transaction.
+    db.flush()
     db.refresh(task)
+    read = _task_to_read(task)
+    idempotency_service.store_in_transaction(db, read)
+    db.commit()
+    return read
+
+
+def _record_task_write(db: Session, task: Task) -> None:
+    # Bookkeeping shared by every task mutation; runs in the caller's transaction.
+    task_cache.invalidate(db, user_id=task.user_id)
+    version_service.bump(db, user_id=task.user_id)
+    change_feed_service.record(db, user_id=task.user_id, entity=change_feed_service.ENTITY_TASK, entity_id=task.id)
+    search_service.index_task(db, task)
 
-    if data.depends_on_ids is not None:
-        _set_dependencies(db, task.id, list(data.depends_on_ids))
-        db.refresh(task)
 
-    return _task_to_read(db, task)
+def label_key(value: str) -> str:
+    """Lookup key of a tag/person/resource: what filters and workload group on."""
+    return " ".join(value.split()).casefold()[:200]
 
 
-def _set_dependencies(db: Session, task_id: int, depends_on_ids: list[int]) -> None:
-    # Replace strategy keeps it simple (fine for MVP).
+def _set_labels(task: Task, kind: LabelKind, values: Iterable[str]) -> None:
+    # Diff against the current rows: unchanged labels keep their row (no delete+insert of the same PK).
+    current = {label.key: label for label in task.labels if label.kind == kind.value}
+    wanted: list[TaskLabel] = []
+    for value in values:
+        value = " ".join(value.split())[:200]
+        key = label_key(value)
+        if not key or any(label.key == key for label in wanted):
+            continue
+        label = current.get(key) or TaskLabel(kind=kind.value, key=key)
+        label.value = value
+        label.position = len(wanted)
+        wanted.append(label)
+    task.labels = [label for label in task.labels if label.kind != kind.value] + wanted
+
+
+def _check_dependencies(db: Session, depends_on_ids: list[int], *, user_id: int | None) -> None:
+    # Before anything is written: a task may only depend on the same user's tasks.
+    wanted = set(depends_on_ids)
+    if not wanted:
+        return
+    found = set(db.execute(select(Task.id).where(Task.id.in_(wanted), _of_user(Task.user_id, user_id))).scalars())
+    if missing := sorted(wanted - found):
+        raise ValueError(f"Unknown dependency task id(s): {', '.join(map(str, missing))}.")
+
+
+def _set_dependencies(db: Session, task_id: int, depends_on_ids: list[int], *, user_id: int | None) -> None:
+    # Replace strategy keeps it simple (fine for MVP). Runs in the caller's transaction;
+    # the ids were checked with `_check_dependencies`.
+    old = set(db.execute(select(TaskDependency.depends_on_id).where(TaskDependency.task_id == task_id)).scalars())
+    new = {i for i in depends_on_ids if i != task_id}
+    if old == new:
+        return
+
+    task_cache.invalidate(db, user_id=user_id)
     db.execute(delete(TaskDependency).where(TaskDependency.task_id == task_id))
-    for dep_id in sorted({i for i in depends_on_ids if i != task_id}):
+    for dep_id in sorted(new):
         db.add(TaskDependency(task_id=task_id, depends_on_id=dep_id))
-    db.commit()
+
+    for dep_id in sorted(old - new):
+        change_feed_service.record(
+            db,
+            user_id=user_id,
+            entity=change_feed_service.ENTITY_DEPENDENCY,
+            entity_id=change_feed_service.dependency_key(task_id, dep_id),
+            op=change_feed_service.OP_DELETE,
+        )
+    for dep_id in sorted(new - old):
+        change_feed_service.record(
+            db,
+            user_id=user_id,
+            entity=change_feed_service.ENTITY_DEPENDENCY,
+            entity_id=change_feed_service.dependency_key(task_id, dep_id),
+        )
+    db.flush()
 
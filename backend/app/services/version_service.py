@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from backend.app.db.models import DataVersion
+
+
+def user_scope(user_id: int | None) -> str:
+    """Scope of one user's tasks; tasks without a user (`user_id=None`) are a scope of their own."""
+    return f"user:{user_id}" if user_id is not None else "user:none"
+
+
+def weights_scope(user_id: int) -> str:
+    """Scope of a user's learned priority weights, versioned apart from their tasks."""
+    return f"weights:{user_id}"
+
+
+def _upsert(db: Session, scope: str, now: datetime) -> None:
+    dialect = db.get_bind().dialect.name
+    if dialect in {"sqlite", "postgresql"}:
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+
+        stmt = insert(DataVersion).values(scope=scope, version=1, updated_at=now)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DataVersion.scope],
+            set_={"version": DataVersion.version + 1, "updated_at": now},
+        )
+        db.execute(stmt)
+        return
+
+    res = db.execute(
+        update(DataVersion)
+        .where(DataVersion.scope == scope)
+        .values(version=DataVersion.version + 1, updated_at=now)
+    )
+    if res.rowcount == 0:
+        db.add(DataVersion(scope=scope, version=1, updated_at=now))
+
+
+def bump(db: Session, *, user_id: int | None) -> None:
+    """Record a task write for `user_id`; call inside the writing transaction (caller commits)."""
+    _upsert(db, user_scope(user_id), datetime.now(tz=timezone.utc))
+
+
+def bump_weights(db: Session, *, user_id: int) -> None:
+    """Record new learned weights for `user_id` (caller commits); their task caches and ETags stay valid."""
+    _upsert(db, weights_scope(user_id), datetime.now(tz=timezone.utc))
+
+
+def get_version(db: Session, scope: str) -> tuple[int, datetime | None]:
+    """Return `(version, last_modified)`; `(0, None)` if nothing was ever written in the scope."""
+    row = db.execute(select(DataVersion.version, DataVersion.updated_at).where(DataVersion.scope == scope)).first()
+    if row is None:
+        return 0, None
+    return int(row.version), row.updated_at
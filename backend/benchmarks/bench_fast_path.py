@@ -0,0 +1,113 @@
+"""
+Hit rate and latency of the chat fast path (`backend/app/llm/fast_path.py`).
+
+Replays a mixed corpus of chat messages (structured commands and free-form requests)
+through `run_chat` twice against a seeded database — once with the fast path, once
+with every message sent to the (mock, latency-injected) LLM — and reports the hit
+rate, LLM calls saved and latency of hits vs misses.
+
+    python -m backend.benchmarks.bench_fast_path
+    python -m backend.benchmarks.bench_fast_path --llm-latency-ms 800 --tasks 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from typing import Any
+
+from sqlalchemy import select
+
+from backend.app.db.models import Task
+from backend.app.llm import fast_path
+from backend.app.llm.client import LLMClient, LLMMessage
+from backend.app.llm.orchestrator import run_chat
+from backend.app.schemas import ChatRequest
+from backend.benchmarks.common import LatencySummary, make_engine, make_sessionmaker
+from backend.benchmarks.load_test import LatencyInjectingLLMClient
+from backend.benchmarks.seed import add_seed_arguments, config_from_args, seed
+
+
+# "{id}" is replaced with one of the user's task ids.
+CORPUS = [
+    "List my tasks.",
+    "show my tasks",
+    "what are my tasks?",
+    "show done tasks",
+    "Prioritize my tasks",
+    "What should I do next?",
+    "mark task {id} done",
+    "complete #{id}",
+    "Add call the dentist due tomorrow",
+    "add task: pay rent by friday at 9am",
+    "Tomorrow I need to call the bank about my car loan.",
+    "Remind me to renew my passport before the summer trip",
+    "I have a report due Friday and slides for Monday, which first?",
+    "Can you move my dentist appointment to next week?",
+    "Break down 'plan offsite' into smaller tasks",
+    "buy groceries",
+    "what did I finish yesterday?",
+    "mark task {id} as important",
+    "I finished the taxes, also add a follow-up with the accountant",
+    "how likely am I to finish the slides today?",
+]
+
+
+class _CountingClient(LLMClient):
+    def __init__(self, inner: LLMClient) -> None:
+        self.inner = inner
+        self.calls = 0
+
+    def complete(self, *, messages: list[dict[str, Any]], tools: list[dict[str, Any]]) -> LLMMessage:
+        self.calls += 1
+        return self.inner.complete(messages=messages, tools=tools)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5, help="Passes over the corpus per mode.")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="Injected delay per mock LLM call.")
+    add_seed_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ai-todo-bench-") as tmpdir:
+        engine = make_engine(f"sqlite:///{os.path.join(tmpdir, 'bench.db')}")
+        seed(engine, config_from_args(args))
+        SessionLocal = make_sessionmaker(engine)
+        with SessionLocal() as db:
+            task_ids = list(db.execute(select(Task.id).where(Task.user_id == 1).limit(args.rounds * 4)).scalars())
+
+        hits = sum(fast_path.match(m.format(id=1)) is not None for m in CORPUS)
+        print(f"hit rate: {hits}/{len(CORPUS)} corpus messages ({hits / len(CORPUS):.0%})")
+
+        start = time.perf_counter()
+        n = 0
+        for _ in range(200):
+            for m in CORPUS:
+                fast_path.match(m)
+                n += 1
+        print(f"matcher: {(time.perf_counter() - start) / n * 1e6:.1f}us per message")
+
+        for use_fast_path in (False, True):
+            llm = _CountingClient(LatencyInjectingLLMClient(args.llm_latency_ms / 1000.0))
+            samples: dict[bool, list[float]] = {True: [], False: []}
+            ids = iter(task_ids * 2)
+            for _ in range(args.rounds):
+                for template in CORPUS:
+                    message = template.format(id=next(ids)) if "{id}" in template else template
+                    hit = fast_path.match(message) is not None
+                    with SessionLocal() as db:
+                        start = time.perf_counter()
+                        run_chat(db, request=ChatRequest(message=message, user_id=1), llm_client=llm, use_fast_path=use_fast_path)
+                        samples[hit].append(time.perf_counter() - start)
+            mode = "fast_path" if use_fast_path else "llm_only"
+            print(f"{mode}: {llm.calls} LLM calls")
+            for hit, label in ((True, "commands"), (False, "free-form")):
+                print(LatencySummary.from_samples(f"  {mode} {label}", samples[hit]).row())
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Micro-benchmarks for the scoring kernels.
+
+Measures `prioritizer.compute_priority_score`, `prioritizer.estimate_completion_chance`,
+end-to-end `prioritizer.prioritize`, and the PERT math in `task_formats.ToDoTask`
+over reproducible populations (see `populations.SHAPES`).
+
+Alternative engines can be compared head-to-head with the reference implementation:
+an engine is any callable with `prioritize`'s signature. Results are checked for
+agreement (same scores/chances within tolerance, same ordering) before timing.
+
+    python -m backend.benchmarks.bench_prioritizer
+    python -m backend.benchmarks.bench_prioritizer --sizes 1000 100000 --shapes due_soon
+    python -m backend.benchmarks.bench_prioritizer --engine mypkg.fast:prioritize --json out.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+from pathlib import Path
+from typing import Callable
+
+from backend.app.schemas import PrioritizedTask, TaskRead
+from backend.app.services import prioritizer
+from backend.benchmarks.harness import Benchmark, BenchStats
+from backend.benchmarks.populations import AS_OF, SHAPES, make_task_inputs, make_tasks
+from backend.task_formats import ToDoTask
+
+
+Engine = Callable[..., list[PrioritizedTask]]
+
+ENGINES: dict[str, Engine] = {"reference": prioritizer.prioritize}
+
+
+def load_engine(spec: str) -> tuple[str, Engine]:
+    """Resolve `package.module:function` to a prioritize-compatible callable."""
+    module_name, _, attr = spec.partition(":")
+    fn = getattr(importlib.import_module(module_name), attr or "prioritize")
+    return spec, fn
+
+
+def check_agreement(
+    reference: list[PrioritizedTask],
+    candidate: list[PrioritizedTask],
+    *,
+    tol: float = 1e-9,
+) -> list[str]:
+    """Describe differences between two engines' outputs (empty list = equivalent)."""
+    problems: list[str] = []
+    if len(reference) != len(candidate):
+        return [f"result count {len(reference)} != {len(candidate)}"]
+
+    ref_by_id = {r.task_id: r for r in reference}
+    for c in candidate:
+        r = ref_by_id.get(c.task_id)
+        if r is None:
+            problems.append(f"unexpected task_id {c.task_id}")
+            continue
+        if abs(r.priority_score - c.priority_score) > tol:
+            problems.append(f"task {c.task_id}: score {r.priority_score} != {c.priority_score}")
+        if (r.completion_chance is None) != (c.completion_chance is None) or (
+            r.completion_chance is not None and abs(r.completion_chance - c.completion_chance) > tol
+        ):
+            problems.append(f"task {c.task_id}: chance {r.completion_chance} != {c.completion_chance}")
+        if len(problems) >= 10:
+            break
+
+    # Ties may be broken differently; compare the ordering of scores, not ids.
+    ref_scores = [round(r.priority_score, 9) for r in reference]
+    cand_scores = [round(c.priority_score, 9) for c in candidate]
+    if ref_scores != cand_scores:
+        problems.append("ordering differs")
+    return problems
+
+
+def bench_score_kernel(benchmark: Benchmark, tasks: list[TaskRead], unblocks: dict[int, int]) -> None:
+    def run() -> None:
+        for t in tasks:
+            prioritizer.compute_priority_score(t, unblocks_count=unblocks.get(t.id, 0), as_of=AS_OF)
+
+    benchmark.items = len(tasks)
+    benchmark(run)
+
+
+def bench_chance_kernel(benchmark: Benchmark, tasks: list[TaskRead]) -> None:
+    def run() -> None:
+        for t in tasks:
+            prioritizer.estimate_completion_chance(t, as_of=AS_OF)
+
+    benchmark.items = len(tasks)
+    benchmark(run)
+
+
+def bench_prioritize(benchmark: Benchmark, engine: Engine, tasks: list[TaskRead], unblocks: dict[int, int]) -> None:
+    benchmark.items = len(tasks)
+    benchmark(engine, tasks, unblocks_by_task_id=unblocks, as_of=AS_OF)
+
+
+def bench_pert(benchmark: Benchmark, n: int) -> None:
+    inputs = make_task_inputs(n)
+
+    def run() -> None:
+        for ti in inputs:
+            ToDoTask(ti)
+
+    benchmark.items = n
+    benchmark(run)
+
+
+def run(
+    *,
+    sizes: list[int],
+    shapes: list[str],
+    engines: dict[str, Engine],
+    min_time_s: float,
+) -> tuple[list[BenchStats], list[str]]:
+    results: list[BenchStats] = []
+    disagreements: list[str] = []
+
+    def _record(b: Benchmark) -> None:
+        assert b.stats is not None
+        results.append(b.stats)
+        print(b.stats.row())
+
+    for n in sizes:
+        for shape in shapes:
+            tasks, unblocks = make_tasks(n, shape)
+
+            b = Benchmark(f"score[{shape}-{n}]", min_time_s=min_time_s)
+            bench_score_kernel(b, tasks, unblocks)
+            _record(b)
+
+            b = Benchmark(f"chance[{shape}-{n}]", min_time_s=min_time_s)
+            bench_chance_kernel(b, tasks)
+            _record(b)
+
+            reference = prioritizer.prioritize(tasks, unblocks_by_task_id=unblocks, as_of=AS_OF)
+            for engine_name, engine in engines.items():
+                if engine is not prioritizer.prioritize:
+                    candidate = engine(tasks, unblocks_by_task_id=unblocks, as_of=AS_OF)
+                    for p in check_agreement(reference, candidate):
+                        disagreements.append(f"{engine_name} [{shape}-{n}]: {p}")
+                b = Benchmark(f"prioritize:{engine_name}[{shape}-{n}]", min_time_s=min_time_s)
+                bench_prioritize(b, engine, tasks, unblocks)
+                _record(b)
+
+        b = Benchmark(f"pert[{n}]", min_time_s=min_time_s)
+        bench_pert(b, n)
+        _record(b)
+
+    return results, disagreements
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--engine", action="append", default=[], help="module:function to compare (repeatable).")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Target seconds per benchmark.")
+    parser.add_argument("--json", metavar="PATH", help="Write results as JSON.")
+    args = parser.parse_args()
+
+    engines = dict(ENGINES)
+    for spec in args.engine:
+        name, fn = load_engine(spec)
+        engines[name] = fn
+
+    results, disagreements = run(sizes=args.sizes, shapes=args.shapes, engines=engines, min_time_s=args.min_time)
+
+    if disagreements:
+        print("\nEngine disagreements:")
+        for d in disagreements:
+            print(f"  - {d}")
+
+    if args.json:
+        payload = {"results": [r.as_dict() for r in results], "disagreements": disagreements}
+        Path(args.json).write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+
+    if disagreements:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Throughput of the production server (`gunicorn.conf.py`) as workers are added.
+
+Seeds a database, then for each worker count starts gunicorn, warms it up and drives
+one endpoint for `--seconds` from an async client with `--concurrency-per-worker`
+requests in flight per worker. Reports latency, requests/s, speedup over one worker
+and scaling efficiency (speedup / workers; 1.0 = linear).
+
+    python -m backend.benchmarks.bench_scaling --workers 1 2 4 --scenario prioritize
+    python -m backend.benchmarks.bench_scaling --db sqlite:///./app.db --skip-seed --seconds 20
+
+Scaling is only meaningful up to the CPUs available here (the client needs some too):
+worker counts above that are still run, and flagged.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx  # installed with the openai SDK
+
+from backend.benchmarks.bench_startup import _free_port
+from backend.benchmarks.common import LatencySummary, make_engine, write_report
+from backend.benchmarks.seed import add_seed_arguments, config_from_args, seed
+
+
+SCENARIOS: dict[str, tuple[str, str, dict | None]] = {
+    "tasks": ("GET", "/v1/tasks", None),
+    "prioritize": ("POST", "/v1/prioritize", {}),
+    "health": ("GET", "/health", None),
+}
+
+
+def _cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def start_server(url: str, workers: int, *, timeout_s: float = 60.0) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": url,
+        "PORT": str(port),
+        "WEB_CONCURRENCY": str(workers),
+        "ARCHIVE_INTERVAL_SECONDS": "0",
+        "PRIORITY_LEARNING_INTERVAL_SECONDS": "0",
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "backend.main:app", "-c", "gunicorn.conf.py", "--log-level", "warning"],
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.perf_counter() + timeout_s
+    with httpx.Client(base_url=base_url, timeout=5.0) as client:
+        while True:
+            if proc.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with {proc.returncode}")
+            if time.perf_counter() > deadline:
+                proc.terminate()
+                raise RuntimeError(f"no answer on /health within {timeout_s:.0f}s")
+            try:
+                if client.get("/health").status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            time.sleep(0.05)
+    return proc, base_url
+
+
+async def drive(base_url: str, scenario: str, *, concurrency: int, seconds: float) -> tuple[list[float], float, int]:
+    method, path, body = SCENARIOS[scenario]
+    samples: list[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    # The first seeded user; requests without one only see tasks that have no user.
+    headers = {"X-User-Id": "1"}
+    async with httpx.AsyncClient(base_url=base_url, timeout=30.0, limits=limits, headers=headers) as client:
+        # Every worker loads its caches (and pools) before the clock starts.
+        await asyncio.gather(*(client.request(method, path, json=body) for _ in range(concurrency * 2)))
+        stop_at = time.perf_counter() + seconds
+
+        async def worker() -> None:
+            nonlocal errors
+            while time.perf_counter() < stop_at:
+                start = time.perf_counter()
+                resp = await client.request(method, path, json=body)
+                samples.append(time.perf_counter() - start)
+                if resp.status_code >= 400:
+                    errors += 1
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - wall_start
+    return samples, wall, errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="Database URL (default: a fresh temporary SQLite file).")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an already seeded --db.")
+    parser.add_argument("--workers", type=int, nargs="+", help="Worker counts (default: 1, 2, 4, ... up to CPUs).")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="prioritize")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Measured time per worker count.")
+    parser.add_argument("--concurrency-per-worker", type=int, default=4)
+    parser.add_argument("--save", metavar="PATH", help="Write results as a JSON report.")
+    add_seed_arguments(parser)
+    args = parser.parse_args()
+
+    cpus = _cpus()
+    counts = args.workers
+    if not counts:
+        counts = [1]
+        while counts[-1] * 2 <= cpus:
+            counts.append(counts[-1] * 2)
+
+    tmpdir = None
+    url = args.db
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory(prefix="ai-todo-bench-")
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    summaries: list[LatencySummary] = []
+    try:
+        if not args.skip_seed:
+            engine = make_engine(url)
+            print(f"Seeded {seed(engine, config_from_args(args))}")
+            engine.dispose()
+        base_rps: float | None = None
+        for workers in counts:
+            proc, base_url = start_server(url, workers)
+            try:
+                samples, wall, errors = asyncio.run(
+                    drive(base_url, args.scenario, concurrency=workers * args.concurrency_per_worker, seconds=args.seconds)
+                )
+            finally:
+                proc.terminate()
+                proc.wait(timeout=30)
+            rps = len(samples) / wall
+            base_rps = base_rps or rps
+            speedup = rps / base_rps
+            summary = LatencySummary.from_samples(
+                f"{args.scenario}[workers={workers}]",
+                samples,
+                wall_s=wall,
+                speedup=round(speedup, 2),
+                efficiency=round(speedup / workers, 2),
+                errors=errors,
+            )
+            if workers > cpus:
+                summary.extra["note"] = f"more workers than the {cpus} CPU(s) here"
+            summaries.append(summary)
+            print(summary.row())
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    if args.save:
+        write_report(
+            args.save,
+            summaries,
+            config={"cpus": cpus, "scenario": args.scenario, "seconds": args.seconds, "tasks": args.tasks},
+        )
+        print(f"Report written to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Before/after benchmark for TaskRead list hydration and serialization.
+
+`legacy_*` reproduce the previous path: one dependency query per task, field-by-field
+`TaskRead(...)`, FastAPI-style `response_model` re-validation + JSON encoding, and
+per-task `model_dump()` + `json.dumps(default=str)` for tool results. The current
+path is `task_service.list_tasks` + `TaskReadList.dump_json` (REST) or
+`TaskReadList.dump_python(mode="json")` (tools).
+
+    python -m backend.benchmarks.bench_serialization --tasks 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.app.db.models import Task, TaskDependency, User
+from backend.app.schemas import TaskRead, TaskReadList
+from backend.app.services import task_cache, task_service
+from backend.benchmarks import harness
+from backend.benchmarks.common import make_engine, make_sessionmaker
+from backend.benchmarks.seed import SeedConfig, seed
+
+
+_sessions: sessionmaker[Session] | None = None
+_user_id: int | None = None
+_limit = 200
+
+
+def legacy_task_to_read(db: Session, task: Task) -> TaskRead:
+    depends_on_ids = list(
+        db.execute(select(TaskDependency.depends_on_id).where(TaskDependency.task_id == task.id)).scalars().all()
+    )
+    return TaskRead(
+        id=task.id,
+        title=task.title,
+        description=task.description,
+        status=task.status,
+        due_at=task.due_at,
+        urgency=task.urgency,
+        importance=task.importance,
+        impact=task.impact,
+        effort_minutes=task.effort_minutes,
+        optimistic_minutes=task.optimistic_minutes,
+        most_likely_minutes=task.most_likely_minutes,
+        pessimistic_minutes=task.pessimistic_minutes,
+        external_constraints=task.external_constraints,
+        required_resources=task.required_resources or [],
+        required_people=task.required_people or [],
+        tags=task.tags or [],
+        depends_on_ids=depends_on_ids,
+        created_at=task.created_at,
+        updated_at=task.updated_at,
+        completed_at=task.completed_at,
+    )
+
+
+def legacy_list_tasks(db: Session, user_id: int | None, limit: int) -> list[TaskRead]:
+    tasks = db.execute(
+        select(Task).where(Task.user_id == user_id).order_by(Task.created_at.desc()).limit(limit)
+    ).scalars().all()
+    return [legacy_task_to_read(db, t) for t in tasks]
+
+
+def legacy_rest_body(tasks: list[TaskRead]) -> bytes:
+    # What FastAPI does for `response_model=list[TaskRead]` with a JSONResponse.
+    content = [t.model_dump() for t in tasks]
+    validated = TaskReadList.validate_python(content)
+    return json.dumps(TaskReadList.dump_python(validated, mode="json"), separators=(",", ":")).encode()
+
+
+def legacy_tool_message(tasks: list[TaskRead]) -> str:
+    return json.dumps({"ok": True, "result": [t.model_dump() for t in tasks]}, default=str)
+
+
+def _legacy_tasks() -> list[TaskRead]:
+    # A fresh session each time: hydration from rows, not identity-map or per-request cache hits.
+    assert _sessions is not None
+    with _sessions() as db:
+        return legacy_list_tasks(db, _user_id, _limit)
+
+
+def _current_tasks() -> list[TaskRead]:
+    assert _sessions is not None
+    with _sessions() as db:
+        return task_service.list_tasks(db, user_id=_user_id, limit=_limit)
+
+
+def _checked(tasks: list[TaskRead]) -> list[TaskRead]:
+    # A list that came back short (wrong user, say) would make any comparison meaningless.
+    assert len(tasks) == _limit, f"expected {_limit} tasks, got {len(tasks)}"
+    return tasks
+
+
+def bench_hydrate_legacy(benchmark: harness.Benchmark) -> None:
+    _checked(_legacy_tasks())
+    benchmark.items = _limit
+    benchmark(_legacy_tasks)
+
+
+def bench_hydrate_current(benchmark: harness.Benchmark) -> None:
+    _checked(_current_tasks())
+    benchmark.items = _limit
+    benchmark(_current_tasks)
+
+
+def bench_rest_body_legacy(benchmark: harness.Benchmark) -> None:
+    tasks = _checked(_current_tasks())
+    benchmark.items = len(tasks)
+    benchmark(legacy_rest_body, tasks)
+
+
+def bench_rest_body_current(benchmark: harness.Benchmark) -> None:
+    tasks = _checked(_current_tasks())
+    benchmark.items = len(tasks)
+    benchmark(TaskReadList.dump_json, tasks)
+
+
+def bench_tool_message_legacy(benchmark: harness.Benchmark) -> None:
+    tasks = _checked(_current_tasks())
+    benchmark.items = len(tasks)
+    benchmark(legacy_tool_message, tasks)
+
+
+def bench_tool_message_current(benchmark: harness.Benchmark) -> None:
+    tasks = _checked(_current_tasks())
+    benchmark.items = len(tasks)
+    benchmark(lambda: json.dumps({"ok": True, "result": TaskReadList.dump_python(tasks, mode="json")}))
+
+
+def bench_end_to_end_legacy(benchmark: harness.Benchmark) -> None:
+    _checked(_legacy_tasks())
+    benchmark.items = _limit
+    benchmark(lambda: legacy_rest_body(_legacy_tasks()))
+
+
+def bench_end_to_end_current(benchmark: harness.Benchmark) -> None:
+    _checked(_current_tasks())
+    benchmark.items = _limit
+    benchmark(lambda: TaskReadList.dump_json(_current_tasks()))
+
+
+def main() -> None:
+    global _sessions, _user_id, _limit
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=200, help="Tasks per list (also the seeded row count).")
+    parser.add_argument("--min-time", type=float, default=0.5)
+    parser.add_argument("-k", dest="pattern", help="Only run benchmarks whose name contains this.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ai-todo-bench-") as tmp:
+        engine = make_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        seed(engine, SeedConfig(users=1, tasks=args.tasks, deps_per_task=1.0, day_score_days=0))
+        _sessions = make_sessionmaker(engine)
+        with _sessions() as db:
+            _user_id = db.execute(select(User.id).order_by(User.id).limit(1)).scalar_one()
+        _limit = args.tasks
+        # Hydration is what's measured: keep the shared task cache out of it.
+        task_cache.shared.max_entries = 0
+        try:
+            harness.run_module(sys.modules[__name__], pattern=args.pattern, min_time_s=args.min_time)
+        finally:
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
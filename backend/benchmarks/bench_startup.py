@@ -0,0 +1,193 @@
+"""
+Cold-start benchmark: import time of the API and time to first request.
+
+Every measurement runs in a fresh interpreter, like a new worker after a deploy or an
+idle spin-down:
+- `import`: `python -X importtime -c "import backend.app.main"`, with the slowest
+  modules and the split by top-level package;
+- `boot_upgrade`: start uvicorn on a database `init_db` hasn't marked current yet
+  (migration checks + `create_all`) until `/health` answers;
+- `boot`: the same on a database already up to date (the usual restart);
+- `first_request`: the first `GET /v1/tasks` after `/health` answers.
+
+    python -m backend.benchmarks.bench_startup --runs 5
+    python -m backend.benchmarks.bench_startup --db sqlite:///./app.db --skip-seed --target-ms 1500
+    python -m backend.benchmarks.bench_startup --save-baseline startup_baseline.json
+
+Exits non-zero when the median boot plus first request exceeds `--target-ms`, or
+when `--baseline` is given and a result regressed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx  # installed with the openai SDK
+
+from backend.benchmarks.common import LatencySummary, compare_to_baseline, make_engine, write_report
+from backend.benchmarks.seed import add_seed_arguments, config_from_args, seed
+
+
+APP = "backend.main:app"
+
+
+def import_times(module: str = "backend.app.main") -> tuple[float, list[tuple[str, float, float]]]:
+    """Total seconds to import `module`, and (module, self s, cumulative s) for every module loaded."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows: list[tuple[str, float, float]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        rows.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    total = sum(self_s for _, self_s, _ in rows)
+    return total, rows
+
+
+def print_import_report(rows: list[tuple[str, float, float]], *, top: int) -> None:
+    by_package: dict[str, float] = defaultdict(float)
+    for name, self_s, _ in rows:
+        root = name.split(".")[0]
+        by_package["backend" if root == "backend" else root] += self_s
+    print("import time by top-level package (self time):")
+    for root, seconds in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"  {root:<28} {seconds * 1000:8.1f}ms")
+    print(f"slowest modules (cumulative):")
+    for name, _, cumulative in sorted(rows, key=lambda r: -r[2])[:top]:
+        print(f"  {name:<48} {cumulative * 1000:8.1f}ms")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def boot(url: str, *, timeout_s: float = 60.0) -> tuple[float, float]:
+    """Start uvicorn against `url`; seconds until `/health` answers, then for the first `/v1/tasks`."""
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": url,
+        "DB_AUTO_CREATE": "true",
+        "ARCHIVE_INTERVAL_SECONDS": "0",
+        "PRIORITY_LEARNING_INTERVAL_SECONDS": "0",
+    }
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", APP, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=10.0) as client:
+            while True:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with {proc.returncode}")
+                if time.perf_counter() - start > timeout_s:
+                    raise RuntimeError(f"no answer on /health within {timeout_s:.0f}s")
+                try:
+                    if client.get("/health").status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.005)
+            ready = time.perf_counter() - start
+            first = time.perf_counter()
+            client.get("/v1/tasks", params={"limit": 50}, headers={"X-User-Id": "1"}).raise_for_status()
+            return ready, time.perf_counter() - first
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="Database URL (default: a fresh temporary SQLite file).")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an already seeded --db.")
+    parser.add_argument("--runs", type=int, default=5, help="Boots on an up-to-date schema (and imports).")
+    parser.add_argument("--top", type=int, default=15, help="Rows in the import-time report.")
+    parser.add_argument("--target-ms", type=float, default=1500.0, help="Budget for median boot + first request.")
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write results as a JSON baseline.")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against a JSON baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50 regression (0.25 = 25%%).")
+    add_seed_arguments(parser)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.db
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory(prefix="ai-todo-bench-")
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    try:
+        if not args.skip_seed:
+            # Seeded without `init_db`, so the first boot runs the full schema upgrade.
+            engine = make_engine(url)
+            counts = seed(engine, config_from_args(args))
+            engine.dispose()
+            print(f"Seeded {counts}")
+
+        imports: list[float] = []
+        rows: list[tuple[str, float, float]] = []
+        for _ in range(args.runs):
+            total, rows = import_times()
+            imports.append(total)
+        print_import_report(rows, top=args.top)
+
+        upgrade_ready, upgrade_first = boot(url)
+        ready: list[float] = []
+        first: list[float] = []
+        for _ in range(args.runs):
+            r, f = boot(url)
+            ready.append(r)
+            first.append(f)
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    summaries = [
+        LatencySummary.from_samples("import", imports),
+        LatencySummary.from_samples("boot_upgrade", [upgrade_ready], first_request_ms=round(upgrade_first * 1000, 1)),
+        LatencySummary.from_samples("boot", ready),
+        LatencySummary.from_samples("first_request", first),
+    ]
+    print()
+    for s in summaries:
+        print(s.row())
+    ttfr_ms = (statistics.median(ready) + statistics.median(first)) * 1000
+    print(f"time to first request: {ttfr_ms:.0f}ms (target {args.target_ms:.0f}ms)")
+
+    failed = ttfr_ms > args.target_ms
+    config = {"tasks": args.tasks, "runs": args.runs, "target_ms": args.target_ms}
+    if args.save_baseline:
+        write_report(args.save_baseline, summaries, config=config)
+        print(f"Baseline written to {args.save_baseline}")
+    if args.baseline:
+        problems = compare_to_baseline(args.baseline, summaries, tolerance=args.tolerance, metric="p50_ms")
+        if problems:
+            print("Regressions:")
+            for p in problems:
+                print(f"  - {p}")
+            failed = True
+        else:
+            print("No regressions versus baseline.")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
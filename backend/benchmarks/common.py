@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import json
+import math
+import platform
+import statistics
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from backend.app.core import metrics
+from backend.app.db.base import Base
+from backend.app.db import models as _models  # noqa: F401
+from backend.app.services import search_service
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+@dataclass
+class LatencySummary:
+    name: str
+    count: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    max_ms: float
+    throughput_rps: float | None = None
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_samples(
+        cls,
+        name: str,
+        samples_s: list[float],
+        *,
+        wall_s: float | None = None,
+        **extra: Any,
+    ) -> "LatencySummary":
+        values = sorted(samples_s)
+
+        def _ms(v: float) -> float:
+            return round(v * 1000.0, 3)
+
+        return cls(
+            name=name,
+            count=len(values),
+            p50_ms=_ms(percentile(values, 50)),
+            p95_ms=_ms(percentile(values, 95)),
+            p99_ms=_ms(percentile(values, 99)),
+            mean_ms=_ms(statistics.fmean(values)) if values else 0.0,
+            max_ms=_ms(values[-1]) if values else 0.0,
+            throughput_rps=round(len(values) / wall_s, 2) if wall_s else None,
+            extra=extra,
+        )
+
+    def row(self) -> str:
+        rps = f"{self.throughput_rps:>9.1f}" if self.throughput_rps is not None else f"{'-':>9}"
+        extra = " ".join(f"{k}={v}" for k, v in self.extra.items())
+        return (
+            f"{self.name:<28} n={self.count:<6} p50={self.p50_ms:>9.3f}ms p95={self.p95_ms:>9.3f}ms "
+            f"p99={self.p99_ms:>9.3f}ms rps={rps} {extra}"
+        ).rstrip()
+
+
+def environment() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "platform": platform.platform(terse=True),
+        "recorded_at": datetime.now(tz=timezone.utc).isoformat(),
+    }
+
+
+def write_report(path: str | Path, summaries: list[LatencySummary], *, config: dict[str, Any]) -> None:
+    payload = {
+        "environment": environment(),
+        "config": config,
+        "results": {s.name: asdict(s) for s in summaries},
+    }
+    Path(path).write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def compare_to_baseline(
+    baseline_path: str | Path,
+    summaries: list[LatencySummary],
+    *,
+    tolerance: float,
+    metric: str = "p95_ms",
+) -> list[str]:
+    """
+    Return human-readable regressions versus a saved report.
+
+    A result regresses when `metric` grows by more than `tolerance` (0.2 = 20%), or
+    when it issues more queries per request than the baseline did.
+    """
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8")).get("results", {})
+    problems: list[str] = []
+    for s in summaries:
+        base = baseline.get(s.name)
+        if base is None:
+            continue
+        old = float(base.get(metric) or 0.0)
+        new = float(getattr(s, metric))
+        if old > 0 and new > old * (1.0 + tolerance):
+            problems.append(f"{s.name}: {metric} {old:.3f} -> {new:.3f} (+{(new / old - 1.0) * 100:.0f}%)")
+        old_q = (base.get("extra") or {}).get("queries_per_request")
+        new_q = s.extra.get("queries_per_request")
+        if old_q is not None and new_q is not None and new_q > old_q + 1e-9:
+            problems.append(f"{s.name}: queries/request {old_q} -> {new_q}")
+    return problems
+
+
+def make_engine(url: str) -> Engine:
+    """Engine + schema for a benchmark database, instrumented like the app engine."""
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    engine = create_engine(url, future=True, connect_args=connect_args)
+    metrics.instrument_engine(engine)
+    Base.metadata.create_all(bind=engine)
+    search_service.ensure_index(engine)
+    return engine
+
+
+def make_sessionmaker(engine: Engine) -> sessionmaker[Session]:
+    return sessionmaker(bind=engine, class_=Session, autoflush=False, autocommit=False, expire_on_commit=False)
@@ -0,0 +1,155 @@
+"""
+Tiny pytest-benchmark-style harness.
+
+Benchmarks are plain functions named `bench_*` that take a `benchmark` argument
+and call `benchmark(fn, *args, **kwargs)`, exactly as with the pytest-benchmark
+fixture, so they can be moved under that plugin unchanged. `run_module` discovers
+and runs them without any third-party dependency.
+"""
+
+from __future__ import annotations
+
+import gc
+import inspect
+import statistics
+import time
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import Any, Callable
+
+
+@dataclass
+class BenchStats:
+    name: str
+    rounds: int
+    iterations: int
+    min_s: float
+    median_s: float
+    mean_s: float
+    stddev_s: float
+    # Items processed per call (e.g. tasks scored); enables per-item cost.
+    items: int | None = None
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def per_item_ns(self) -> float | None:
+        if not self.items:
+            return None
+        return self.median_s / self.items * 1e9
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "rounds": self.rounds,
+            "iterations": self.iterations,
+            "min_us": round(self.min_s * 1e6, 3),
+            "median_us": round(self.median_s * 1e6, 3),
+            "mean_us": round(self.mean_s * 1e6, 3),
+            "stddev_us": round(self.stddev_s * 1e6, 3),
+            "items": self.items,
+            "per_item_ns": round(self.per_item_ns, 1) if self.per_item_ns is not None else None,
+            **self.extra,
+        }
+
+    def row(self) -> str:
+        per_item = f"{self.per_item_ns:>10.1f} ns/item" if self.per_item_ns is not None else ""
+        return (
+            f"{self.name:<44} median={self.median_s * 1e6:>12.2f}us min={self.min_s * 1e6:>12.2f}us "
+            f"stddev={self.stddev_s * 1e6:>10.2f}us rounds={self.rounds:<4} {per_item}"
+        ).rstrip()
+
+
+class Benchmark:
+    """Callable fixture: `result = benchmark(fn, *args, **kwargs)`."""
+
+    def __init__(self, name: str, *, min_time_s: float = 0.2, max_rounds: int = 200, min_rounds: int = 5) -> None:
+        self.name = name
+        self.min_time_s = min_time_s
+        self.max_rounds = max_rounds
+        self.min_rounds = min_rounds
+        self.items: int | None = None
+        self.extra_info: dict[str, Any] = {}
+        self.stats: BenchStats | None = None
+
+    def _calibrate(self, fn: Callable[[], Any]) -> int:
+        # Pick iterations per round so one round takes >= ~1ms (timer resolution noise).
+        iterations = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(iterations):
+                fn()
+            if time.perf_counter() - start >= 1e-3 or iterations >= 1_000_000:
+                return iterations
+            iterations *= 10
+
+    def pedantic(self, fn: Callable[..., Any], args: tuple = (), kwargs: dict | None = None, *, rounds: int, iterations: int = 1) -> Any:
+        kwargs = kwargs or {}
+        result = fn(*args, **kwargs)
+        timings = self._measure(lambda: fn(*args, **kwargs), rounds=rounds, iterations=iterations)
+        self._record(timings, iterations)
+        return result
+
+    def __call__(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        call = lambda: fn(*args, **kwargs)  # noqa: E731
+        result = call()
+        iterations = self._calibrate(call)
+
+        start = time.perf_counter()
+        call()
+        per_round = max((time.perf_counter() - start) * iterations, 1e-9)
+        rounds = int(min(self.max_rounds, max(self.min_rounds, self.min_time_s / per_round)))
+
+        timings = self._measure(call, rounds=rounds, iterations=iterations)
+        self._record(timings, iterations)
+        return result
+
+    def _measure(self, call: Callable[[], Any], *, rounds: int, iterations: int) -> list[float]:
+        timings: list[float] = []
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(rounds):
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    call()
+                timings.append((time.perf_counter() - start) / iterations)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        return timings
+
+    def _record(self, timings: list[float], iterations: int) -> None:
+        self.stats = BenchStats(
+            name=self.name,
+            rounds=len(timings),
+            iterations=iterations,
+            min_s=min(timings),
+            median_s=statistics.median(timings),
+            mean_s=statistics.fmean(timings),
+            stddev_s=statistics.pstdev(timings) if len(timings) > 1 else 0.0,
+            items=self.items,
+            extra=dict(self.extra_info),
+        )
+
+
+def discover(module: ModuleType, *, pattern: str | None = None) -> list[tuple[str, Callable[..., Any]]]:
+    found = []
+    for name, fn in inspect.getmembers(module, inspect.isfunction):
+        if not name.startswith("bench_") or fn.__module__ != module.__name__:
+            continue
+        if pattern and pattern not in name:
+            continue
+        found.append((name, fn))
+    found.sort(key=lambda item: inspect.getsourcelines(item[1])[1])
+    return found
+
+
+def run_module(module: ModuleType, *, pattern: str | None = None, min_time_s: float = 0.2) -> list[BenchStats]:
+    results: list[BenchStats] = []
+    for name, fn in discover(module, pattern=pattern):
+        bench = Benchmark(name, min_time_s=min_time_s)
+        fn(bench)
+        if bench.stats is not None:
+            results.append(bench.stats)
+            print(bench.stats.row())
+    return results
@@ -0,0 +1,114 @@
+"""
+Exercise the LLM resilience layer (retries, circuit breaker, degraded fallback) offline.
+
+Drives `ResilientLLMClient` over a `FaultInjectingLLMClient`-wrapped mock through
+four phases — healthy, flaky, full outage, recovery — and reports per phase how
+many calls the provider answered, how many were degraded or failed, and latency.
+
+    python -m backend.benchmarks.llm_faults
+    python -m backend.benchmarks.llm_faults --calls 200 --error-rate 0.4 --no-fallback
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any
+
+from backend.app.llm.client import LLMClient, LLMError, LLMMessage, MockLLMClient
+from backend.app.llm.resilience import CircuitBreaker, DegradedLLMClient, FaultInjectingLLMClient, ResilientLLMClient
+from backend.benchmarks.common import LatencySummary
+
+
+class _CountingClient(LLMClient):
+    def __init__(self, inner: LLMClient) -> None:
+        self.inner = inner
+        self.calls = 0
+
+    def complete(self, *, messages: list[dict[str, Any]], tools: list[dict[str, Any]]) -> LLMMessage:
+        self.calls += 1
+        return self.inner.complete(messages=messages, tools=tools)
+
+
+def run(args: argparse.Namespace) -> list[LatencySummary]:
+    provider = _CountingClient(MockLLMClient())
+    faults = FaultInjectingLLMClient(
+        provider, latency_s=args.latency_ms / 1000.0, timeout_s=args.timeout_ms / 1000.0, seed=args.seed
+    )
+    fallback = None if args.no_fallback else _CountingClient(DegradedLLMClient())
+    breaker = CircuitBreaker(window=20, failure_ratio=0.5, min_calls=5, cooldown_s=args.cooldown_ms / 1000.0)
+    client = ResilientLLMClient(
+        faults,
+        breaker=breaker,
+        fallback=fallback,
+        max_retries=args.retries,
+        backoff_base_s=args.backoff_ms / 1000.0,
+        backoff_max_s=args.backoff_ms * 8 / 1000.0,
+    )
+
+    phases = [
+        ("healthy", {"error_rate": 0.0, "timeout_rate": 0.0, "outage": False}),
+        ("flaky", {"error_rate": args.error_rate, "timeout_rate": args.timeout_rate, "outage": False}),
+        ("outage", {"error_rate": 0.0, "timeout_rate": 0.0, "outage": True}),
+        ("recovery", {"error_rate": 0.0, "timeout_rate": 0.0, "outage": False}),
+    ]
+    prompts = ["list my tasks", "prioritize", "buy milk"]
+    summaries: list[LatencySummary] = []
+    for name, config in phases:
+        faults.error_rate = config["error_rate"]
+        faults.timeout_rate = config["timeout_rate"]
+        faults.outage = config["outage"]
+        if name == "recovery":
+            time.sleep(args.cooldown_ms / 1000.0)
+        provider_before = provider.calls
+        degraded_before = fallback.calls if fallback else 0
+        failed = 0
+        samples: list[float] = []
+        phase_start = time.perf_counter()
+        for i in range(args.calls):
+            messages = [{"role": "user", "content": prompts[i % len(prompts)]}]
+            start = time.perf_counter()
+            try:
+                client.complete(messages=messages, tools=[])
+            except LLMError:
+                failed += 1
+            samples.append(time.perf_counter() - start)
+        summaries.append(
+            LatencySummary.from_samples(
+                name,
+                samples,
+                wall_s=time.perf_counter() - phase_start,
+                provider=provider.calls - provider_before,
+                degraded=(fallback.calls if fallback else 0) - degraded_before,
+                failed=failed,
+                breaker=breaker.state,
+            )
+        )
+    return summaries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100, help="Calls per phase.")
+    parser.add_argument("--error-rate", type=float, default=0.15, help="Injected error rate in the flaky phase.")
+    parser.add_argument("--timeout-rate", type=float, default=0.02, help="Injected timeout rate in the flaky phase.")
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Provider latency per call.")
+    parser.add_argument("--timeout-ms", type=float, default=50.0, help="How long an injected hang lasts.")
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--backoff-ms", type=float, default=5.0)
+    parser.add_argument("--cooldown-ms", type=float, default=200.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-fallback", action="store_true", help="Fail instead of degrading.")
+    args = parser.parse_args()
+
+    print(f"{'phase':<10} {'provider':>8} {'degraded':>8} {'failed':>6} {'p50 ms':>8} {'p95 ms':>8}  breaker")
+    for s in run(args):
+        e = s.extra
+        print(
+            f"{s.name:<10} {e['provider']:>8} {e['degraded']:>8} {e['failed']:>6} "
+            f"{s.p50_ms:>8.2f} {s.p95_ms:>8.2f}  {e['breaker']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Load test for the HTTP API, driven in-process through an ASGI client.
+
+Seeds a fresh database, then replays `/v1/tasks`, `/v1/prioritize`,
+`/v1/review_day` and `/chat` (MockLLMClient with injected latency) at the
+requested concurrency and reports p50/p95/p99 latency, throughput and SQL
+statements per request. Requests rotate over the seeded users (`X-User-Id`).
+
+    python -m backend.benchmarks.load_test --tasks 10000 --concurrency 16 --requests 400
+    python -m backend.benchmarks.load_test --save-baseline bench_baseline.json
+    python -m backend.benchmarks.load_test --baseline bench_baseline.json --tolerance 0.25
+
+Exits non-zero when `--baseline` is given and a scenario regressed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import httpx  # installed with the openai SDK
+from sqlalchemy import select
+
+from backend.app.core import metrics
+from backend.app.db.models import User
+from backend.app.db.session import get_db, get_read_db
+from backend.app.llm.client import LLMClient, LLMMessage, MockLLMClient, get_llm_client
+from backend.app.main import app
+from backend.benchmarks.common import (
+    LatencySummary,
+    compare_to_baseline,
+    make_engine,
+    make_sessionmaker,
+    write_report,
+)
+from backend.benchmarks.seed import add_seed_arguments, config_from_args, seed
+
+
+class LatencyInjectingLLMClient(LLMClient):
+    """MockLLMClient plus a fixed delay per call, standing in for a provider round trip."""
+
+    def __init__(self, latency_s: float, inner: LLMClient | None = None) -> None:
+        self.latency_s = latency_s
+        self.inner = inner or MockLLMClient()
+
+    def complete(self, *, messages: list[dict[str, Any]], tools: list[dict[str, Any]]) -> LLMMessage:
+        if self.latency_s > 0:
+            time.sleep(self.latency_s)
+        return self.inner.complete(messages=messages, tools=tools)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    path: str
+    route: str
+    bodies: tuple[dict[str, Any] | None, ...] = (None,)
+
+
+SCENARIOS: dict[str, Scenario] = {
+    s.name: s
+    for s in [
+        Scenario("tasks", "GET", "/v1/tasks", "/v1/tasks"),
+        Scenario("prioritize", "POST", "/v1/prioritize", "/v1/prioritize", ({},)),
+        Scenario(
+            "review_day",
+            "POST",
+            "/v1/review_day",
+            "/v1/review_day",
+            ({"planned_points": 8, "completed_points": 5},),
+        ),
+        Scenario(
+            "chat",
+            "POST",
+            "/chat",
+            "/chat",
+            (
+                {"message": "List my tasks."},
+                {"message": "Prioritize my tasks."},
+                {"message": "Tomorrow I need to call the bank about my car loan."},
+            ),
+        ),
+    ]
+}
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    *,
+    requests: int,
+    concurrency: int,
+    user_ids: list[int],
+) -> LatencySummary:
+    q_count_before, q_sum_before = metrics.DB_QUERIES_PER_REQUEST.snapshot(route=scenario.route)
+    bodies = itertools.cycle(scenario.bodies)
+    users = itertools.cycle(user_ids or [None])
+    remaining = iter(range(requests))
+    samples: list[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            body = next(bodies)
+            user_id = next(users)
+            headers = {"X-User-Id": str(user_id)} if user_id is not None else None
+            start = time.perf_counter()
+            resp = await client.request(scenario.method, scenario.path, json=body, headers=headers)
+            samples.append(time.perf_counter() - start)
+            if resp.status_code >= 400:
+                errors += 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+
+    q_count_after, q_sum_after = metrics.DB_QUERIES_PER_REQUEST.snapshot(route=scenario.route)
+    served = q_count_after - q_count_before
+    queries = round((q_sum_after - q_sum_before) / served, 2) if served else None
+    return LatencySummary.from_samples(
+        scenario.name,
+        samples,
+        wall_s=wall,
+        queries_per_request=queries,
+        errors=errors,
+        concurrency=concurrency,
+    )
+
+
+async def run(args: argparse.Namespace, user_ids: list[int]) -> list[LatencySummary]:
+    transport = httpx.ASGITransport(app=app)
+    summaries: list[LatencySummary] = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name in args.scenarios:
+            scenario = SCENARIOS[name]
+            # Warm up imports, prepared statements and pydantic caches before measuring.
+            await run_scenario(client, scenario, requests=min(5, args.requests), concurrency=1, user_ids=user_ids)
+            summaries.append(
+                await run_scenario(
+                    client, scenario, requests=args.requests, concurrency=args.concurrency, user_ids=user_ids
+                )
+            )
+    return summaries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", help="Database URL (default: a fresh temporary SQLite file).")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse an already seeded --db.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="Injected delay per mock LLM call.")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--save-baseline", metavar="PATH", help="Write results as a JSON baseline.")
+    parser.add_argument("--baseline", metavar="PATH", help="Compare against a JSON baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p95 regression (0.25 = 25%%).")
+    add_seed_arguments(parser)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.db
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory(prefix="ai-todo-bench-")
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    engine = make_engine(url)
+    if not args.skip_seed:
+        start = time.perf_counter()
+        counts = seed(engine, config_from_args(args))
+        print(f"Seeded {counts} in {time.perf_counter() - start:.1f}s")
+
+    SessionLocal = make_sessionmaker(engine)
+    with SessionLocal() as db:
+        user_ids = list(db.execute(select(User.id).order_by(User.id)).scalars())
+
+    def _bench_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = _bench_db
+    app.dependency_overrides[get_read_db] = _bench_db
+    app.dependency_overrides[get_llm_client] = lambda: LatencyInjectingLLMClient(args.llm_latency_ms / 1000.0)
+    try:
+        summaries = asyncio.run(run(args, user_ids))
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    for s in summaries:
+        print(s.row())
+
+    config = {
+        "tasks": args.tasks,
+        "users": args.users,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "llm_latency_ms": args.llm_latency_ms,
+    }
+    if args.save_baseline:
+        write_report(args.save_baseline, summaries, config=config)
+        print(f"Baseline written to {args.save_baseline}")
+    if args.baseline:
+        problems = compare_to_baseline(args.baseline, summaries, tolerance=args.tolerance)
+        if problems:
+            print("Regressions:")
+            for p in problems:
+                print(f"  - {p}")
+            sys.exit(1)
+        print("No regressions versus baseline.")
+
+
+if __name__ == "__main__":
+    main()
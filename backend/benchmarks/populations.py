@@ -0,0 +1,100 @@
+"""
+Reproducible in-memory task populations for compute benchmarks.
+
+Each shape stresses a different branch of the scoring kernels:
+- `mixed`: a realistic blend of statuses, due dates, estimates and dependencies
+- `dense_deps`: most tasks depend on several others and unblock many
+- `due_soon`: most tasks are due within 72h (or already overdue)
+- `missing_estimates`: few ratings/estimates/due dates, exercising the None paths
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, time, timedelta, timezone
+
+from backend.app.schemas import TaskRead
+from backend.schemas import TaskInput
+
+
+SHAPES = ("mixed", "dense_deps", "due_soon", "missing_estimates")
+
+AS_OF = datetime(2026, 3, 2, 9, 0, tzinfo=timezone.utc)
+
+
+def _maybe(rng: random.Random, p: float, value):  # noqa: ANN001, ANN202
+    return value if rng.random() < p else None
+
+
+def make_tasks(n: int, shape: str = "mixed", *, seed: int = 7) -> tuple[list[TaskRead], dict[int, int]]:
+    """Return `(tasks, unblocks_by_task_id)` for `prioritizer.prioritize`."""
+    if shape not in SHAPES:
+        raise ValueError(f"Unknown shape {shape!r}; expected one of {SHAPES}.")
+    rng = random.Random(f"{shape}:{n}:{seed}")
+
+    p_rated = 0.15 if shape == "missing_estimates" else 0.8
+    p_estimate = 0.1 if shape == "missing_estimates" else 0.7
+    p_due = 0.9 if shape == "due_soon" else (0.2 if shape == "missing_estimates" else 0.6)
+    max_deps = 6 if shape == "dense_deps" else 2
+    p_deps = 0.9 if shape == "dense_deps" else 0.3
+
+    tasks: list[TaskRead] = []
+    unblocks: dict[int, int] = {}
+    for i in range(1, n + 1):
+        status = rng.choices(["inbox", "planned", "in_progress", "done", "canceled"], weights=[35, 30, 15, 15, 5])[0]
+
+        due_at = None
+        if rng.random() < p_due:
+            if shape == "due_soon":
+                due_at = AS_OF + timedelta(hours=rng.uniform(-24, 72))
+            else:
+                due_at = AS_OF + timedelta(hours=rng.uniform(-72, 24 * 30))
+
+        ml = _maybe(rng, p_estimate, rng.choice([15, 30, 60, 120, 240, 480, 960]))
+        deps: list[int] = []
+        if i > 1 and rng.random() < p_deps:
+            deps = sorted({rng.randint(1, i - 1) for _ in range(rng.randint(1, max_deps))})
+        for d in deps:
+            unblocks[d] = unblocks.get(d, 0) + 1
+
+        tasks.append(
+            TaskRead(
+                id=i,
+                title=f"Task {i}",
+                status=status,
+                due_at=due_at,
+                urgency=_maybe(rng, p_rated, rng.randint(0, 10)),
+                importance=_maybe(rng, p_rated, rng.randint(0, 10)),
+                impact=_maybe(rng, p_rated, rng.randint(0, 10)),
+                effort_minutes=_maybe(rng, 0.5, ml),
+                optimistic_minutes=int(ml * 0.5) if ml else None,
+                most_likely_minutes=ml,
+                pessimistic_minutes=int(ml * 2.5) if ml else None,
+                depends_on_ids=deps,
+                created_at=AS_OF - timedelta(days=rng.uniform(0, 60)),
+                updated_at=AS_OF,
+            )
+        )
+    return tasks, unblocks
+
+
+def make_task_inputs(n: int, *, seed: int = 7) -> list[TaskInput]:
+    """Legacy `TaskInput`s with full PERT estimates (what `task_formats.ToDoTask` requires)."""
+    rng = random.Random(f"pert:{n}:{seed}")
+    inputs: list[TaskInput] = []
+    for i in range(n):
+        optimistic = rng.randint(5, 120)
+        most_likely = optimistic + rng.randint(0, 120)
+        pessimistic = most_likely + rng.randint(0, 480)
+        inputs.append(
+            TaskInput(
+                description=f"Task {i}",
+                date_of_task=date(2026, 3, 2) + timedelta(days=rng.randint(0, 30)),
+                time_of_task=time(rng.randint(6, 22), rng.choice([0, 15, 30, 45])),
+                optimistic_minutes=optimistic,
+                most_likely_minutes=most_likely,
+                pessimistic_minutes=pessimistic,
+                importance=rng.choice(["Low", "Medium", "High"]),
+            )
+        )
+    return inputs
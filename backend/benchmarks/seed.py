@@ -0,0 +1,209 @@
+"""
+Synthetic data for benchmarks.
+
+Seeds users, tasks (with tags, people and resources), dependencies and day scores at a configurable scale with a
+fixed RNG seed so runs are comparable. Rows are bulk-inserted in batches, which
+keeps 1M-task seeds practical on SQLite.
+
+    python -m backend.benchmarks.seed --db sqlite:///./bench.db --tasks 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from backend.app.db.models import DayScore, LabelKind, Task, TaskDependency, TaskLabel, TaskStatus, User
+from backend.app.services import day_score_service, search_service
+from backend.benchmarks.common import make_engine
+
+
+_STATUSES = [s.value for s in TaskStatus]
+_STATUS_WEIGHTS = [30, 25, 10, 30, 5]
+_TAGS = ["work", "home", "finance", "health", "errands", "family", "admin", "learning"]
+_PEOPLE = ["Alice", "Bob", "Carol", "Dan", "Eve"]
+_RESOURCES = ["car", "laptop", "phone", "printer", "bank card"]
+_RECURRENCES = ["FREQ=DAILY", "FREQ=WEEKLY", "FREQ=WEEKLY;BYDAY=MO,WE,FR", "FREQ=MONTHLY;BYMONTHDAY=1"]
+_VERBS = ["Call", "Email", "Review", "Plan", "Buy", "Fix", "Book", "Write", "Pay", "Clean"]
+_OBJECTS = ["the bank", "dentist", "report", "groceries", "car loan", "taxes", "slides", "garage", "flights", "invoice"]
+
+
+@dataclass(frozen=True)
+class SeedConfig:
+    users: int = 10
+    tasks: int = 1000
+    # Average number of dependencies per task (edges point to earlier tasks of the same user).
+    deps_per_task: float = 0.5
+    day_score_days: int = 90
+    seed: int = 42
+    batch_size: int = 10_000
+
+
+def _task_row(rng: random.Random, *, user_id: int, now: datetime) -> dict:
+    status = rng.choices(_STATUSES, weights=_STATUS_WEIGHTS)[0]
+    created = now - timedelta(days=rng.uniform(0, 365))
+    due = None
+    if rng.random() < 0.6:
+        due = now + timedelta(hours=rng.uniform(-72, 24 * 30))
+    ml = rng.choice([None, 15, 30, 45, 60, 90, 120, 240, 480])
+    recurrence = None
+    if due is not None and status not in ("done", "canceled") and rng.random() < 0.05:
+        recurrence = rng.choice(_RECURRENCES)
+    row = {
+        "user_id": user_id,
+        "title": f"{rng.choice(_VERBS)} {rng.choice(_OBJECTS)}",
+        "description": None if rng.random() < 0.5 else "Synthetic benchmark task.",
+        "status": status,
+        "due_at": due,
+        "urgency": rng.choice([None, *range(11)]),
+        "importance": rng.choice([None, *range(11)]),
+        "impact": rng.choice([None, *range(11)]),
+        "effort_minutes": ml,
+        "optimistic_minutes": int(ml * 0.5) if ml else None,
+        "most_likely_minutes": ml,
+        "pessimistic_minutes": int(ml * 2) if ml else None,
+        "external_constraints": None,
+        "recurrence": recurrence,
+        "recurrence_start": due if recurrence else None,
+        "created_at": created,
+        "updated_at": created,
+        "completed_at": created + timedelta(days=rng.uniform(0, 14)) if status == "done" else None,
+    }
+    return row
+
+
+def _label_rows(rng: random.Random) -> list[dict]:
+    # Without task_id: the database assigns it when the task is inserted.
+    rows = []
+    for kind, pool, most in ((LabelKind.resource, _RESOURCES, 2), (LabelKind.person, _PEOPLE, 2), (LabelKind.tag, _TAGS, 3)):
+        for position, value in enumerate(rng.sample(pool, k=rng.randint(0, most))):
+            rows.append({"kind": kind.value, "key": value.casefold(), "value": value, "position": position})
+    return rows
+
+
+def seed(engine: Engine, config: SeedConfig) -> dict[str, int]:
+    """Insert synthetic rows and return counts of what was written."""
+    rng = random.Random(config.seed)
+    now = datetime.now(tz=timezone.utc)
+
+    # Ids come from the database (RETURNING, in row order), so Postgres sequences stay
+    # in step with the rows and later inserts through the app don't collide with them.
+    with engine.begin() as conn:
+        first = (conn.execute(select(func.max(User.id))).scalar() or 0) + 1
+        user_ids = list(
+            conn.execute(
+                insert(User).returning(User.id, sort_by_parameter_order=True),
+                [{"email": f"bench{first + i}@example.com"} for i in range(config.users)],
+            ).scalars()
+        )
+
+    # Track each user's task ids so dependency edges stay within one user.
+    ids_by_user: dict[int, list[int]] = {u: [] for u in user_ids}
+    written_tasks = 0
+    written_deps = 0
+
+    while written_tasks < config.tasks:
+        n = min(config.batch_size, config.tasks - written_tasks)
+        rows = []
+        label_sets = []
+        for _ in range(n):
+            uid = user_ids[rng.randrange(len(user_ids))]
+            rows.append(_task_row(rng, user_id=uid, now=now))
+            label_sets.append(_label_rows(rng))
+
+        with engine.begin() as conn:
+            task_ids = list(conn.execute(insert(Task).returning(Task.id, sort_by_parameter_order=True), rows).scalars())
+
+            labels = [{**label, "task_id": task_id} for task_id, ls in zip(task_ids, label_sets) for label in ls]
+            deps: set[tuple[int, int]] = set()
+            for row, task_id in zip(rows, task_ids):
+                prior = ids_by_user[row["user_id"]]
+                if prior and config.deps_per_task > 0:
+                    # Depend on recent tasks only, like real projects do.
+                    window = prior[-500:]
+                    k = min(len(window), round(rng.expovariate(1.0 / config.deps_per_task)))
+                    for dep in rng.sample(window, k=k):
+                        deps.add((task_id, dep))
+                prior.append(task_id)
+
+            if labels:
+                conn.execute(insert(TaskLabel), labels)
+            if deps:
+                conn.execute(insert(TaskDependency), [{"task_id": t, "depends_on_id": d} for t, d in deps])
+
+        written_tasks += n
+        written_deps += len(deps)
+
+    score_rows = []
+    today = date.today()
+    for uid in user_ids:
+        for d in range(config.day_score_days):
+            planned = float(rng.randint(0, 10))
+            completed = float(rng.randint(0, int(planned))) if planned else 0.0
+            score_rows.append(
+                {
+                    "user_id": uid,
+                    "day": today - timedelta(days=d + 1),
+                    "planned_points": planned,
+                    "completed_points": completed,
+                    "score": (completed / planned) if planned else 0.0,
+                }
+            )
+    if score_rows:
+        with engine.begin() as conn:
+            for i in range(0, len(score_rows), config.batch_size):
+                conn.execute(insert(DayScore), score_rows[i : i + config.batch_size])
+
+    # Bulk inserts bypass task_service and day_score_service, which keep the search
+    # index and the day score rollups in sync.
+    search_service.rebuild(engine)
+    with Session(engine) as db, db.begin():
+        day_score_service.rebuild_rollups(db, user_ids=user_ids)
+
+    return {
+        "users": config.users,
+        "tasks": written_tasks,
+        "dependencies": written_deps,
+        "day_scores": len(score_rows),
+    }
+
+
+def add_seed_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--users", type=int, default=SeedConfig.users)
+    parser.add_argument("--tasks", type=int, default=SeedConfig.tasks, help="Total tasks to seed (1k-1M).")
+    parser.add_argument("--deps-per-task", type=float, default=SeedConfig.deps_per_task)
+    parser.add_argument("--day-score-days", type=int, default=SeedConfig.day_score_days)
+    parser.add_argument("--seed", type=int, default=SeedConfig.seed)
+
+
+def config_from_args(args: argparse.Namespace) -> SeedConfig:
+    return SeedConfig(
+        users=args.users,
+        tasks=args.tasks,
+        deps_per_task=args.deps_per_task,
+        day_score_days=args.day_score_days,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="sqlite:///./bench.db")
+    add_seed_arguments(parser)
+    args = parser.parse_args()
+
+    engine = make_engine(args.db)
+    start = time.perf_counter()
+    counts = seed(engine, config_from_args(args))
+    print(f"Seeded {counts} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Shared fixtures: every test run gets its own SQLite database and an offline LLM.
+
+The environment is set before anything under `backend.app` is imported, since
+`settings` and the engines are built at import time.
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+
+_tmp = tempfile.mkdtemp(prefix="ai-todo-tests-")
+os.environ.update(
+    {
+        "DATABASE_URL": f"sqlite:///{os.path.join(_tmp, 'app.db')}",
+        "DB_AUTO_CREATE": "true",
+        "MOCK_LLM": "true",
+        "OPENAI_API_KEY": "",
+        "ARCHIVE_INTERVAL_SECONDS": "0",
+        "PRIORITY_LEARNING_INTERVAL_SECONDS": "0",
+        "COMPLETION_MODEL_PATH": os.path.join(_tmp, "completion_model.json"),
+        "RATE_LIMIT_SQLITE_PATH": os.path.join(_tmp, "ratelimit.db"),
+        "PUBSUB_SQLITE_PATH": os.path.join(_tmp, "pubsub.db"),
+        "TRACE_SAMPLE_RATE": "0",
+    }
+)
+
+import pytest  # noqa: E402
+from sqlalchemy import text  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from backend.app.db.base import Base  # noqa: E402
+from backend.app.db.init_db import init_db  # noqa: E402
+from backend.app.db.session import SessionLocal, engine  # noqa: E402
+from backend.app.services import task_cache  # noqa: E402
+
+
+init_db()
+
+
+@pytest.fixture(autouse=True)
+def _clean_db():
+    yield
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            if table.name != "schema_version":
+                conn.execute(table.delete())
+        conn.execute(text("DELETE FROM task_fts"))
+        # Start ids over too: a change log that doesn't begin at 1 reads as pruned.
+        conn.execute(text("DELETE FROM sqlite_sequence"))
+    task_cache.shared.clear()
+
+
+@pytest.fixture
+def db() -> Session:
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    from backend.app.main import app
+
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,62 @@
+"""
+Move done/canceled tasks finished more than N days ago into the archive table.
+
+    python -m backend.scripts.archive_tasks                 # ARCHIVE_AFTER_DAYS, every shard
+    python -m backend.scripts.archive_tasks --days 30 --max-batches 10 --url sqlite:///./app.db
+
+For cron when ARCHIVE_INTERVAL_SECONDS=0 (no in-process archiver). Each batch is
+its own transaction, so it can be stopped at any point and re-run. Afterwards the
+`/v1/changes` log is pruned to `--change-log-days` (CHANGE_LOG_RETENTION_DAYS).
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.core.config import settings
+from backend.app.db.session import router
+from backend.app.services import archive_service
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=settings.archive_after_days, help="Archive tasks finished before this many days ago.")
+    parser.add_argument("--batch-size", type=int, default=settings.archive_batch_size)
+    parser.add_argument("--max-batches", type=int, help="Stop after this many batches per database.")
+    parser.add_argument("--pause-ms", type=float, default=50.0, help="Pause between batches.")
+    parser.add_argument("--url", action="append", help="Database URL (default: every configured shard).")
+    parser.add_argument(
+        "--change-log-days",
+        type=int,
+        default=settings.change_log_retention_days,
+        help="Prune change log entries older than this (0 = keep).",
+    )
+    args = parser.parse_args()
+    if args.days <= 0:
+        parser.error("--days must be positive (ARCHIVE_AFTER_DAYS=0 disables archival).")
+
+    if args.url:
+        sessions = {url: sessionmaker(bind=create_engine(url, future=True)) for url in args.url}
+    else:
+        sessions = {name: (lambda name=name: router.session(name)) for name in router.names}
+    for name, session in sessions.items():
+        start = time.perf_counter()
+        moved = archive_service.archive_finished(
+            session,
+            older_than_days=args.days,
+            batch_size=args.batch_size,
+            max_batches=args.max_batches,
+            pause_s=args.pause_ms / 1000.0,
+        )
+        print(f"{name}: archived {moved} task(s) in {time.perf_counter() - start:.1f}s")
+        if args.change_log_days > 0:
+            pruned = archive_service.prune_change_log(session, older_than_days=args.change_log_days)
+            print(f"{name}: pruned {pruned} change log entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Learn per-user prioritization weights from completions, for deployments that run it
+from cron instead of the API's background learner (PRIORITY_LEARNING_INTERVAL_SECONDS=0).
+
+    python -m backend.scripts.fit_priority_weights                  # every shard, every user
+    python -m backend.scripts.fit_priority_weights --url sqlite:///./app.db --user 42
+
+Each run picks up where the last stopped (see `priority_weights`), so it can run often.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from backend.app.db.session import router
+from backend.app.services import priority_weights
+from backend.app.services.prioritizer import PRIORITY_FEATURES
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", action="append", help="Database URL (default: every configured shard).")
+    parser.add_argument("--user", type=int, action="append", help="Only these user ids (default: everyone).")
+    args = parser.parse_args()
+
+    engines = {url: create_engine(url, future=True) for url in args.url} if args.url else router.engines()
+    try:
+        for name, engine in engines.items():
+            start = time.perf_counter()
+            if args.user:
+                learned = {}
+                for user_id in args.user:
+                    with Session(engine) as db:
+                        learned[user_id] = priority_weights.learn_user(db, user_id)
+                        db.commit()
+            else:
+                learned = priority_weights.learn_all(lambda engine=engine: Session(engine))
+            elapsed = time.perf_counter() - start
+            print(f"{name}: {sum(learned.values())} completion(s) for {len(learned)} user(s) in {elapsed:.1f}s")
+            for user_id in args.user or ():
+                with Session(engine) as db:
+                    weights = priority_weights.weights_for(db, user_id)
+                print(f"  user {user_id}: " + ", ".join(f"{f}={w:+.2f}" for f, w in zip(PRIORITY_FEATURES, weights)))
+    finally:
+        if args.url:
+            for engine in engines.values():
+                engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Move task tags, required people and required resources out of the JSON columns on
+`tasks` into the indexed `task_labels` table, then drop the old columns.
+
+    python -m backend.scripts.migrate_task_labels --dry-run
+    python -m backend.scripts.migrate_task_labels --url sqlite:///./app.db
+
+Runs against every configured shard by default. Each database is migrated in one
+transaction and already-migrated databases are skipped, so re-running is safe. The
+old columns are copied to `task_label_columns_backup` before they are dropped.
+Startup never runs this (it drops columns older code still reads); it refuses to
+start until it has run. Try `--dry-run` first.
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from sqlalchemy import create_engine
+
+from backend.app.db.migrations import legacy_label_columns, migrate_task_labels
+from backend.app.db.session import router
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", action="append", help="Database URL (default: every configured shard).")
+    parser.add_argument("--dry-run", action="store_true", help="Migrate, report and roll back.")
+    args = parser.parse_args()
+
+    engines = {url: create_engine(url, future=True) for url in args.url} if args.url else router.engines()
+    try:
+        for name, engine in engines.items():
+            with engine.connect() as conn:
+                columns = legacy_label_columns(conn)
+            if not columns:
+                print(f"{name}: up to date")
+                continue
+            written = migrate_task_labels(engine, dry_run=args.dry_run)
+            verb = "would migrate" if args.dry_run else "migrated"
+            print(f"{name}: {verb} {written} label(s) from {', '.join(columns)}")
+    finally:
+        if args.url:
+            for engine in engines.values():
+                engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
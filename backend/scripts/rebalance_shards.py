@@ -0,0 +1,234 @@
+"""
+Move users between shards after the shard list changes.
+
+Compares where each user's data lives today (`--from`, the old DATABASE_SHARDS) with
+where the consistent-hash ring routes them under the new configuration (`--to`,
+default: the current DATABASE_SHARDS / DATABASE_URL) and moves every user whose
+shard changed: their user row, tasks (with tags, people, resources and completed
+occurrences of recurring tasks), archived tasks, dependency edges, day scores,
+conversation sessions, cached calendar events and search index entries.
+
+    python -m backend.scripts.rebalance_shards \\
+        --from "a=sqlite:///./shard_a.db" \\
+        --to "a=sqlite:///./shard_a.db,b=sqlite:///./shard_b.db" --dry-run
+
+Run it with writes paused (or before switching the app to the new shard list).
+Each user's move is one transaction on the destination followed by one on the
+source, and re-running is safe: the destination copy is replaced, not appended.
+
+Task and day-score ids are reassigned on the destination (ids are shard-local), and
+change-feed cursors don't carry over, so moved users' clients should reload
+(`GET /v1/tasks`) instead of resuming `/v1/changes`. Archived tasks come back as
+regular tasks on the destination (fresh ids can't collide there) and are archived
+again by its next archival run.
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, selectinload
+
+from backend.app.core.config import settings
+from backend.app.db.base import Base
+from backend.app.db.models import (
+    ArchivedTask,
+    CalendarEventCache,
+    LabelKind,
+    ConversationSession,
+    DayScore,
+    DayScoreRollup,
+    Task,
+    TaskDependency,
+    TaskLabel,
+    TaskOccurrence,
+    User,
+)
+from backend.app.db.sharding import HashRing, parse_shards
+from backend.app.schemas import TaskRead
+from backend.app.services import archive_service, change_feed_service, day_score_service, search_service, version_service
+from backend.app.services.task_service import label_key
+
+
+@dataclass
+class MoveResult:
+    user_id: int
+    source: str
+    target: str
+    counts: dict[str, int] = field(default_factory=dict)
+
+
+def _row(obj: object, *, skip: tuple[str, ...] = ()) -> dict:
+    table = type(obj).__table__  # type: ignore[attr-defined]
+    return {c.key: getattr(obj, c.key) for c in table.columns if c.key not in skip}
+
+
+def users_on(engine: Engine) -> set[int]:
+    """Every user id with data on a shard."""
+    with Session(engine) as db:
+        ids: set[int] = set(db.execute(select(User.id)).scalars())
+        for model in (Task, ArchivedTask, DayScore, ConversationSession, CalendarEventCache):
+            ids.update(i for i in db.execute(select(model.user_id).distinct()).scalars() if i is not None)
+    return ids
+
+
+def _delete_user_rows(db: Session, user_id: int, *, include_user: bool) -> None:
+    search_service.remove_user(db, user_id)
+    task_ids = select(Task.id).where(Task.user_id == user_id)
+    db.execute(delete(TaskDependency).where(TaskDependency.task_id.in_(task_ids)))
+    db.execute(delete(TaskDependency).where(TaskDependency.depends_on_id.in_(task_ids)))
+    db.execute(delete(TaskLabel).where(TaskLabel.task_id.in_(task_ids)))
+    db.execute(delete(TaskOccurrence).where(TaskOccurrence.task_id.in_(task_ids)))
+    archive_service.remove_user(db, user_id)
+    db.execute(delete(DayScoreRollup).where(DayScoreRollup.user_id == user_id))
+    for model in (Task, DayScore, ConversationSession, CalendarEventCache):
+        db.execute(delete(model).where(model.user_id == user_id))
+    if include_user:
+        db.execute(delete(User).where(User.id == user_id))
+
+
+def move_user(source: Engine, target: Engine, user_id: int) -> dict[str, int]:
+    """Copy one user's rows from `source` to `target`, then delete them from `source`."""
+    with Session(source) as src:
+        user = src.get(User, user_id)
+        tasks = list(
+            src.execute(
+                select(Task).options(selectinload(Task.labels)).where(Task.user_id == user_id).order_by(Task.id)
+            ).scalars()
+        )
+        old_ids = [t.id for t in tasks]
+        edges = src.execute(
+            select(TaskDependency.task_id, TaskDependency.depends_on_id).where(TaskDependency.task_id.in_(old_ids))
+        ).all()
+        archived = [
+            TaskRead.model_validate(a.payload)
+            for a in src.execute(select(ArchivedTask).where(ArchivedTask.user_id == user_id).order_by(ArchivedTask.id)).scalars()
+        ]
+        edges += [(a.id, dep) for a in archived for dep in a.depends_on_ids]
+        occurrences = list(src.execute(select(TaskOccurrence).where(TaskOccurrence.task_id.in_(old_ids))).scalars())
+        day_scores = list(src.execute(select(DayScore).where(DayScore.user_id == user_id)).scalars())
+        sessions = list(src.execute(select(ConversationSession).where(ConversationSession.user_id == user_id)).scalars())
+        events = list(src.execute(select(CalendarEventCache).where(CalendarEventCache.user_id == user_id)).scalars())
+
+    with Session(target) as dst, dst.begin():
+        _delete_user_rows(dst, user_id, include_user=False)
+        if user is not None and dst.get(User, user_id) is None:
+            dst.execute(insert(User).values(**_row(user)))
+
+        new_id: dict[int, int] = {}
+        for t in tasks:
+            res = dst.execute(insert(Task).values(**_row(t, skip=("id",))))
+            new_id[t.id] = int(res.inserted_primary_key[0])
+            change_feed_service.record(dst, user_id=user_id, entity=change_feed_service.ENTITY_TASK, entity_id=new_id[t.id])
+        labels = [{**_row(label), "task_id": new_id[t.id]} for t in tasks for label in t.labels]
+        for a in archived:
+            values = a.model_dump(exclude={"id", "tags", "required_people", "required_resources", "depends_on_ids"})
+            res = dst.execute(insert(Task).values(**values, user_id=user_id))
+            new_id[a.id] = int(res.inserted_primary_key[0])
+            change_feed_service.record(dst, user_id=user_id, entity=change_feed_service.ENTITY_TASK, entity_id=new_id[a.id])
+            for kind, names in ((LabelKind.tag, a.tags), (LabelKind.person, a.required_people), (LabelKind.resource, a.required_resources)):
+                labels += [
+                    {"task_id": new_id[a.id], "kind": kind.value, "key": label_key(v), "value": v, "position": i}
+                    for i, v in enumerate(names)
+                ]
+        if labels:
+            dst.execute(insert(TaskLabel), labels)
+        if occurrences:
+            dst.execute(insert(TaskOccurrence), [{**_row(o), "task_id": new_id[o.task_id]} for o in occurrences])
+        search_service.index_rows(
+            dst, [(new_id[t.id], t.title, t.description, t.tags) for t in [*tasks, *archived]]
+        )
+
+        moved_edges = [(new_id[a], new_id[b]) for a, b in edges if a in new_id and b in new_id]
+        if moved_edges:
+            dst.execute(insert(TaskDependency), [{"task_id": a, "depends_on_id": b} for a, b in moved_edges])
+        for a, b in moved_edges:
+            change_feed_service.record(
+                dst,
+                user_id=user_id,
+                entity=change_feed_service.ENTITY_DEPENDENCY,
+                entity_id=change_feed_service.dependency_key(a, b),
+            )
+
+        for d in day_scores:
+            res = dst.execute(insert(DayScore).values(**_row(d, skip=("id",))))
+            change_feed_service.record(
+                dst, user_id=user_id, entity=change_feed_service.ENTITY_DAY_SCORE, entity_id=res.inserted_primary_key[0]
+            )
+        if day_scores:
+            day_score_service.rebuild_rollups(dst, user_ids=[user_id])
+        for s in sessions:
+            dst.execute(delete(ConversationSession).where(ConversationSession.id == s.id))
+            dst.execute(insert(ConversationSession).values(**_row(s)))
+        for e in events:
+            dst.execute(insert(CalendarEventCache).values(**_row(e, skip=("id",))))
+        version_service.bump(dst, user_id=user_id)
+
+    with Session(source) as src, src.begin():
+        _delete_user_rows(src, user_id, include_user=True)
+        # Invalidate ETags/caches clients hold for the source copy.
+        version_service.bump(src, user_id=user_id)
+
+    return {
+        "tasks": len(tasks),
+        "archived": len(archived),
+        "labels": len(labels),
+        "occurrences": len(occurrences),
+        "dependencies": len(moved_edges),
+        "day_scores": len(day_scores),
+        "sessions": len(sessions),
+        "calendar_events": len(events),
+    }
+
+
+def plan(old: dict[str, str], new: dict[str, str], *, vnodes: int, engines: dict[str, Engine]) -> list[MoveResult]:
+    """Users whose data is on an old shard but whose new ring position is elsewhere."""
+    ring = HashRing(list(new), vnodes=vnodes)
+    moves: list[MoveResult] = []
+    for name, url in old.items():
+        for user_id in sorted(users_on(engines[url])):
+            target = ring.lookup(str(user_id))
+            if new[target] != url:
+                moves.append(MoveResult(user_id=user_id, source=name, target=target))
+    return moves
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--from", dest="old", required=True, help="Current shard list (name=url,...).")
+    parser.add_argument("--to", dest="new", help="New shard list (default: DATABASE_SHARDS / DATABASE_URL).")
+    parser.add_argument("--vnodes", type=int, default=settings.shard_vnodes)
+    parser.add_argument("--user", type=int, action="append", help="Only consider these user ids.")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    old = parse_shards(args.old, settings.database_url)
+    new = parse_shards(args.new or settings.database_shards, settings.database_url)
+
+    engines: dict[str, Engine] = {}
+    for url in {*old.values(), *new.values()}:
+        engines[url] = create_engine(url, future=True)
+        Base.metadata.create_all(bind=engines[url])
+        search_service.ensure_index(engines[url])
+
+    try:
+        moves = plan(old, new, vnodes=args.vnodes, engines=engines)
+        if args.user:
+            wanted = set(args.user)
+            moves = [m for m in moves if m.user_id in wanted]
+        print(f"{len(moves)} user(s) to move")
+        for m in moves:
+            if not args.dry_run:
+                m.counts = move_user(engines[old[m.source]], engines[new[m.target]], m.user_id)
+            detail = " ".join(f"{k}={v}" for k, v in m.counts.items())
+            print(f"  user {m.user_id}: {m.source} -> {m.target} {detail}".rstrip())
+    finally:
+        for eng in engines.values():
+            eng.dispose()
+
+
+if __name__ == "__main__":
+    main()
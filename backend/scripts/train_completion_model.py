@@ -0,0 +1,70 @@
+"""
+Train the completion-chance model from task history and write it for the API to load.
+
+    python -m backend.scripts.train_completion_model                      # every shard -> COMPLETION_MODEL_PATH
+    python -m backend.scripts.train_completion_model --url sqlite:///./app.db --out model.json --dry-run
+
+Samples come from live and archived tasks whose outcome is known (see
+`completion_model.label`). The printed holdout metrics sit next to the heuristic's
+on the same tasks; keep the heuristic (don't write the file) if the model isn't better.
+Running workers pick up a new file on their next prioritization.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from backend.app.core.config import settings
+from backend.app.db.session import router
+from backend.app.services import completion_model
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", action="append", help="Database URL (default: every configured shard).")
+    parser.add_argument("--out", default=settings.completion_model_path, help="Where to write the model JSON.")
+    parser.add_argument("--l2", type=float, default=1.0, help="L2 penalty on standardized coefficients.")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of samples scored, not fitted.")
+    parser.add_argument("--dry-run", action="store_true", help="Train and report without writing the model.")
+    args = parser.parse_args()
+
+    engines = {url: create_engine(url, future=True) for url in args.url} if args.url else router.engines()
+    data = completion_model.TrainingSet()
+    start = time.perf_counter()
+    try:
+        for name, engine in engines.items():
+            with Session(engine) as db:
+                part = completion_model.extract(db)
+            for column, values in zip(data.columns, part.columns):
+                column.extend(values)
+            data.labels.extend(part.labels)
+            data.task_ids.extend(part.task_ids)
+            data.baseline.extend(part.baseline)
+            print(f"{name}: {len(part)} labelled task(s)")
+    finally:
+        if args.url:
+            for engine in engines.values():
+                engine.dispose()
+    extracted = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model = completion_model.fit(data, l2=args.l2, holdout=args.holdout)
+    fitted = time.perf_counter() - start
+    print(f"extracted {len(data)} sample(s) in {extracted:.1f}s, fitted in {fitted * 1000:.0f}ms")
+    for key, value in sorted(model.metrics.items()):
+        print(f"  {key:24} {value:.4f}")
+    for feature, coef in zip(model.features, model.coef):
+        print(f"  coef {feature:19} {coef:+.4f}")
+
+    if args.dry_run:
+        return
+    completion_model.save(model, args.out)
+    print(f"wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
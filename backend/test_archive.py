@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+from backend.app.db.models import Task
+from backend.app.db.session import SessionLocal
+from backend.app.schemas import TaskCreate
+from backend.app.services import archive_service, task_service
+
+NOW = datetime.now(tz=timezone.utc)
+
+
+def _task(db, title: str, *, finished_days_ago: float | None = None, **fields) -> int:
+    task_id = task_service.create_task(db, TaskCreate(title=title, **fields), user_id=1).id
+    if finished_days_ago is not None:
+        db.execute(
+            update(Task)
+            .where(Task.id == task_id)
+            .values(status="done", completed_at=NOW - timedelta(days=finished_days_ago))
+        )
+        db.commit()
+    return task_id
+
+
+def _hot_titles(db) -> list[str]:
+    return sorted(t.title for t in task_service.list_tasks(db, user_id=1))
+
+
+def test_only_tasks_finished_before_the_cutoff_move(db):
+    _task(db, "old", finished_days_ago=31)
+    _task(db, "recent", finished_days_ago=29)
+    blocker = _task(db, "old but needed", finished_days_ago=40)
+    _task(db, "open", depends_on_ids=[blocker])
+    # The newest row always stays hot (see archive_batch).
+    _task(db, "newest")
+
+    moved = archive_service.archive_finished(SessionLocal, older_than_days=30)
+
+    assert moved == 1
+    assert _hot_titles(db) == ["newest", "old but needed", "open", "recent"]
+    assert [t.title for t in archive_service.list_archived(db, user_id=1)] == ["old"]
+
+
+def test_archived_tasks_read_back_as_they_were(db, client):
+    old = _task(db, "file taxes", finished_days_ago=90, tags=["Paperwork"], required_people=["Ana"])
+    before = task_service.get_task(db, old, user_id=1)
+    _task(db, "newest")
+
+    assert archive_service.archive_finished(SessionLocal, older_than_days=30) == 1
+    assert task_service.get_task(db, old, user_id=1) is None
+
+    headers = {"X-User-Id": "1"}
+    listed = client.get("/v1/tasks", params={"include_archived": "true"}, headers=headers).json()
+    assert [t for t in listed if t["id"] == old] == [before.model_dump(mode="json")]
+    assert client.get("/v1/tasks", params={"tag": "paperwork", "include_archived": "true"}, headers=headers).json()[0]["id"] == old
+    assert [t.id for t in archive_service.search_archive(db, "TAXES", user_id=1)] == [old]
+    assert archive_service.search_archive(db, "taxes", user_id=2) == []
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased
+
+from backend.app.db.models import Task, TaskDependency, User
+from backend.benchmarks.common import LatencySummary, compare_to_baseline, make_engine, percentile, write_report
+from backend.benchmarks.seed import SeedConfig, seed
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 95) == 0.0
+
+
+def test_seed_writes_requested_scale(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'bench.db'}")
+    counts = seed(engine, SeedConfig(users=3, tasks=120, day_score_days=5))
+    with Session(engine) as db:
+        assert db.scalar(select(func.count()).select_from(User)) == 3
+        assert db.scalar(select(func.count()).select_from(Task)) == counts["tasks"] == 120
+        other = aliased(Task)
+        cross_user = db.scalar(
+            select(func.count())
+            .select_from(TaskDependency)
+            .join(Task, Task.id == TaskDependency.task_id)
+            .join(other, other.id == TaskDependency.depends_on_id)
+            .where(Task.user_id != other.user_id)
+        )
+        assert cross_user == 0
+    engine.dispose()
+
+
+def test_seeded_ids_come_from_the_database(tmp_path):
+    engine = make_engine(f"sqlite:///{tmp_path / 'bench.db'}")
+    seed(engine, SeedConfig(users=2, tasks=50, day_score_days=0))
+    seed(engine, SeedConfig(users=2, tasks=50, day_score_days=0, seed=7))
+    with Session(engine) as db:
+        # The app's own inserts carry on after the seeded rows.
+        db.add(User(email="app@example.com"))
+        db.add(Task(title="from the app", user_id=1))
+        db.commit()
+        assert db.scalars(select(User.id).order_by(User.id)).all() == [1, 2, 3, 4, 5]
+        assert db.scalar(select(func.count(func.distinct(Task.id)))) == 101
+        # Edges point to earlier tasks, i.e. the returned ids were mapped in row order.
+        backwards = select(func.count()).select_from(TaskDependency).where(TaskDependency.task_id <= TaskDependency.depends_on_id)
+        assert db.scalar(backwards) == 0
+    engine.dispose()
+
+
+def test_baseline_comparison_flags_slower_and_chattier_results(tmp_path):
+    path = tmp_path / "baseline.json"
+    write_report(
+        path,
+        [LatencySummary.from_samples("tasks", [0.010] * 20, queries_per_request=2)],
+        config={},
+    )
+    same = LatencySummary.from_samples("tasks", [0.011] * 20, queries_per_request=2)
+    assert compare_to_baseline(path, [same], tolerance=0.2) == []
+
+    slower = LatencySummary.from_samples("tasks", [0.020] * 20, queries_per_request=3)
+    problems = compare_to_baseline(path, [slower], tolerance=0.2)
+    assert len(problems) == 2
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from sqlalchemy import func, select, update
+
+from backend.app.db.models import ChangeLogEntry
+from backend.app.db.session import router
+from backend.app.services import archive_service, change_feed_service
+
+
+def _create(client, title: str) -> dict:
+    resp = client.post("/v1/tasks", json={"title": title}, headers={"X-User-Id": "1"})
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def _changes(client, since: int) -> dict:
+    resp = client.get("/v1/changes", params={"since": since}, headers={"X-User-Id": "1"})
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def _session():
+    return router.session(router.default)
+
+
+def test_cursor_replays_only_newer_changes(client):
+    first = _create(client, "first")
+    batch = _changes(client, 0)
+    assert [t["id"] for t in batch["tasks"]] == [first["id"]]
+    assert not batch["reset_required"]
+
+    second = _create(client, "second")
+    client.patch(f"/v1/tasks/{first['id']}", json={"status": "done"}, headers={"X-User-Id": "1"}).raise_for_status()
+    batch = _changes(client, batch["cursor"])
+    assert sorted(t["id"] for t in batch["tasks"]) == sorted([first["id"], second["id"]])
+    assert _changes(client, batch["cursor"])["tasks"] == []
+
+
+def test_pruned_log_asks_stale_cursors_to_reset(client):
+    _create(client, "old")
+    stale = _changes(client, 0)["cursor"]
+    _create(client, "older than the cursor's successor")
+    _create(client, "newest")
+
+    pruned = archive_service.prune_change_log(_session, older_than_days=-1)
+    assert pruned == 2  # the newest entry is always kept
+
+    with _session() as db:
+        latest = change_feed_service.latest_cursor(db)
+    for since in (0, stale):
+        batch = _changes(client, since)
+        assert batch["reset_required"]
+        assert batch["cursor"] == latest
+    assert not _changes(client, batch["cursor"])["reset_required"]
+
+
+def test_prune_keeps_recent_entries(client):
+    _create(client, "recent")
+    with _session() as db:
+        assert change_feed_service.prune(db, before=datetime.now(tz=timezone.utc) - timedelta(days=1)) == 0
+    assert not _changes(client, 0)["reset_required"]
+
+
+def test_archiver_prunes_even_with_archival_off(client):
+    _create(client, "one")
+    _create(client, "two")
+    with _session() as db:
+        db.execute(update(ChangeLogEntry).values(created_at=datetime.now(tz=timezone.utc) - timedelta(days=10)))
+        db.commit()
+
+    archiver = archive_service.Archiver(
+        lambda: {"a": _session}, older_than_days=0, interval_s=60, batch_size=10, change_log_retention_days=7
+    )
+    assert archiver.run_once() == {}
+    with _session() as db:
+        assert db.scalar(select(func.count()).select_from(ChangeLogEntry)) == 1
+    assert _changes(client, 0)["reset_required"]
+
+    archiver.start()
+    try:
+        assert archiver._thread is not None
+    finally:
+        archiver.stop()
+
+
+def test_append_locks_are_per_user():
+    keys = {change_feed_service.lock_keys(u) for u in (None, 1, 2)}
+    assert len(keys) == 3
+    # pg_advisory_xact_lock(int4, int4)
+    assert all(0 <= k < 2**31 for pair in keys for k in pair)
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_POSTGRES_URL"), reason="needs TEST_POSTGRES_URL")
+def test_concurrent_writers_for_different_users_do_not_block():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from backend.app.db.base import Base
+
+    engine = create_engine(os.environ["TEST_POSTGRES_URL"])
+    Base.metadata.create_all(engine)
+    try:
+        with Session(engine) as first, Session(engine) as second, Session(engine) as same_user:
+            change_feed_service.record(first, user_id=1, entity="task", entity_id=1)
+            first.flush()
+            # User 2 appends and commits while user 1's transaction is still open.
+            done = threading.Event()
+
+            def other_user() -> None:
+                change_feed_service.record(second, user_id=2, entity="task", entity_id=2)
+                second.commit()
+                done.set()
+
+            threading.Thread(target=other_user).start()
+            assert done.wait(5.0)
+
+            # Another writer for user 1 waits for the first one.
+            waited = threading.Event()
+
+            def user_one_again() -> None:
+                change_feed_service.record(same_user, user_id=1, entity="task", entity_id=3)
+                same_user.commit()
+                waited.set()
+
+            threading.Thread(target=user_one_again).start()
+            assert not waited.wait(0.5)
+            first.commit()
+            assert waited.wait(5.0)
+    finally:
+        with engine.begin() as conn:
+            conn.execute(ChangeLogEntry.__table__.delete())
+        engine.dispose()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import dataclasses
+import os
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import update
+
+from backend.app.db.models import Task
+from backend.app.schemas import TaskCreate
+from backend.app.services import completion_model, prioritizer, task_service
+
+AS_OF = datetime.now(tz=timezone.utc)
+
+
+@pytest.fixture
+def model_path(tmp_path, monkeypatch):
+    path = os.path.join(tmp_path, "completion_model.json")
+    monkeypatch.setattr(completion_model, "settings", dataclasses.replace(completion_model.settings, completion_model_path=path))
+    monkeypatch.setattr(completion_model, "RELOAD_CHECK_SECONDS", 0.0)
+    monkeypatch.setattr(completion_model, "_loaded", None)
+    return path
+
+
+def _history(db, n: int) -> None:
+    # Short urgent tasks got done, long unimportant ones were canceled.
+    for i in range(n):
+        quick = i % 2 == 0
+        task = task_service.create_task(
+            db, TaskCreate(title=f"t{i}", effort_minutes=30 if quick else 600, urgency=8 if quick else 2 + i % 3)
+        )
+        values = {"status": "done", "completed_at": AS_OF} if quick else {"status": "canceled"}
+        db.execute(update(Task).where(Task.id == task.id).values(**values))
+    db.commit()
+
+
+def _chances(db) -> tuple[float | None, float | None]:
+    task = task_service.create_task(db, TaskCreate(title="open", effort_minutes=45, urgency=7))
+    return (
+        prioritizer.estimate_completion_chance(task, as_of=AS_OF),
+        prioritizer.heuristic_completion_chance(task, as_of=AS_OF),
+    )
+
+
+def test_too_few_samples_keep_the_heuristic(db, model_path):
+    _history(db, 2 * len(completion_model.FEATURES) - 1)
+    data = completion_model.extract(db)
+    with pytest.raises(ValueError, match="need at least"):
+        completion_model.fit(data)
+
+    assert completion_model.active() is None
+    model_chance, heuristic = _chances(db)
+    assert model_chance == heuristic
+
+
+def test_a_trained_model_is_served_until_its_file_goes_bad(db, model_path):
+    _history(db, 4 * len(completion_model.FEATURES))
+    model = completion_model.fit(completion_model.extract(db))
+    completion_model.save(model, model_path)
+
+    assert completion_model.active() == model
+    model_chance, heuristic = _chances(db)
+    assert model_chance != heuristic
+
+    with open(model_path, "w", encoding="utf-8") as f:
+        f.write("{not json")
+    os.utime(model_path, (0, 0))
+    assert completion_model.active() is None
+    model_chance, heuristic = _chances(db)
+    assert model_chance == heuristic
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from backend.app.db import migrations
+from backend.app.db.base import Base
+from backend.app.db.models import DayScoreRollup
+from backend.app.services import day_score_service
+
+
+def _review(db, day: date, completed: float, *, user_id: int | None = None) -> None:
+    day_score_service.upsert_day_score(
+        db, user_id=user_id, day=day, planned_points=10.0, completed_points=completed, notes=None
+    )
+
+
+def test_reviews_without_a_user_keep_one_rollup_per_period(db):
+    _review(db, date(2026, 3, 2), 5.0)
+    _review(db, date(2026, 3, 3), 10.0)
+    _review(db, date(2026, 3, 3), 8.0)
+
+    rows = db.execute(select(DayScoreRollup).order_by(DayScoreRollup.period)).scalars().all()
+    assert [(r.period, r.period_start, r.days) for r in rows] == [
+        ("month", date(2026, 3, 1), 2),
+        ("week", date(2026, 3, 2), 2),
+    ]
+    assert rows[0].completed_points == 13.0
+
+
+def test_rollup_key_treats_missing_user_as_one_series(db):
+    db.add(DayScoreRollup(user_id=None, period="week", period_start=date(2026, 3, 2)))
+    db.commit()
+    db.add(DayScoreRollup(user_id=None, period="week", period_start=date(2026, 3, 2)))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+    # A write racing the one above still lands on the existing row.
+    _review(db, date(2026, 3, 4), 4.0)
+    assert db.execute(select(func.count()).select_from(DayScoreRollup).where(DayScoreRollup.period == "week")).scalar() == 1
+
+
+def test_upgrade_dedupes_rollups_then_adds_the_key():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'old.db')}")
+        with engine.begin() as conn:
+            Base.metadata.create_all(conn)
+            conn.execute(text("DROP TABLE day_score_rollups"))
+            conn.execute(
+                text(
+                    "CREATE TABLE day_score_rollups (id INTEGER PRIMARY KEY, user_id INTEGER, period VARCHAR(8) NOT NULL, "
+                    "period_start DATE NOT NULL, days INTEGER NOT NULL, planned_points FLOAT NOT NULL, "
+                    "completed_points FLOAT NOT NULL, score_sum FLOAT NOT NULL, "
+                    "CONSTRAINT uq_day_score_rollups_user_period UNIQUE (user_id, period, period_start))"
+                )
+            )
+        with engine.begin() as conn:
+            conn.execute(
+                text(
+                    "INSERT INTO day_scores (user_id, day, planned_points, completed_points, score) "
+                    "VALUES (NULL, '2026-03-02', 10, 5, 0.5)"
+                )
+            )
+            # Two concurrent reviews each inserted the week's row.
+            for _ in range(2):
+                conn.execute(
+                    text(
+                        "INSERT INTO day_score_rollups (user_id, period, period_start, days, planned_points, "
+                        "completed_points, score_sum) VALUES (NULL, 'week', '2026-03-02', 1, 10, 5, 0.5)"
+                    )
+                )
+
+        assert migrations.add_day_score_rollup_key(engine)
+        assert not migrations.add_day_score_rollup_key(engine)
+        with engine.connect() as conn:
+            assert migrations._has_index(conn, "day_score_rollups", "ux_day_score_rollups_user_period")
+        with Session(engine) as db:
+            weeks = db.execute(select(DayScoreRollup.days).where(DayScoreRollup.period == "week")).scalars().all()
+        assert weeks == [1]
+        engine.dispose()
+
+
+def test_review_day_records_the_requesting_users_score(client):
+    body = {"day": "2026-03-03", "planned_points": 10, "completed_points": 8}
+    client.post("/v1/review_day", json=body, headers={"X-User-Id": "1"}).raise_for_status()
+
+    params = {"start": "2026-03-03", "end": "2026-03-03"}
+    mine = client.get("/v1/day_scores", params=params, headers={"X-User-Id": "1"}).json()
+    theirs = client.get("/v1/day_scores", params=params, headers={"X-User-Id": "2"}).json()
+    assert (mine["recorded_days"], theirs["recorded_days"]) == (1, 0)
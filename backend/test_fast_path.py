@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+
+from backend.app.db.models import User
+from backend.app.llm import fast_path
+from backend.app.llm.tool_handlers import ToolContext
+
+
+# A Wednesday.
+TODAY = date(2026, 3, 4)
+
+
+def test_new_only_starts_a_command_as_new_task():
+    assert fast_path.match("new year party on friday", today=TODAY) is None
+    command = fast_path.match("new task: year party on friday", today=TODAY)
+    assert command is not None and command.arguments["title"] == "year party"
+    command = fast_path.match("create a new task dentist due tomorrow", today=TODAY)
+    assert command is not None and command.arguments["title"] == "dentist"
+
+
+def test_due_times_are_read_in_the_users_timezone():
+    berlin = ZoneInfo("Europe/Berlin")
+    due = fast_path.parse_due("tomorrow at 9am", today=TODAY, tz=berlin)
+    assert due == datetime(2026, 3, 5, 8, 0, tzinfo=timezone.utc)
+    end_of_day = fast_path.parse_due("friday", today=TODAY, tz=ZoneInfo("America/New_York"))
+    assert end_of_day == datetime(2026, 3, 7, 4, 59, tzinfo=timezone.utc)
+
+
+def test_today_is_the_users_date(monkeypatch):
+    class _Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            # 23:30 UTC on the 4th is already the 5th in Tokyo.
+            return datetime(2026, 3, 4, 23, 30, tzinfo=timezone.utc).astimezone(tz)
+
+    monkeypatch.setattr(fast_path, "datetime", _Clock)
+    command = fast_path.match("add pay rent due today at 9pm", tz=ZoneInfo("Asia/Tokyo"))
+    assert command is not None
+    assert command.arguments["due_at"] == datetime(2026, 3, 5, 12, 0, tzinfo=timezone.utc).isoformat()
+
+
+def test_handle_uses_the_stored_timezone(db):
+    db.add(User(email="tz@example.com", timezone="America/Los_Angeles"))
+    db.commit()
+    user_id = db.query(User.id).scalar()
+    assert fast_path.user_timezone(db, user_id) == ZoneInfo("America/Los_Angeles")
+    assert fast_path.user_timezone(db, None) == timezone.utc
+
+    resp = fast_path.handle(ToolContext(db=db, user_id=user_id), "add call the bank due 2026-03-05 at 9am")
+    assert resp is not None and resp.tool_results[0].ok
+    due = datetime.fromisoformat(resp.tool_results[0].result["due_at"])
+    assert due.replace(tzinfo=due.tzinfo or timezone.utc) == datetime(2026, 3, 5, 17, 0, tzinfo=timezone.utc)
+    assert "Thu Mar 05 09:00" in resp.reply
+
+
+def test_unknown_timezone_falls_back_to_utc(db):
+    db.add(User(email="bad@example.com", timezone="Mars/Olympus"))
+    db.commit()
+    assert fast_path.user_timezone(db, db.query(User.id).scalar()) == timezone.utc
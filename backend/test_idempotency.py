@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+from sqlalchemy import func, select, update
+
+from backend.app.core.config import settings
+from backend.app.db.models import IdempotencyRecord, Task
+from backend.app.db.session import SessionLocal
+from backend.app.schemas import TaskCreate
+from backend.app.services import event_service, idempotency_service, task_service
+
+
+def _create_once(db, key: str, title: str = "pay rent"):
+    return idempotency_service.execute_once(
+        db,
+        key,
+        fingerprint=idempotency_service.fingerprint("create", title),
+        run=lambda: task_service.create_task(db, TaskCreate(title=title), user_id=1).model_dump(mode="json"),
+        encode=lambda read: read.model_dump(mode="json"),
+    )
+
+
+def _tasks(db) -> int:
+    return db.scalar(select(func.count()).select_from(Task))
+
+
+def test_rest_retry_replays_the_first_response(client):
+    headers = {"X-User-Id": "1", "Idempotency-Key": "abc"}
+    first = client.post("/v1/tasks", json={"title": "once"}, headers=headers)
+    again = client.post("/v1/tasks", json={"title": "once"}, headers=headers)
+    assert again.headers["Idempotent-Replayed"] == "true"
+    assert again.json() == first.json()
+    assert len(client.get("/v1/tasks", headers={"X-User-Id": "1"}).json()) == 1
+
+    other = client.post("/v1/tasks", json={"title": "different"}, headers=headers)
+    assert other.status_code == 422
+
+
+def test_finished_key_keeps_the_full_ttl(db):
+    _create_once(db, "k")
+    record = db.get(IdempotencyRecord, "k")
+    assert record.status_code == 200
+    assert record.expires_at > time.time() + settings.idempotency_ttl_seconds - 60
+
+
+def test_pending_claim_is_a_short_lease_a_retry_can_take_over(db, client):
+    # A worker claimed the key and died before writing anything.
+    fp = idempotency_service.fingerprint("POST /v1/tasks", TaskCreate(title="retry").model_dump_json())
+    record, lease = idempotency_service._claim(db, "rest:1:crashed", fp, settings.idempotency_lease_seconds)
+    assert record is None
+    assert lease <= time.time() + settings.idempotency_lease_seconds
+
+    headers = {"X-User-Id": "1", "Idempotency-Key": "crashed"}
+    assert client.post("/v1/tasks", json={"title": "retry"}, headers=headers).status_code == 409
+
+    db.execute(update(IdempotencyRecord).values(expires_at=time.time() - 1))
+    db.commit()
+    resp = client.post("/v1/tasks", json={"title": "retry"}, headers=headers)
+    assert resp.status_code == 200
+    assert "Idempotent-Replayed" not in resp.headers
+
+
+def test_response_is_stored_with_the_write(db, monkeypatch):
+    def crash(*args, **kwargs):
+        raise RuntimeError("worker died after the commit")
+
+    monkeypatch.setattr(event_service, "publish_task", crash)
+    with pytest.raises(RuntimeError):
+        _create_once(db, "k")
+    monkeypatch.undo()
+
+    result, replayed = _create_once(db, "k")
+    assert replayed
+    assert result["title"] == "pay rent"
+    assert _tasks(db) == 1
+
+
+def test_write_is_rolled_back_when_the_lease_was_taken_over(db):
+    def run():
+        # Meanwhile the lease ran out and a retry claimed the key again.
+        with SessionLocal() as other:
+            other.execute(update(IdempotencyRecord).values(expires_at=time.time() + 30.5))
+            other.commit()
+        return task_service.create_task(db, TaskCreate(title="late"), user_id=1).model_dump(mode="json")
+
+    with pytest.raises(idempotency_service.IdempotencyKeyInProgress):
+        idempotency_service.execute_once(
+            db, "k", fingerprint="fp", run=run, encode=lambda read: read.model_dump(mode="json")
+        )
+    db.rollback()
+    assert _tasks(db) == 0
+    # The retry's claim is left alone.
+    assert db.get(IdempotencyRecord, "k").status_code is None
+
+
+def test_tool_call_retry_replays_without_writing_again(db):
+    from backend.app.llm.tool_handlers import ToolContext, execute_tool
+
+    ctx = ToolContext(db=db, user_id=1, session_id="s1")
+    first = execute_tool(ctx, name="create_task", arguments_json='{"title": "call mom"}', call_id="call_1")
+    again = execute_tool(ctx, name="create_task", arguments_json='{"title": "call mom"}', call_id="call_1")
+    assert first["ok"] and again["replayed"]
+    assert again["result"] == first["result"]
+    assert _tasks(db) == 1
+
+
+def test_calendar_move_retry_moves_the_event_once(db, monkeypatch):
+    from backend.app.llm.tool_handlers import ToolContext, execute_tool
+    from backend.app.services import calendar_service
+
+    moves = []
+    monkeypatch.setattr(calendar_service, "move_calendar_event", lambda **kw: moves.append(kw) or {"moved": True})
+    ctx = ToolContext(db=db, user_id=1, session_id="s1")
+    args = '{"event_id": "ev1", "new_start": "2026-03-02T09:00:00Z", "new_end": "2026-03-02T10:00:00Z"}'
+    first = execute_tool(ctx, name="calendar_move", arguments_json=args, call_id="call_1")
+    again = execute_tool(ctx, name="calendar_move", arguments_json=args, call_id="call_1")
+    assert first["ok"] and again["replayed"]
+    assert len(moves) == 1
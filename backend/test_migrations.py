@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+import os
+
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+
+from backend.app.db import migrations
+from backend.app.db.base import Base
+from backend.app.db.models import TaskLabel
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    """A database from before `task_labels`: tags and people as JSON columns on `tasks`."""
+    engine = create_engine(f"sqlite:///{os.path.join(tmp_path, 'legacy.db')}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN tags JSON"))
+        conn.execute(text("ALTER TABLE tasks ADD COLUMN required_people JSON"))
+        for title, tags, people in [("rent", ["Home", "home", "money"], []), ("offsite", ["work"], ["Ana"])]:
+            conn.execute(
+                text("INSERT INTO tasks (title, status, tags, required_people) VALUES (:t, 'inbox', :tags, :people)"),
+                {"t": title, "tags": json.dumps(tags), "people": json.dumps(people)},
+            )
+    yield engine
+    engine.dispose()
+
+
+def _labels(engine) -> list[tuple[str, str]]:
+    with engine.connect() as conn:
+        return sorted((k, v) for k, v in conn.execute(select(TaskLabel.kind, TaskLabel.value)))
+
+
+def test_boot_upgrade_leaves_legacy_columns_alone(legacy_engine):
+    pending = migrations.upgrade(legacy_engine)
+
+    assert pending and "migrate_task_labels" in pending[0]
+    with legacy_engine.connect() as conn:
+        assert migrations.legacy_label_columns(conn) == ["required_people", "tags"]
+    assert _labels(legacy_engine) == []
+
+
+def test_dry_run_reports_and_rolls_back(legacy_engine):
+    assert migrations.migrate_task_labels(legacy_engine, dry_run=True) == 4
+
+    with legacy_engine.connect() as conn:
+        assert migrations.legacy_label_columns(conn) == ["required_people", "tags"]
+    assert _labels(legacy_engine) == []
+    assert not inspect(legacy_engine).has_table(migrations.LABEL_BACKUP_TABLE)
+
+
+def test_backfill_moves_labels_keeps_a_backup_and_reruns_as_a_no_op(legacy_engine):
+    assert migrations.migrate_task_labels(legacy_engine) == 4
+
+    assert _labels(legacy_engine) == [("person", "Ana"), ("tag", "Home"), ("tag", "money"), ("tag", "work")]
+    with legacy_engine.connect() as conn:
+        assert migrations.legacy_label_columns(conn) == []
+        backup = conn.execute(text(f"SELECT task_id, tags FROM {migrations.LABEL_BACKUP_TABLE} ORDER BY task_id")).all()
+    assert [json.loads(tags) for _, tags in backup] == [["Home", "home", "money"], ["work"]]
+
+    assert migrations.migrate_task_labels(legacy_engine) == 0
+    assert len(_labels(legacy_engine)) == 4
+    assert migrations.upgrade(legacy_engine) == []
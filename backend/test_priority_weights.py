@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from backend.app.db.models import Task, User
+from backend.app.db.session import SessionLocal
+from backend.app.services import priority_weights, task_service, version_service
+from backend.app.services.prioritizer import DEFAULT_WEIGHTS
+
+
+NOW = datetime.now(tz=timezone.utc)
+
+
+def _user_with_history(db) -> int:
+    user = User(email="learner@example.com")
+    db.add(user)
+    db.flush()
+    state = priority_weights.UserWeights(weights=[w + 1.0 for w in DEFAULT_WEIGHTS], events=100)
+    user.priority_weights = state.to_json()
+    created = NOW - timedelta(days=2)
+    # Finished the unimportant task while an urgent one was open.
+    db.add_all(
+        [
+            Task(user_id=user.id, title="chore", status="done", importance=1, created_at=created, completed_at=NOW - timedelta(hours=1)),
+            Task(user_id=user.id, title="urgent", status="inbox", urgency=10, importance=10, created_at=created),
+        ]
+    )
+    db.commit()
+    return user.id
+
+
+def test_learning_versions_weights_apart_from_tasks(db):
+    user_id = _user_with_history(db)
+    task_service.list_tasks(db, user_id=user_id)
+    before = priority_weights.weights_for(db, user_id)
+    tasks_version = version_service.get_version(db, version_service.user_scope(user_id))
+
+    assert priority_weights.learn_user(db, user_id, until=NOW) == 1
+    db.commit()
+
+    assert version_service.get_version(db, version_service.user_scope(user_id)) == tasks_version
+    assert version_service.get_version(db, version_service.weights_scope(user_id))[0] == 1
+    with SessionLocal() as fresh:
+        after = priority_weights.weights_for(fresh, user_id)
+    assert after != before
+    # Ranked below an open task that mattered more, so importance counts for less now.
+    assert after[1] < before[1]
+
+
+def test_learning_skips_ids_without_a_users_row(db):
+    db.add(Task(user_id=42, title="x", status="done", completed_at=NOW - timedelta(hours=1)))
+    db.commit()
+
+    assert priority_weights.learn_user(db, 42, until=NOW) == 0
+    db.commit()
+    assert db.get(User, 42) is None
+    assert priority_weights.weights_for(db, 42) == DEFAULT_WEIGHTS
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import column, create_engine, insert, table, text
+
+from backend.app import main
+from backend.app.core.ratelimit import SQLiteStore
+from backend.app.db.session import router
+from backend.app.db.sharding import ReadYourWrites, ShardRouter
+
+
+def test_write_marks_are_shared_between_processes(tmp_path):
+    path = os.path.join(tmp_path, "ratelimit.db")
+    # Two workers: separate trackers and connections over one file.
+    writer = ReadYourWrites(0.2, SQLiteStore(path))
+    reader = ReadYourWrites(0.2, SQLiteStore(path))
+
+    writer.mark("default", 7)
+    assert reader.active("default", 7)
+    assert not reader.active("default", 8)
+    assert not reader.active("other", 7)
+    time.sleep(0.25)
+    assert not reader.active("default", 7)
+
+
+def test_write_marks_without_a_shared_store_stay_in_process():
+    writer, reader = ReadYourWrites(5.0), ReadYourWrites(5.0)
+    writer.mark("default", None)
+    assert writer.active("default", None)
+    assert not reader.active("default", None)
+
+
+class _Job:
+    def __init__(self) -> None:
+        self.starts = 0
+
+    def start(self) -> None:
+        self.starts += 1
+
+    def stop(self) -> None:
+        pass
+
+
+def test_background_jobs_run_once_under_gunicorn(monkeypatch):
+    archiver, learner = _Job(), _Job()
+    monkeypatch.setattr(main, "archiver", archiver)
+    monkeypatch.setattr(main, "learner", learner)
+    monkeypatch.setattr(main, "_jobs_in_master", False)
+    main.start_jobs_in_master()
+    # Workers forked from the master run their startup without starting their own.
+    with TestClient(main.app):
+        pass
+    assert (archiver.starts, learner.starts) == (1, 1)
+
+
+def test_commits_mark_only_shards_with_a_replica():
+    router = ShardRouter(
+        {"a": "sqlite://", "b": "sqlite://"},
+        engine_factory=lambda url: create_engine(url, future=True),
+        replicas={"a": "sqlite://"},
+    )
+    for shard in ("a", "b"):
+        with router.session(shard) as db:
+            db.execute(text("CREATE TABLE t (x INTEGER)"))
+            db.execute(insert(table("t", column("x"))).values(x=1))
+            db.commit()
+            assert db.info["wrote"]
+    assert router.recent_writes.active("a", None)
+    assert not router.recent_writes.active("b", None)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_workers_leave_the_jobs_connections_alone():
+    # What the archiver and learner do in the master: hold a router session while gunicorn forks.
+    parent_engine = router.engine(router.default)
+    with router.session(router.default) as db:
+        db.execute(text("SELECT 1"))
+        held = db.connection().connection.dbapi_connection
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                with router.session(router.default) as child_db:
+                    child_db.execute(text("SELECT 1"))
+                    own = child_db.connection().connection.dbapi_connection
+                if router.engine(router.default) is not parent_engine and own is not held:
+                    code = 0
+            finally:
+                os._exit(code)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+        # The child neither reused nor closed the master's connection.
+        assert db.execute(text("SELECT 1")).scalar_one() == 1
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from backend.app.db.models import User
+from backend.app.schemas import TaskCreate, TaskUpdate
+from backend.app.services import task_service
+from backend.app.services.recurrence import Rule
+
+UTC = timezone.utc
+NY = ZoneInfo("America/New_York")
+
+
+def _local(*args: int, tz=NY) -> datetime:
+    return datetime(*args, tzinfo=tz).astimezone(UTC)
+
+
+def _in_ny(dt: datetime) -> datetime:
+    # SQLite hands back naive UTC.
+    return (dt if dt.tzinfo else dt.replace(tzinfo=UTC)).astimezone(NY)
+
+
+def test_byday_picks_weekdays_in_the_users_timezone():
+    # Monday 2026-03-02 21:00 in New York is already Tuesday in UTC.
+    start = _local(2026, 3, 2, 21)
+    got = Rule.parse("FREQ=WEEKLY;BYDAY=MO,WE").between(start, start, _local(2026, 3, 10), tz=NY)
+    assert [d.astimezone(NY).strftime("%a %H:%M") for d in got] == ["Mon 21:00", "Wed 21:00", "Mon 21:00"]
+
+
+def test_count_and_interval():
+    start = datetime(2026, 1, 5, 9, tzinfo=UTC)
+    got = list(Rule.parse("FREQ=DAILY;INTERVAL=3;COUNT=4").iter(start))
+    assert [d.day for d in got] == [5, 8, 11, 14]
+
+
+def test_until_bounds_the_series():
+    start = _local(2026, 1, 5, 9)
+    utc_until = list(Rule.parse("FREQ=WEEKLY;UNTIL=20260119T140000Z").iter(start, tz=NY))
+    # A floating (date-only) UNTIL is the user's day, not UTC's.
+    local_until = list(Rule.parse("FREQ=DAILY;UNTIL=20260107").iter(start, tz=NY))
+    assert [d.astimezone(NY).day for d in utc_until] == [5, 12, 19]
+    assert [d.astimezone(NY).day for d in local_until] == [5, 6, 7]
+
+
+def test_local_time_holds_across_dst():
+    # US clocks spring forward on 2026-03-08: 9:00 local moves from 14:00 to 13:00 UTC.
+    start = _local(2026, 3, 6, 9)
+    got = list(Rule.parse("FREQ=DAILY;COUNT=4").iter(start, tz=NY))
+    assert [d.astimezone(NY).hour for d in got] == [9, 9, 9, 9]
+    assert [d.hour for d in got] == [14, 14, 13, 13]
+    # Expanding in UTC would keep 14:00 UTC, i.e. 10:00 local after the change.
+    assert [d.hour for d in Rule.parse("FREQ=DAILY;COUNT=4").iter(start)] == [14, 14, 14, 14]
+
+
+def test_a_wall_time_skipped_by_dst_moves_past_the_gap():
+    start = _local(2026, 3, 7, 2, 30)
+    got = list(Rule.parse("FREQ=DAILY;COUNT=2").iter(start, tz=NY))
+    assert got[1].astimezone(NY).strftime("%d %H:%M") == "08 03:30"
+
+
+def test_until_serializes_in_its_own_form():
+    assert str(Rule.parse("FREQ=DAILY;UNTIL=20260107")) == "FREQ=DAILY;UNTIL=20260107T235959"
+    assert str(Rule.parse("FREQ=DAILY;UNTIL=20260107T120000Z")) == "FREQ=DAILY;UNTIL=20260107T120000Z"
+
+
+def test_completing_a_recurring_task_keeps_the_users_local_time(db):
+    user = User(email="ny@example.com", timezone="America/New_York")
+    db.add(user)
+    db.commit()
+    # Friday before the DST change, 9:00 New York (in the future, so completing it now
+    # advances one week); weekly, so the next due date is past the change.
+    due = _local(2030, 3, 8, 9)
+    task = task_service.create_task(db, TaskCreate(title="Standup", due_at=due, recurrence="FREQ=WEEKLY"), user_id=user.id)
+
+    done = task_service.update_task(db, task.id, TaskUpdate(status="done"), user_id=user.id)
+    assert _in_ny(done.due_at) == datetime(2030, 3, 15, 9, tzinfo=NY)
+
+    occurrences = task_service.list_occurrences(
+        db, start=_local(2030, 3, 1), end=_local(2030, 3, 23), user_id=user.id
+    )
+    assert [_in_ny(o.due_at).strftime("%d %H:%M") for o in occurrences] == ["08 09:00", "15 09:00", "22 09:00"]
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from backend.app.core import metrics, ratelimit
+from backend.app.llm.client import LLMClient, LLMError, LLMMessage, ToolCall
+from backend.app.llm.orchestrator import _complete, run_chat
+from backend.app.llm.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    DegradedLLMClient,
+    FaultInjectingLLMClient,
+    ResilientLLMClient,
+)
+from backend.app.schemas import ChatRequest
+
+
+class _Scripted(LLMClient):
+    """Returns (or raises) the scripted replies in order."""
+
+    def __init__(self, *replies: LLMMessage | Exception) -> None:
+        self.replies = list(replies)
+
+    def complete(self, *, messages: list[dict[str, Any]], tools: list[dict[str, Any]]) -> LLMMessage:
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def _breaker(**kwargs) -> CircuitBreaker:
+    return CircuitBreaker(**{"window": 4, "failure_ratio": 0.5, "min_calls": 2, "cooldown_s": 30.0, **kwargs})
+
+
+def _resilient(inner: LLMClient, **kwargs) -> ResilientLLMClient:
+    return ResilientLLMClient(inner, breaker=_breaker(), fallback=DegradedLLMClient(), sleep=lambda s: None, **kwargs)
+
+
+def test_breaker_opens_then_probes_once_after_cooldown():
+    now = [0.0]
+    breaker = _breaker(clock=lambda: now[0])
+    breaker.record(False)
+    breaker.record(False)
+    assert breaker.state == OPEN and not breaker.allow()
+
+    now[0] = 31.0
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # one probe at a time
+    breaker.record(True)
+    assert breaker.state == CLOSED
+
+
+def test_degraded_reply_reports_a_write_that_already_ran(db):
+    create = ToolCall(id="call_1", name="create_task", arguments='{"title": "pay rent"}')
+    client = _resilient(
+        _Scripted(LLMMessage(content=None, tool_calls=[create]), LLMError("down", kind="server_error", status_code=503)),
+        max_retries=0,
+    )
+    resp = run_chat(db, request=ChatRequest(message="remember to pay rent", user_id=1), llm_client=client, use_fast_path=False)
+
+    assert [r.ok for r in resp.tool_results] == [True]
+    assert resp.reply.startswith('Saved "pay rent".')
+    assert "unavailable" in resp.reply
+    assert "0 task" not in resp.reply
+
+
+def test_degraded_reply_for_a_list(db):
+    call = ToolCall(id="call_1", name="list_tasks", arguments="{}")
+    client = _resilient(
+        _Scripted(LLMMessage(content=None, tool_calls=[call]), LLMError("down", kind="server_error", status_code=503)),
+        max_retries=0,
+    )
+    resp = run_chat(db, request=ChatRequest(message="what's on my list", user_id=1), llm_client=client, use_fast_path=False)
+    assert resp.reply.startswith("Here are your 0 task(s).")
+
+
+def test_retry_backoff_does_not_hold_a_concurrency_slot():
+    free_while_sleeping: list[int] = []
+    client = ResilientLLMClient(
+        FaultInjectingLLMClient(_Scripted(), error_rate=1.0),
+        breaker=_breaker(min_calls=10),
+        max_retries=2,
+        sleep=lambda s: free_while_sleeping.append(ratelimit._llm_slots._value),
+    )
+    try:
+        _complete(client, messages=[{"role": "user", "content": "hi"}], tools=[])
+    except LLMError:
+        pass
+    assert free_while_sleeping == [ratelimit._llm_slots._initial_value] * 2
+
+
+def test_llm_slot_is_released_when_the_call_raises():
+    slots = ratelimit._llm_slots._initial_value
+    with pytest.raises(RuntimeError):
+        with ratelimit.llm_slot():
+            raise RuntimeError("provider blew up")
+    # More failing provider calls than there are slots: none may leak.
+    client = FaultInjectingLLMClient(_Scripted(), error_rate=1.0)
+    for _ in range(slots + 1):
+        with pytest.raises(LLMError):
+            client.complete(messages=[{"role": "user", "content": "hi"}], tools=[])
+
+    assert ratelimit._llm_slots._value == slots
+    assert metrics.LLM_IN_FLIGHT.value() == 0
+    assert metrics.LLM_QUEUED.value() == 0
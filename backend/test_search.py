@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import pytest
+from sqlalchemy import text
+
+from backend.app.db.models import Task
+from backend.app.db.session import SessionLocal, engine
+from backend.app.schemas import TaskCreate
+from backend.app.services import search_service, task_service
+
+
+def _index_committed() -> bool:
+    with engine.connect() as conn:
+        return search_service._index_exists(conn)
+
+
+@pytest.fixture
+def no_index():
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE task_fts"))
+    search_service._ready.discard(engine)
+    yield
+    search_service.ensure_index(engine)
+
+
+def test_write_that_rolls_back_does_not_mark_the_index_ready(no_index, db):
+    task = Task(title="dentist appointment")
+    db.add(task)
+    db.flush()
+    search_service.index_task(db, task)
+    db.rollback()
+
+    assert engine not in search_service._ready
+    assert not _index_committed()
+
+
+def test_search_builds_the_index_in_its_own_committed_transaction(db):
+    task_service.create_task(db, TaskCreate(title="call the dentist"), user_id=None)
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE task_fts"))
+    search_service._ready.discard(engine)
+
+    with SessionLocal() as reader:
+        hits = search_service.search_tasks(reader, "dent")
+        # Visible to other connections while the read session is still open.
+        assert _index_committed()
+    assert [h.title for h in hits] == ["call the dentist"]
+    assert engine in search_service._ready
+
+
+def test_index_found_on_a_write_is_marked_ready(db):
+    search_service._ready.discard(engine)
+    task_service.create_task(db, TaskCreate(title="renew passport"), user_id=None)
+    assert engine in search_service._ready
+    assert [h.title for h in search_service.search_tasks(db, "passport")] == ["renew passport"]
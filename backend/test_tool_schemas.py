@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.app.llm.tool_handlers import ToolContext, execute_tool
+from backend.app.llm.tool_schemas import get_tool_schemas
+
+_MINUTES = {"exclusiveMinimum": 0, "type": "integer"}
+_SCORE = {"maximum": 10, "minimum": 0, "type": "integer"}
+_STRINGS = {"items": {"type": "string"}, "type": "array"}
+_TASK_FIELDS = {
+    "urgency": _SCORE,
+    "importance": _SCORE,
+    "impact": _SCORE,
+    "effort_minutes": _MINUTES,
+    "optimistic_minutes": _MINUTES,
+    "most_likely_minutes": _MINUTES,
+    "pessimistic_minutes": _MINUTES,
+    "external_constraints": {"type": "string"},
+    "required_resources": _STRINGS,
+    "required_people": _STRINGS,
+    "tags": _STRINGS,
+    "depends_on_ids": {"items": {"minimum": 1, "type": "integer"}, "type": "array"},
+}
+
+EXPECTED = {
+    "create_task": {
+        "type": "object",
+        "additionalProperties": False,
+        "properties": {
+            "title": {"description": "Short title (use description if no title).", "maxLength": 200, "type": "string"},
+            "description": {"description": "Longer details.", "type": "string"},
+            "status": {"description": "Task status (inbox/planned/in_progress/done/canceled).", "type": "string"},
+            "due_at": {"description": "ISO 8601 datetime, e.g. 2026-02-04T17:00:00Z", "format": "date-time", "type": "string"},
+            **_TASK_FIELDS,
+            "recurrence": {
+                "description": "Repeat rule, RRULE style: FREQ=DAILY|WEEKLY|MONTHLY|YEARLY[;INTERVAL=n][;BYDAY=MO,TH][;BYMONTHDAY=1,-1][;COUNT=n|UNTIL=YYYYMMDD].",
+                "maxLength": 255,
+                "type": "string",
+            },
+        },
+        "required": ["title"],
+    },
+    "update_task": {
+        "type": "object",
+        "additionalProperties": False,
+        "properties": {
+            "title": {"maxLength": 200, "type": "string"},
+            "description": {"type": "string"},
+            "status": {"type": "string"},
+            "due_at": {"description": "ISO 8601 datetime", "format": "date-time", "type": "string"},
+            **_TASK_FIELDS,
+            "recurrence": {"maxLength": 255, "type": "string"},
+            "task_id": {"minimum": 1, "type": "integer"},
+        },
+        "required": ["task_id"],
+    },
+}
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_task_tool_schemas(name):
+    schemas = {s["function"]["name"]: s["function"] for s in get_tool_schemas()}
+    assert schemas[name]["parameters"] == EXPECTED[name]
+
+
+def test_dependency_ids_below_one_are_rejected(db):
+    result = execute_tool(ToolContext(db=db), name="create_task", arguments_json='{"title": "x", "depends_on_ids": [0]}')
+    assert not result["ok"]
+    assert "depends_on_ids" in result["error"]
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import builtins
+import dataclasses
+import json
+import os
+import threading
+
+from backend.app.core import metrics, tracing
+from backend.app.core.config import settings
+
+
+def _trace(name: str) -> tracing.Trace:
+    with tracing.start_trace(name, sampled=True) as trace:
+        with tracing.span("work"):
+            pass
+    return trace
+
+
+def test_export_queues_and_the_writer_thread_appends(monkeypatch, tmp_path):
+    path = os.path.join(tmp_path, "traces.jsonl")
+    monkeypatch.setattr(tracing, "settings", dataclasses.replace(settings, trace_export_path=path))
+    monkeypatch.setattr(tracing, "_exporter", tracing._Exporter())
+    release = threading.Event()
+    real_open = builtins.open
+
+    def slow_open(*args, **kwargs):
+        assert threading.current_thread().name == "trace-exporter"
+        release.wait(5.0)
+        return real_open(*args, **kwargs)
+
+    monkeypatch.setattr(tracing, "open", slow_open, raising=False)
+    tracing.export_trace(_trace("GET /a"))
+    tracing.export_trace(_trace("GET /b"))
+    # Neither call waited for the (stalled) write.
+    assert not os.path.exists(path)
+
+    release.set()
+    tracing.flush_exports()
+    with open(path, encoding="utf-8") as f:
+        names = [json.loads(line)["name"] for line in f]
+    assert names == ["GET /a", "GET /b"]
+
+
+def test_export_drops_traces_when_the_queue_is_full(monkeypatch, tmp_path):
+    path = os.path.join(tmp_path, "traces.jsonl")
+    monkeypatch.setattr(tracing, "settings", dataclasses.replace(settings, trace_export_path=path))
+    exporter = tracing._Exporter(max_pending=1)
+    monkeypatch.setattr(tracing, "_exporter", exporter)
+    release = threading.Event()
+    real_open = builtins.open
+    monkeypatch.setattr(tracing, "open", lambda *a, **kw: release.wait(5.0) and real_open(*a, **kw), raising=False)
+
+    before = metrics.TRACES_DROPPED._values.get((), 0.0)
+    for i in range(5):
+        tracing.export_trace(_trace(f"GET /{i}"))
+    assert metrics.TRACES_DROPPED._values.get((), 0.0) > before
+
+    release.set()
+    tracing.flush_exports()
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+
+def _create(client, user_id: int | None, title: str, **fields) -> dict:
+    headers = {"X-User-Id": str(user_id)} if user_id is not None else {}
+    resp = client.post("/v1/tasks", json={"title": title, **fields}, headers=headers)
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def _as(user_id: int) -> dict[str, str]:
+    return {"X-User-Id": str(user_id)}
+
+
+def test_lists_only_the_callers_tasks(client):
+    mine = _create(client, 1, "mine")
+    _create(client, 2, "theirs")
+    _create(client, None, "nobody's")
+
+    assert [t["id"] for t in client.get("/v1/tasks", headers=_as(1)).json()] == [mine["id"]]
+    assert [t["title"] for t in client.get("/v1/tasks").json()] == ["nobody's"]
+
+
+def test_prioritize_ranks_only_the_callers_tasks(client):
+    mine = _create(client, 1, "mine", urgency=5)
+    theirs = _create(client, 2, "theirs", urgency=5)
+
+    results = client.post("/v1/prioritize", json={}, headers=_as(1)).json()["results"]
+    assert [r["task_id"] for r in results] == [mine["id"]]
+    picked = client.post("/v1/prioritize", json={"task_ids": [theirs["id"]]}, headers=_as(1)).json()["results"]
+    assert picked == []
+
+
+def test_other_users_tasks_are_not_found(client):
+    theirs = _create(client, 2, "theirs")
+    url = f"/v1/tasks/{theirs['id']}"
+
+    assert client.get(url, headers=_as(1)).status_code == 404
+    assert client.patch(url, json={"status": "done"}, headers=_as(1)).status_code == 404
+    assert client.get(url, headers=_as(2)).json()["status"] == "inbox"
+
+
+def test_changes_use_the_request_user(client):
+    mine = _create(client, 1, "mine")
+    _create(client, 2, "theirs")
+
+    changes = client.get("/v1/changes", headers=_as(1)).json()
+    assert [t["id"] for t in changes["tasks"]] == [mine["id"]]
+    by_query = client.get("/v1/changes", params={"user_id": 1}).json()
+    assert [t["id"] for t in by_query["tasks"]] == [mine["id"]]
+
+
+def test_websocket_only_pushes_the_users_events(client):
+    with client.websocket_connect("/v1/ws", headers=_as(1)) as ws:
+        _create(client, 2, "theirs")
+        mine = _create(client, 1, "mine")
+        event = ws.receive_json()
+    assert event["type"] == "task.created"
+    assert event["task"]["id"] == mine["id"]
+
+
+def test_tasks_cannot_depend_on_other_users_tasks(client):
+    mine = _create(client, 1, "mine")
+    theirs = _create(client, 2, "theirs")
+
+    resp = client.post("/v1/tasks", json={"title": "x", "depends_on_ids": [theirs["id"]]}, headers=_as(1))
+    assert resp.status_code == 400
+    assert str(theirs["id"]) in resp.json()["detail"]
+    resp = client.patch(f"/v1/tasks/{mine['id']}", json={"depends_on_ids": [theirs["id"], 9999]}, headers=_as(1))
+    assert resp.status_code == 404
+    assert [t["title"] for t in client.get("/v1/tasks", headers=_as(1)).json()] == ["mine"]
+
+    ok = client.patch(f"/v1/tasks/{mine['id']}", json={"depends_on_ids": []}, headers=_as(1))
+    assert ok.status_code == 200
+    dep = _create(client, 1, "dep")
+    linked = client.patch(f"/v1/tasks/{mine['id']}", json={"depends_on_ids": [dep["id"]]}, headers=_as(1)).json()
+    assert linked["depends_on_ids"] == [dep["id"]]
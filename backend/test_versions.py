@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+
+def _create(client, user_id: int, title: str) -> dict:
+    resp = client.post("/v1/tasks", json={"title": title}, headers={"X-User-Id": str(user_id)})
+    assert resp.status_code == 200, resp.text
+    return resp.json()
+
+
+def test_list_etag_ignores_other_users_writes(client):
+    _create(client, 1, "mine")
+    first = client.get("/v1/tasks", headers={"X-User-Id": "1"})
+    etag = first.headers["ETag"]
+
+    _create(client, 2, "someone else's")
+    again = client.get("/v1/tasks", headers={"X-User-Id": "1", "If-None-Match": etag})
+    assert again.status_code == 304
+
+    _create(client, 1, "mine too")
+    changed = client.get("/v1/tasks", headers={"X-User-Id": "1", "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_task_etag_follows_its_users_writes(client):
+    task = _create(client, 1, "detail")
+    url = f"/v1/tasks/{task['id']}"
+    etag = client.get(url, headers={"X-User-Id": "1"}).headers["ETag"]
+
+    _create(client, 2, "unrelated")
+    assert client.get(url, headers={"X-User-Id": "1", "If-None-Match": etag}).status_code == 304
+
+    client.patch(url, json={"status": "done"}, headers={"X-User-Id": "1"}).raise_for_status()
+    assert client.get(url, headers={"X-User-Id": "1", "If-None-Match": etag}).status_code == 200
+
+
+def test_writes_bump_only_the_users_scope(db):
+    from backend.app.db.models import DataVersion
+    from backend.app.services import version_service
+
+    version_service.bump(db, user_id=7)
+    db.commit()
+    assert {row.scope for row in db.query(DataVersion)} == {"user:7"}
+    assert version_service.get_version(db, version_service.user_scope(7))[0] == 1
+    assert version_service.get_version(db, version_service.user_scope(8)) == (0, None)
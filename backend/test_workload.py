@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from backend.app.db.models import LabelKind
+from backend.app.schemas import TaskCreate
+from backend.app.services import task_service
+
+
+class _Clock(datetime):
+    now_value = datetime(2026, 3, 2, 9, 0, 30, tzinfo=timezone.utc)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.now_value
+
+
+def test_overdue_count_follows_the_clock_through_the_cache(db, monkeypatch):
+    monkeypatch.setattr(task_service, "datetime", _Clock)
+    due = datetime(2026, 3, 2, 9, 30, tzinfo=timezone.utc)
+    task_service.create_task(db, TaskCreate(title="call", due_at=due, required_people=["Ana"]), user_id=1)
+
+    def overdue() -> int:
+        db.info.pop("task_cache", None)  # a new request: only the shared cache carries over
+        (row,) = task_service.label_workload(db, LabelKind.person, user_id=1)
+        return row.overdue_tasks
+
+    assert overdue() == 0
+    monkeypatch.setattr(_Clock, "now_value", due + timedelta(minutes=1))
+    assert overdue() == 1
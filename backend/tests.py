@@ -1,32 +1,32 @@
 from datetime import date, time
-from task_formats import ToDoTask
 
+from backend.schemas import TaskInput
+from backend.task_formats import ToDoTask
 
-def test_end_time_calculation():
-    task = ToDoTask(
-        date(2026, 1, 20),
-        time(9, 0),
-        "Test task",
-        optimistic_minutes=30,
-        most_likely_minutes=60,
-        pessimistic_minutes=90,
-        importance="Medium",
-        note="Test",
+
+def _task(d, t, description, optimistic, most_likely, pessimistic, **kwargs):
+    return ToDoTask(
+        TaskInput(
+            description=description,
+            date_of_task=d,
+            time_of_task=t,
+            optimistic_minutes=optimistic,
+            most_likely_minutes=most_likely,
+            pessimistic_minutes=pessimistic,
+            **kwargs,
+        )
     )
 
+
+def test_end_time_calculation():
+    task = _task(date(2026, 1, 20), time(9, 0), "Test task", 30, 60, 90, importance="Medium", note="Test")
+
     # Expected duration = (30 + 4*60 + 90) / 6 = 60 minutes
     assert task.end_datetime.hour == 10
     assert task.end_datetime.minute == 0
 
 def test_start_datetime():
-    task = ToDoTask(
-        date(2026, 2, 1),
-        time(14, 30),
-        "Start time test",
-        10, 20, 30,
-        importance="Low",
-        note=""
-    )
+    task = _task(date(2026, 2, 1), time(14, 30), "Start time test", 10, 20, 30, importance="Low", note="")
 
     assert task.start_datetime.year == 2026
     assert task.start_datetime.hour == 14
@@ -34,65 +34,28 @@ def test_start_datetime():
 
 
 def test_standard_deviation():
-    task = ToDoTask(
-        date(2026, 1, 1),
-        time(8, 0),
-        "SD test",
-        30, 60, 90,
-        "Low",
-        ""
-    )
+    task = _task(date(2026, 1, 1), time(8, 0), "SD test", 30, 60, 90, importance="Low", note="")
 
     # (90 - 30) / 6 = 10
-    assert task.std_dev_minutes == 10
+    assert task.std_dev == 10
 
 
 def test_crossing_midnight():
-    task = ToDoTask(
-        date(2026, 1, 1),
-        time(23, 30),
-        "Late task",
-        30, 60, 90,
-        importance="Medium",
-        note=""
-    )
+    task = _task(date(2026, 1, 1), time(23, 30), "Late task", 30, 60, 90, importance="Medium", note="")
 
     assert task.end_datetime.day == 2
 
 
-def test_slack_risk_score():
-    flexible_task = ToDoTask(
-        date(2026, 1, 1),
-        time(9, 0),
-        "Flexible",
-        30, 60, 90,
-        importance="Low",
-        note="",
-        due_date_flexible=True
-    )
-
-    inflexible_task = ToDoTask(
-        date(2026, 1, 1),
-        time(9, 0),
-        "Inflexible",
-        30, 60, 90,
-        importance="High",
-        note="",
-        due_date_flexible=False
-    )
+def test_summary_reports_spread_as_risk():
+    narrow = _task(date(2026, 1, 1), time(9, 0), "Narrow", 55, 60, 65, importance="Low", note="")
+    wide = _task(date(2026, 1, 1), time(9, 0), "Wide", 30, 60, 150, importance="High", note="")
 
-    assert inflexible_task.slack_risk_score() > flexible_task.slack_risk_score()
+    assert wide.summary()["risk"] > narrow.summary()["risk"]
+    assert narrow.summary()["start"] == "2026-01-01T09:00:00"
 
 def test_missing_date_raises_error():
     try:
-        ToDoTask(
-            None,
-            time(9, 0),
-            "Invalid task",
-            30, 60, 90,
-            importance="Low",
-            note=""
-        )
+        _task(None, time(9, 0), "Invalid task", 30, 60, 90, importance="Low", note="")
         assert False, "Expected ValueError for missing date"
     except ValueError:
         assert True
@@ -102,7 +65,7 @@ if __name__ == "__main__":
     test_end_time_calculation()
     test_standard_deviation()
     test_crossing_midnight()
-    test_slack_risk_score()
+    test_summary_reports_spread_as_risk()
     test_missing_date_raises_error()
 
     print("All tests ran.")
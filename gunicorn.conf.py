@@ -0,0 +1,48 @@
+"""
+Production server settings: `gunicorn backend.main:app` (gunicorn reads this file from
+the working directory). Tunables come from `Settings` (WEB_CONCURRENCY, THREADPOOL_SIZE,
+KEEP_ALIVE_SECONDS).
+
+The master imports the app once (`preload_app`) and runs `warm_up` before forking, so
+workers start with the schema checked and the chat caches built, and share those pages
+copy-on-write. Each worker opens its own database connections (see db/session.py).
+The master also runs the archiver and the priority learner, once for all workers.
+
+With more than one worker, set PUBSUB_BACKEND=sqlite and RATE_LIMIT_BACKEND=sqlite so
+WebSocket events, rate limits and read-your-writes marks are shared between them.
+"""
+
+import os
+
+from backend.app.core.config import settings
+
+
+def _cpus() -> int:
+    try:
+        # CPUs this process may run on (respects affinity / container cpusets).
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = settings.web_concurrency or _cpus()
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+keepalive = settings.keep_alive_seconds
+# A chat turn may wait on every LLM retry; don't kill a worker that is only waiting.
+timeout = int(settings.llm_timeout_seconds * (settings.llm_max_retries + 1)) + 30
+graceful_timeout = 30
+
+
+def when_ready(server) -> None:
+    from backend.app.main import start_jobs_in_master, warm_up
+
+    warm_up()
+    start_jobs_in_master()
+
+
+def on_exit(server) -> None:
+    from backend.app.main import stop_jobs_in_master
+
+    stop_jobs_in_master()